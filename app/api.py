@@ -1,17 +1,46 @@
-import uvicorn
+import logging
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from nicelog import setup_logging
+from prometheus_client import multiprocess
+from routers.middleware import MetricsMiddleware
 from routers.popular import PopularView
+from routers.responses import ORJSONResponse
 from routers.utils import UtilsView
+from services.github import close_client, get_client
+from services.local_cache import start_invalidation_listener, stop_invalidation_listener
+from services.redis_client import close_redis, get_redis
+from warmer import start_warmer, stop_warmer
 
 API_VERSION = "v1"
 
 
+@asynccontextmanager
+async def lifespan(app):
+    # the pools are shared by every request of the worker, opened before the first one and closed after the last
+    get_client()
+    get_redis()
+    start_invalidation_listener()
+    start_warmer()
+    yield
+    await stop_warmer()
+    await stop_invalidation_listener()
+    await close_client()
+    await close_redis()
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        # drops the in-flight gauges of this worker from the aggregated metrics
+        multiprocess.mark_process_dead(os.getpid())
+
+
 def create_app():
     setup_logging()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
 
-    app = FastAPI()
+    app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
     app.router.redirect_slashes = True
+    app.add_middleware(MetricsMiddleware)
 
     configure_routers(app)
 
@@ -25,5 +54,6 @@ def configure_routers(app):
 
 
 if __name__ == "__main__":
-    application = create_app()
-    uvicorn.run(application, host="0.0.0.0", port=8000)
+    from server import main
+
+    main()
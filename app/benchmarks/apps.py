@@ -0,0 +1,20 @@
+"""uvicorn factories of the application under benchmark, with fakeredis when BENCH_FAKE_REDIS=1."""
+
+import os
+
+
+def use_fake_redis() -> bool:
+    return os.getenv("BENCH_FAKE_REDIS") == "1"
+
+
+def popular_app():
+    if use_fake_redis():
+        import fakeredis
+        from services import redis_client
+
+        server = fakeredis.FakeServer()
+        redis_client.create_redis = lambda **kwargs: fakeredis.FakeAsyncRedis(server=server)
+
+    from api import create_app
+
+    return create_app()
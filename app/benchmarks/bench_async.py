@@ -0,0 +1,38 @@
+import argparse
+import asyncio
+import json
+import uuid
+
+from benchmarks.utils import run_load, serve
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency-ms", type=int, default=50)
+    args = parser.parse_args()
+
+    with serve("benchmarks.fake_github:create_app", env={"FAKE_GITHUB_LATENCY_MS": str(args.latency_ms)}) as github:
+        env = {"GITHUB_API_URL": github, "GITHUB_API_ACCESS_TOKEN": "token"}
+        results = {}
+        for label, factory in (
+            ("sync", "benchmarks.sync_baseline:create_app"),
+            ("async", "benchmarks.apps:popular_app"),
+        ):
+            run_id = uuid.uuid4().hex[:8]
+            with serve(factory, env=env) as app:
+                results[label] = asyncio.run(
+                    run_load(
+                        app,
+                        lambda index: f"/v1/popular/repository?repository_name=bench/{run_id}-{index}",
+                        args.requests,
+                        args.concurrency,
+                    )
+                )
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
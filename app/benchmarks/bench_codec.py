@@ -0,0 +1,73 @@
+import argparse
+import json
+import time
+
+import msgpack
+import orjson
+from benchmarks.fake_github import repository_counts
+from services.codec import get_codec
+
+
+def org_items(org_size: int) -> list:
+    items = []
+    for index in range(org_size):
+        stars, forks = repository_counts("bench", f"repo-{index}")
+        score = stars + forks * 2
+        items.append({"score": score, "owner": "bench", "name": f"repo-{index}", "is_popular": score >= 500})
+    return items
+
+
+SERIALIZERS = {
+    "json": (
+        lambda items: b"".join(json.dumps(item, separators=(",", ":")).encode("utf-8") + b"\n" for item in items),
+        lambda value: value,
+    ),
+    "orjson": (lambda items: b"".join(orjson.dumps(item) + b"\n" for item in items), lambda value: value),
+    "msgpack": (
+        msgpack.packb,
+        lambda value: b"".join(orjson.dumps(item) + b"\n" for item in msgpack.unpackb(value)),
+    ),
+}
+
+
+def timed(fn, iterations: int) -> tuple:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        result = fn()
+    return (time.perf_counter() - started) / iterations, result
+
+
+def measure(items: list, serializer: str, compression: str, iterations: int) -> dict:
+    serialize, to_body = SERIALIZERS[serializer]
+    compress, decompress = get_codec(compression) if compression != "none" else (lambda value: value,) * 2
+
+    encode_seconds, stored = timed(lambda: compress(serialize(items)), iterations)
+    decode_seconds, body = timed(lambda: to_body(decompress(stored)), iterations)
+    assert body.count(b"\n") == len(items)
+
+    return {
+        "serializer": serializer,
+        "compression": compression,
+        "stored_kb": round(len(stored) / 1024, 1),
+        "encode_ms": round(encode_seconds * 1000, 2),
+        "decode_ms": round(decode_seconds * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--org-size", type=int, default=5000)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    items = org_items(args.org_size)
+    results = [
+        measure(items, serializer, compression, args.iterations)
+        for serializer in SERIALIZERS
+        for compression in ("none", "zstd", "lz4")
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
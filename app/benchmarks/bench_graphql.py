@@ -0,0 +1,73 @@
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+from benchmarks.utils import serve
+from services.github import GitHubService
+
+
+class TrafficCounter:
+    def __init__(self):
+        self.requests = 0
+        self.sent_bytes = 0
+        self.received_bytes = 0
+
+    async def on_request(self, request: httpx.Request) -> None:
+        self.requests += 1
+        self.sent_bytes += len(request.content)
+
+    async def on_response(self, response: httpx.Response) -> None:
+        await response.aread()
+        self.received_bytes += len(response.content)
+
+
+async def measure(url: str, graphql: bool, scenario: str, org_size: int, batch_size: int) -> dict:
+    counter = TrafficCounter()
+    client = httpx.AsyncClient(
+        event_hooks={"request": [counter.on_request], "response": [counter.on_response]},
+        limits=httpx.Limits(max_connections=100),
+    )
+    service = GitHubService(url=url, access_token="token", client=client, graphql=graphql)
+
+    started = time.perf_counter()
+    if scenario == "org":
+        repositories = sum([len(page.items) async for page in service.iter_org_pages(org_name="bench")])
+    else:
+        names = [f"bench/repo-{index}" for index in range(batch_size)]
+        repositories = len(await service.get_many_info(repository_names=names, concurrency=10))
+    elapsed = time.perf_counter() - started
+    await client.aclose()
+
+    return {
+        "backend": "graphql" if graphql else "rest",
+        "scenario": scenario,
+        "repositories": repositories,
+        "requests": counter.requests,
+        "sent_kb": round(counter.sent_bytes / 1024, 1),
+        "received_kb": round(counter.received_bytes / 1024, 1),
+        "total_ms": round(elapsed * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--org-size", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--latency-ms", type=int, default=100)
+    args = parser.parse_args()
+
+    env = {"FAKE_GITHUB_LATENCY_MS": str(args.latency_ms), "FAKE_GITHUB_ORG_SIZE": str(args.org_size)}
+    with serve("benchmarks.fake_github:create_app", env=env) as github:
+        results = [
+            asyncio.run(measure(github, graphql, scenario, args.org_size, args.batch_size))
+            for scenario in ("org", "batch")
+            for graphql in (False, True)
+        ]
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.apps import use_fake_redis
+from benchmarks.utils import percentile
+from config import REDIS_DB, REDIS_HOST, REDIS_PORT
+from redis import asyncio as aioredis
+from services.cache import CacheService, repository_key
+from services.local_cache import LocalCache
+
+
+async def measure(service: CacheService, iterations: int) -> dict:
+    key = repository_key("bench/repository")
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await service.check_entry(key=key)
+        latencies.append(time.perf_counter() - started)
+    return {
+        "ops_per_second": round(iterations / sum(latencies)),
+        "p50_us": round(percentile(latencies, 50) * 1e6, 1),
+        "p99_us": round(percentile(latencies, 99) * 1e6, 1),
+    }
+
+
+async def run(iterations: int) -> dict:
+    if use_fake_redis():
+        import fakeredis
+
+        connection = fakeredis.FakeAsyncRedis()
+    else:
+        connection = aioredis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB)
+
+    value = {"score": 1234, "owner": "bench", "name": "repository", "is_popular": True}
+    l2 = CacheService(connection=connection)
+    l2.local_cache = None
+    await l2.set_repositories(values={"bench/repository": value})
+    l1 = CacheService(connection=connection, local_cache=LocalCache())
+    await l1.check_entry(key=repository_key("bench/repository"))
+
+    results = {"l2_redis": await measure(l2, iterations), "l1_local": await measure(l1, iterations)}
+    await connection.aclose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args.iterations)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import argparse
+import json
+import time
+import tracemalloc
+from typing import List, Optional
+
+from benchmarks.fake_github import repository_payload
+from pydantic import BaseModel
+from schemas.github import GitHupApiOrgResponse, GitHupApiResponse
+from schemas.popular import PopularResponseModel
+from services.codec import dumps
+from services.popular import PopularService
+
+PAGE_SIZE = 100
+
+
+class PydanticRepository(BaseModel):
+    stars: int
+    forks: int
+    owner: str
+    name: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class PydanticOrgPage(BaseModel):
+    items: List[PydanticRepository]
+    page: int = 1
+    etag: Optional[str] = None
+
+
+def org_pages(org_size: int) -> list:
+    payloads = [repository_payload("bench", f"repo-{index}") for index in range(org_size)]
+    return [payloads[start : start + PAGE_SIZE] for start in range(0, org_size, PAGE_SIZE)]
+
+
+def pydantic_parse(pages: list) -> list:
+    return [
+        PydanticOrgPage(
+            items=[
+                PydanticRepository(
+                    stars=data["stargazers_count"], forks=data["forks_count"], owner="bench", name=data["name"]
+                )
+                for data in page
+            ],
+            page=number,
+        )
+        for number, page in enumerate(pages, start=1)
+    ]
+
+
+def pydantic_score(service: PopularService, parsed: list) -> list:
+    items = []
+    for org_page in parsed:
+        for repository in org_page.items:
+            score = repository.stars * service.star_multiplier + repository.forks * service.fork_multiplier
+            items.append(
+                PopularResponseModel(
+                    score=score,
+                    owner=repository.owner,
+                    name=repository.name,
+                    is_popular=score >= service.popular_threshold,
+                )
+            )
+    return items
+
+
+def pydantic_serialize(scored: list) -> bytes:
+    return b"".join(dumps(item.dict()) + b"\n" for item in scored)
+
+
+def dataclass_parse(pages: list) -> list:
+    return [
+        GitHupApiOrgResponse(
+            items=[
+                GitHupApiResponse(
+                    stars=data["stargazers_count"], forks=data["forks_count"], owner="bench", name=data["name"]
+                )
+                for data in page
+            ],
+            page=number,
+        )
+        for number, page in enumerate(pages, start=1)
+    ]
+
+
+def dataclass_score(service: PopularService, parsed: list) -> list:
+    return [service.score_repositories(repositories=org_page.items) for org_page in parsed]
+
+
+def dataclass_serialize(scored: list) -> bytes:
+    return b"".join(dumps(item) + b"\n" for page in scored for item in page.dicts())
+
+
+MODELS = {
+    "pydantic": (pydantic_parse, pydantic_score, pydantic_serialize),
+    "dataclass": (dataclass_parse, dataclass_score, dataclass_serialize),
+}
+
+
+def traced(fn, *args) -> tuple:
+    """Run `fn` under tracemalloc; return its result, the memory it still holds and its peak, in KB."""
+    tracemalloc.start()
+    result = fn(*args)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, round(retained / 1024, 1), round(peak / 1024, 1)
+
+
+def run(service: PopularService, pages: list, model: str) -> bytes:
+    parse, score, serialize = MODELS[model]
+    return serialize(score(service, parse(pages)))
+
+
+def measure(model: str, service: PopularService, pages: list, iterations: int) -> dict:
+    parse, score, _ = MODELS[model]
+    started = time.perf_counter()
+    for _ in range(iterations):
+        run(service, pages, model)
+    elapsed = (time.perf_counter() - started) / iterations
+
+    parsed, parsed_kb, _ = traced(parse, pages)
+    _, scored_kb, _ = traced(score, service, parsed)
+    _, _, peak_kb = traced(run, service, pages, model)
+    return {
+        "model": model,
+        "repositories": sum(len(page) for page in pages),
+        "ms": round(elapsed * 1000, 2),
+        "parsed_kb": parsed_kb,
+        "scored_kb": scored_kb,
+        "peak_kb": peak_kb,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--org-size", type=int, default=5000)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    service = PopularService()
+    pages = org_pages(args.org_size)
+    assert run(service, pages, "pydantic") == run(service, pages, "dataclass")
+
+    results = [measure(model, service, pages, args.iterations) for model in MODELS]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
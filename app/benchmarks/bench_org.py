@@ -0,0 +1,48 @@
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.utils import serve
+from services.github import GitHubService, close_client
+
+
+async def fetch_org(url: str, page_concurrency: int) -> dict:
+    service = GitHubService(url=url, access_token="token", page_concurrency=page_concurrency)
+    started = time.perf_counter()
+    first_page_at = None
+    pages = repositories = 0
+
+    async for page in service.iter_org_pages(org_name="bench"):
+        if first_page_at is None:
+            first_page_at = time.perf_counter() - started
+        pages += 1
+        repositories += len(page.items)
+
+    elapsed = time.perf_counter() - started
+    await close_client()
+    return {
+        "page_concurrency": page_concurrency,
+        "pages": pages,
+        "repositories": repositories,
+        "first_page_ms": round(first_page_at * 1000, 1),
+        "total_ms": round(elapsed * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--org-size", type=int, default=5000)
+    parser.add_argument("--latency-ms", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 10, 20])
+    args = parser.parse_args()
+
+    env = {"FAKE_GITHUB_LATENCY_MS": str(args.latency_ms), "FAKE_GITHUB_ORG_SIZE": str(args.org_size)}
+    with serve("benchmarks.fake_github:create_app", env=env) as github:
+        results = [asyncio.run(fetch_org(github, concurrency)) for concurrency in args.concurrency]
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import argparse
+import asyncio
+import json
+import uuid
+
+import httpx
+from benchmarks.utils import run_load, serve
+
+
+def scenarios(run_id: str) -> dict:
+    return {
+        "repository_miss": lambda index: f"/v1/popular/repository?repository_name=bench/{run_id}-{index}",
+        "repository_hit": lambda index: f"/v1/popular/repository?repository_name=bench/{run_id}-hot",
+        "org_miss": lambda index: f"/v1/popular/org?org_name={run_id}-{index}",
+        "org_hit": lambda index: f"/v1/popular/org?org_name={run_id}-hot",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency-ms", type=int, default=50)
+    parser.add_argument("--org-size", type=int, default=100)
+    args = parser.parse_args()
+
+    github_env = {"FAKE_GITHUB_LATENCY_MS": str(args.latency_ms), "FAKE_GITHUB_ORG_SIZE": str(args.org_size)}
+    with serve("benchmarks.fake_github:create_app", env=github_env) as github:
+        env = {"GITHUB_API_URL": github, "GITHUB_API_ACCESS_TOKEN": "token", "GITHUB_ORG_PAGE_SIZE": "100"}
+        run_id = uuid.uuid4().hex[:8]
+        with serve("benchmarks.apps:popular_app", env=env) as app:
+            for path in scenarios(run_id).values():
+                httpx.get(f"{app}{path(-1)}", timeout=60).raise_for_status()
+
+            results = {
+                name: asyncio.run(run_load(app, path, args.requests, args.concurrency))
+                for name, path in scenarios(run_id).items()
+            }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from multiprocessing import Pool
+from typing import Dict
+
+from benchmarks.utils import APP_DIR, free_port, run_load, serve, wait_for_port
+
+
+def default_workers() -> list:
+    workers, count = [], 1
+    while count <= (os.cpu_count() or 1):
+        workers.append(count)
+        count *= 2
+    return workers
+
+
+@contextmanager
+def serve_production(workers: int, env: Dict[str, str]):
+    port = free_port()
+    server_env = {
+        "SERVER_APP": "benchmarks.apps:popular_app",
+        "SERVER_PORT": str(port),
+        "SERVER_WORKERS": str(workers),
+    }
+    process = subprocess.Popen(
+        [sys.executable, "server.py"], cwd=APP_DIR, env={**os.environ, **env, **server_env}, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for_port(port)
+        # every worker has to be up before the load starts
+        time.sleep(1 + workers * 0.5)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def client(job: tuple) -> dict:
+    app, path, requests, concurrency = job
+    return asyncio.run(run_load(app, lambda index: path, requests, concurrency))
+
+
+def measure(app: str, path: str, requests: int, concurrency: int, clients: int) -> dict:
+    with Pool(clients) as pool:
+        # warm-up: connections, caches of every worker
+        pool.map(client, [(app, path, max(requests // 10, concurrency), concurrency)] * clients)
+        started = time.perf_counter()
+        results = pool.map(client, [(app, path, requests // clients, concurrency)] * clients)
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": sum(result["requests"] for result in results),
+        "errors": sum(result["errors"] for result in results),
+        "rps": round(sum(result["requests"] for result in results) / elapsed, 1),
+        "p50_ms": max(result["p50_ms"] for result in results),
+        "p99_ms": max(result["p99_ms"] for result in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers())
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--concurrency", type=int, default=10, help="requests in flight per client process")
+    parser.add_argument("--clients", type=int, default=max(1, (os.cpu_count() or 1) // 2))
+    parser.add_argument("--latency-ms", type=int, default=50)
+    args = parser.parse_args()
+
+    paths = {
+        "repository_hit": f"/v1/popular/repository?repository_name=bench/{uuid.uuid4().hex[:8]}",
+        "healthcheck": "/v1/utils/healthcheck",
+    }
+    results = []
+    with serve("benchmarks.fake_github:create_app", env={"FAKE_GITHUB_LATENCY_MS": str(args.latency_ms)}) as github:
+        env = {"GITHUB_API_URL": github, "GITHUB_API_ACCESS_TOKEN": "token"}
+        for workers in args.workers:
+            with serve_production(workers, env=env) as app:
+                for name, path in paths.items():
+                    result = measure(app, path, args.requests, args.concurrency, args.clients)
+                    results.append({"workers": workers, "scenario": name, **result})
+
+    print(json.dumps({"cpus": os.cpu_count(), "clients": args.clients, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
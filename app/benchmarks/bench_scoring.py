@@ -0,0 +1,66 @@
+import argparse
+import json
+import time
+
+from benchmarks.fake_github import repository_counts
+from schemas.github import GitHupApiResponse
+from services.codec import dumps
+from services.popular import PopularService
+
+
+def org_repositories(org_size: int) -> list:
+    repositories = []
+    for index in range(org_size):
+        stars, forks = repository_counts("bench", f"repo-{index}")
+        repositories.append(GitHupApiResponse(stars=stars, forks=forks, owner="bench", name=f"repo-{index}"))
+    return repositories
+
+
+def per_item(service: PopularService, repositories: list, serialize: bool) -> bytes:
+    items = [service.calculate_score(repository_data=repository) for repository in repositories]
+    if not serialize:
+        return b""
+    return b"".join(dumps(item.dict()) + b"\n" for item in items)
+
+
+def columnar(service: PopularService, repositories: list, serialize: bool) -> bytes:
+    scored = service.score_repositories(repositories=repositories)
+    if not serialize:
+        return b""
+    return b"".join(dumps(item) + b"\n" for item in scored.dicts())
+
+
+def measure(name: str, fn, service: PopularService, repositories: list, serialize: bool, iterations: int) -> dict:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        body = fn(service, repositories, serialize)
+    elapsed = (time.perf_counter() - started) / iterations
+    return {
+        "implementation": name,
+        "stage": "serialize" if serialize else "score",
+        "repositories": len(repositories),
+        "ms": round(elapsed * 1000, 2),
+        "body_kb": round(len(body) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--org-size", type=int, default=5000)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    service = PopularService()
+    repositories = org_repositories(args.org_size)
+    assert per_item(service, repositories, True) == columnar(service, repositories, True)
+
+    results = [
+        measure(name, fn, service, repositories, serialize, args.iterations)
+        for serialize in (False, True)
+        for name, fn in (("per_item", per_item), ("columnar", columnar))
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
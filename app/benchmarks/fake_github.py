@@ -0,0 +1,140 @@
+"""Stand-in for the GitHub REST and GraphQL APIs, configured by the FAKE_GITHUB_* environment variables."""
+
+import asyncio
+import json
+import os
+import time
+import zlib
+
+from fastapi import FastAPI, Request
+from starlette.responses import JSONResponse
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "rest_repository.json")
+
+with open(FIXTURE) as fixture:
+    RECORDED_REPOSITORY = json.load(fixture)
+
+
+def repository_counts(owner: str, name: str) -> tuple:
+    seed = zlib.crc32(f"{owner}/{name}".encode())
+    return seed % 1000, seed % 300
+
+
+def repository_payload(owner: str, name: str) -> dict:
+    stars, forks = repository_counts(owner, name)
+    return {
+        **RECORDED_REPOSITORY,
+        "name": name,
+        "full_name": f"{owner}/{name}",
+        "owner": {**RECORDED_REPOSITORY["owner"], "login": owner},
+        "stargazers_count": stars,
+        "watchers_count": stars,
+        "watchers": stars,
+        "forks_count": forks,
+        "forks": forks,
+    }
+
+
+def graphql_payload(variables: dict, org_size: int) -> dict:
+    if "org" in variables:
+        start = int(variables.get("cursor") or 0)
+        end = min(start + variables["first"], org_size)
+        nodes = []
+        for index in range(start, end):
+            stars, forks = repository_counts(variables["org"], f"repo-{index}")
+            nodes.append({"name": f"repo-{index}", "stargazerCount": stars, "forkCount": forks})
+        page_info = {"hasNextPage": end < org_size, "endCursor": str(end)}
+        return {
+            "data": {
+                "organization": {"login": variables["org"], "repositories": {"pageInfo": page_info, "nodes": nodes}}
+            }
+        }
+
+    data = {}
+    index = 0
+    while f"o{index}" in variables:
+        stars, forks = repository_counts(variables[f"o{index}"], variables[f"n{index}"])
+        data[f"r{index}"] = {"stargazerCount": stars, "forkCount": forks}
+        index += 1
+    return {"data": data}
+
+
+def page_links(request: Request, page: int, last_page: int) -> str:
+    links = []
+    if page < last_page:
+        links.append(f'<{request.url.include_query_params(page=page + 1)}>; rel="next"')
+        links.append(f'<{request.url.include_query_params(page=last_page)}>; rel="last"')
+    return ", ".join(links)
+
+
+class RateLimit:
+    """GitHub's primary rate limit: `limit` requests per `window` seconds, reported in the `X-RateLimit-*` headers."""
+
+    def __init__(self, limit: int, window: int):
+        self.limit = limit
+        self.window = window
+        self.used = 0
+        self.reset_at = time.time() + window
+
+    def take(self) -> tuple:
+        """Count a request; return whether the quota allowed it and the rate limit headers of its response."""
+        if time.time() >= self.reset_at:
+            self.used, self.reset_at = 0, time.time() + self.window
+        allowed = self.used < self.limit
+        if allowed:
+            self.used += 1
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.limit - self.used),
+            "X-RateLimit-Reset": str(int(self.reset_at)),
+        }
+        return allowed, headers
+
+
+def create_app():
+    latency = int(os.getenv("FAKE_GITHUB_LATENCY_MS", 50)) / 1000
+    org_size = int(os.getenv("FAKE_GITHUB_ORG_SIZE", 30))
+    max_per_page = int(os.getenv("FAKE_GITHUB_MAX_PER_PAGE", 100))
+    limit = int(os.getenv("FAKE_GITHUB_RATE_LIMIT", 0))
+    rate_limit = (
+        RateLimit(limit=limit, window=int(os.getenv("FAKE_GITHUB_RATE_LIMIT_WINDOW", 3600))) if limit else None
+    )
+    stats = {"requests": 0}
+
+    async def respond(content_fn, headers=None) -> JSONResponse:
+        stats["requests"] += 1
+        await asyncio.sleep(latency)
+        allowed, limit_headers = rate_limit.take() if rate_limit else (True, {})
+        headers = {**(headers or {}), **limit_headers}
+        if not allowed:
+            return JSONResponse(status_code=403, content={"message": "API rate limit exceeded"}, headers=headers)
+        return JSONResponse(content=content_fn(), headers=headers)
+
+    app = FastAPI()
+
+    @app.get("/_stats")
+    async def get_stats():
+        return stats
+
+    @app.get("/repos/{owner}/{repository}")
+    async def repository(owner: str, repository: str):
+        return await respond(lambda: repository_payload(owner, repository))
+
+    @app.get("/orgs/{org}/repos")
+    async def org_repositories(request: Request, org: str, per_page: int = 30, page: int = 1):
+        per_page = min(per_page, max_per_page)
+        last_page = max(1, -(-org_size // per_page))
+        start = (page - 1) * per_page
+        return await respond(
+            lambda: [
+                repository_payload(org, f"repo-{index}") for index in range(start, min(start + per_page, org_size))
+            ],
+            headers={"Link": page_links(request, page, last_page)},
+        )
+
+    @app.post("/graphql")
+    async def graphql(request: Request):
+        body = await request.json()
+        return await respond(lambda: graphql_payload(body.get("variables") or {}, org_size))
+
+    return app
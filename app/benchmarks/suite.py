@@ -0,0 +1,141 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import time
+import uuid
+from typing import Callable, Dict, Optional
+
+import httpx
+from benchmarks.utils import APP_DIR, run_load, serve
+
+ENDPOINTS = {
+    "repository": lambda key: f"/v1/popular/repository?repository_name=bench/{key}",
+    "org": lambda key: f"/v1/popular/org?org_name={key}",
+}
+
+
+def scenarios(run_id: str, concurrency: int) -> Dict[str, Callable[[int], str]]:
+    paths = {}
+    for endpoint, path in ENDPOINTS.items():
+        paths[f"{endpoint}_cold"] = lambda index, path=path: path(f"{run_id}-cold-{index}")
+        paths[f"{endpoint}_warm"] = lambda index, path=path: path(f"{run_id}-warm")
+        paths[f"{endpoint}_stampede"] = lambda index, path=path: path(f"{run_id}-stampede-{index // concurrency}")
+    return paths
+
+
+def github_requests(github: str) -> int:
+    return httpx.get(f"{github}/_stats").json()["requests"]
+
+
+def resident_memory_mb(app: str) -> Optional[float]:
+    for line in httpx.get(f"{app}/v1/utils/metrics").text.splitlines():
+        if line.startswith("process_resident_memory_bytes "):
+            return round(float(line.split()[1]) / 1024**2, 1)
+    return None
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args) -> dict:
+    github_env = {
+        "FAKE_GITHUB_LATENCY_MS": str(args.latency_ms),
+        "FAKE_GITHUB_ORG_SIZE": str(args.org_size),
+        "FAKE_GITHUB_MAX_PER_PAGE": str(args.page_size),
+        "FAKE_GITHUB_RATE_LIMIT": str(args.rate_limit),
+    }
+    results = {}
+    with serve("benchmarks.fake_github:create_app", env=github_env) as github:
+        env = {
+            "GITHUB_API_URL": github,
+            "GITHUB_API_ACCESS_TOKEN": "token",
+            "GITHUB_ORG_PAGE_SIZE": str(args.page_size),
+        }
+        if args.fake_redis:
+            env["BENCH_FAKE_REDIS"] = "1"
+        with serve("benchmarks.apps:popular_app", env=env) as app:
+            for name, path in scenarios(uuid.uuid4().hex[:8], args.concurrency).items():
+                if args.scenario and name not in args.scenario:
+                    continue
+                if name.endswith("_warm"):
+                    # a failed priming (rate limited GitHub) shows up as the errors of the scenario
+                    httpx.get(f"{app}{path(0)}", timeout=60)
+                before = github_requests(github)
+                result = asyncio.run(run_load(app, path, args.requests, args.concurrency))
+                result["github_requests"] = github_requests(github) - before
+                result["rss_mb"] = resident_memory_mb(app)
+                results[name] = result
+
+    return {
+        "meta": {
+            "revision": git_revision(),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "redis": "fakeredis" if args.fake_redis else "redis",
+            "parameters": {
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+                "latency_ms": args.latency_ms,
+                "org_size": args.org_size,
+                "page_size": args.page_size,
+                "rate_limit": args.rate_limit,
+            },
+        },
+        "results": results,
+    }
+
+
+def compare(report: dict, baseline: dict) -> dict:
+    """Relative change of throughput and latency of each scenario, in percent of the baseline."""
+    changes = {}
+    for name, result in report["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        changes[name] = {
+            metric: (
+                round((result[metric] - previous[metric]) / previous[metric] * 100, 1)
+                if previous[metric] and result[metric] is not None
+                else None
+            )
+            for metric in ("rps", "p50_ms", "p95_ms", "p99_ms")
+        }
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency-ms", type=int, default=50)
+    parser.add_argument("--org-size", type=int, default=100)
+    parser.add_argument("--page-size", type=int, default=100, help="repositories per org page, GitHub allows 100")
+    parser.add_argument("--rate-limit", type=int, default=0, help="fake GitHub requests per hour, 0 for no limit")
+    parser.add_argument("--fake-redis", action="store_true")
+    parser.add_argument("--scenario", action="append", help="run only this scenario, can be repeated")
+    parser.add_argument("--output", help="save the report to this JSON file")
+    parser.add_argument("--compare", help="JSON report of a previous run to compare with")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.compare:
+        with open(args.compare) as baseline:
+            report["change_pct"] = compare(report, json.load(baseline))
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
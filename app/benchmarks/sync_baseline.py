@@ -0,0 +1,45 @@
+"""The pre-async request path, kept only for the benchmarks to compare against."""
+
+import json
+
+import redis
+import requests
+from benchmarks.apps import use_fake_redis
+from config import GITHUB_API_ACCESS_TOKEN, GITHUB_API_URL, REDIS_DB, REDIS_HOST, REDIS_KEY_TTL, REDIS_PORT
+from fastapi import FastAPI
+from schemas.github import GitHupApiResponse
+from services.popular import PopularService
+from starlette.responses import JSONResponse
+
+
+def create_app():
+    app = FastAPI()
+
+    if use_fake_redis():
+        import fakeredis
+
+        connection = fakeredis.FakeRedis()
+    else:
+        connection = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB)
+
+    @app.get("/v1/popular/repository")
+    def check(repository_name: str):
+        cache_value = connection.get(repository_name)
+        if cache_value:
+            return JSONResponse(content=json.loads(cache_value))
+
+        owner, repository = repository_name.split("/")
+        response = requests.get(
+            url=f"{GITHUB_API_URL}/repos/{owner}/{repository}",
+            headers={"Authorization": f"token {GITHUB_API_ACCESS_TOKEN}"},
+        )
+        data = response.json()
+        score = PopularService().calculate_score(
+            repository_data=GitHupApiResponse(
+                stars=data["stargazers_count"], forks=data["forks_count"], owner=owner, name=repository
+            )
+        )
+        connection.set(repository_name, json.dumps(score.dict()), ex=REDIS_KEY_TTL)
+        return JSONResponse(content=score.dict())
+
+    return app
@@ -0,0 +1,95 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 15) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+@contextmanager
+def serve(factory: str, env: Optional[Dict[str, str]] = None, args: Optional[List[str]] = None):
+    """Run `factory` (a `module:function` path) with uvicorn in a subprocess and yield its base url."""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "--factory", factory, "--port", str(port), "--log-level", "warning"]
+        + (args or []),
+        cwd=APP_DIR,
+        env={**os.environ, **(env or {})},
+    )
+    try:
+        wait_for_port(port)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """The `pct` percentile of `values`, None when there is none (every request failed)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_load(base_url: str, path: Callable[[int], str], total: int, concurrency: int) -> dict:
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+
+        async def worker():
+            nonlocal errors
+            for index in counter:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path(index))
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    def latency_ms(pct: float) -> Optional[float]:
+        value = percentile(latencies, pct)
+        return round(value * 1000, 2) if value is not None else None
+
+    return {
+        "requests": total,
+        "errors": errors,
+        "rps": round(total / elapsed, 1),
+        "p50_ms": latency_ms(50),
+        "p95_ms": latency_ms(95),
+        "p99_ms": latency_ms(99),
+    }
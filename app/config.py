@@ -1,6 +1,12 @@
 import os
 
 GITHUB_API_ACCESS_TOKEN = os.getenv("GITHUB_API_ACCESS_TOKEN")
+GITHUB_API_ACCESS_TOKENS = [
+    token.strip()
+    for token in os.getenv("GITHUB_API_ACCESS_TOKENS", GITHUB_API_ACCESS_TOKEN or "").split(",")
+    if token.strip()
+]
+GITHUB_TOKEN_INVALID_COOLDOWN = float(os.getenv("GITHUB_TOKEN_INVALID_COOLDOWN", 600))
 GITHUB_API_URL = os.getenv("GITHUB_API_URL")
 
 STAR_MULTIPLIER = int(os.getenv("STAR_MULTIPLIER", 1))
@@ -11,3 +17,85 @@ REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 REDIS_DB = int(os.getenv("REDIS_DB", 0))
 REDIS_KEY_TTL = int(os.getenv("REDIS_KEY_TTL", 600))
+REDIS_MODE = os.getenv("REDIS_MODE", "standalone")
+REDIS_SENTINELS = [sentinel.strip() for sentinel in os.getenv("REDIS_SENTINELS", "").split(",") if sentinel.strip()]
+REDIS_SENTINEL_MASTER = os.getenv("REDIS_SENTINEL_MASTER", "mymaster")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", 5))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 2))
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", 1))
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", 30))
+REDIS_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("REDIS_CIRCUIT_FAILURE_THRESHOLD", 3))
+REDIS_CIRCUIT_RESET_TIMEOUT = float(os.getenv("REDIS_CIRCUIT_RESET_TIMEOUT", 5))
+
+GITHUB_HTTP_MAX_CONNECTIONS = int(os.getenv("GITHUB_HTTP_MAX_CONNECTIONS", 100))
+GITHUB_HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("GITHUB_HTTP_MAX_KEEPALIVE_CONNECTIONS", 20))
+GITHUB_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("GITHUB_HTTP_KEEPALIVE_EXPIRY", 30))
+GITHUB_CONNECT_TIMEOUT = float(os.getenv("GITHUB_CONNECT_TIMEOUT", 3))
+GITHUB_READ_TIMEOUT = float(os.getenv("GITHUB_READ_TIMEOUT", 10))
+GITHUB_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("GITHUB_CIRCUIT_FAILURE_THRESHOLD", 5))
+GITHUB_CIRCUIT_RESET_TIMEOUT = float(os.getenv("GITHUB_CIRCUIT_RESET_TIMEOUT", 30))
+GITHUB_HTTP2 = os.getenv("GITHUB_HTTP2", "false").lower() == "true"
+
+GITHUB_ORG_PAGE_SIZE = int(os.getenv("GITHUB_ORG_PAGE_SIZE", 100))
+GITHUB_ORG_PAGE_CONCURRENCY = int(os.getenv("GITHUB_ORG_PAGE_CONCURRENCY", 10))
+
+BATCH_MAX_REPOSITORIES = int(os.getenv("BATCH_MAX_REPOSITORIES", 500))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 10))
+
+CACHE_LOCK_ENABLED = os.getenv("CACHE_LOCK_ENABLED", "false").lower() == "true"
+CACHE_LOCK_TIMEOUT = float(os.getenv("CACHE_LOCK_TIMEOUT", 10))
+CACHE_LOCK_WAIT = float(os.getenv("CACHE_LOCK_WAIT", 5))
+
+CACHE_SOFT_TTL = int(os.getenv("CACHE_SOFT_TTL", REDIS_KEY_TTL))
+CACHE_HARD_TTL = int(os.getenv("CACHE_HARD_TTL", REDIS_KEY_TTL * 6))
+CACHE_XFETCH_BETA = float(os.getenv("CACHE_XFETCH_BETA", 1))
+
+GITHUB_WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET")
+GITHUB_WEBHOOK_OWNERS = {
+    owner.strip().lower() for owner in os.getenv("GITHUB_WEBHOOK_OWNERS", "").split(",") if owner.strip()
+}
+CACHE_WEBHOOK_SOFT_TTL = int(os.getenv("CACHE_WEBHOOK_SOFT_TTL", 24 * 3600))
+CACHE_WEBHOOK_HARD_TTL = int(os.getenv("CACHE_WEBHOOK_HARD_TTL", CACHE_WEBHOOK_SOFT_TTL * 2))
+
+LOCAL_CACHE_ENABLED = os.getenv("LOCAL_CACHE_ENABLED", "false").lower() == "true"
+LOCAL_CACHE_TTL = float(os.getenv("LOCAL_CACHE_TTL", 5))
+LOCAL_CACHE_MAX_ENTRIES = int(os.getenv("LOCAL_CACHE_MAX_ENTRIES", 10000))
+LOCAL_CACHE_MAX_BYTES = int(os.getenv("LOCAL_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+CACHE_INVALIDATION_CHANNEL = os.getenv("CACHE_INVALIDATION_CHANNEL", "popular:invalidations")
+
+GITHUB_RATE_LIMIT_ENABLED = os.getenv("GITHUB_RATE_LIMIT_ENABLED", "false").lower() == "true"
+GITHUB_RATE_LIMIT_RATE = float(
+    os.getenv("GITHUB_RATE_LIMIT_RATE", max(len(GITHUB_API_ACCESS_TOKENS), 1) * 5000 / 3600)
+)
+GITHUB_RATE_LIMIT_BURST = int(os.getenv("GITHUB_RATE_LIMIT_BURST", 50))
+GITHUB_RATE_LIMIT_MAX_WAIT = float(os.getenv("GITHUB_RATE_LIMIT_MAX_WAIT", 5))
+GITHUB_RATE_LIMIT_RESERVE = int(os.getenv("GITHUB_RATE_LIMIT_RESERVE", 100))
+GITHUB_RETRY_ATTEMPTS = int(os.getenv("GITHUB_RETRY_ATTEMPTS", 3))
+GITHUB_RETRY_BACKOFF = float(os.getenv("GITHUB_RETRY_BACKOFF", 1))
+
+GITHUB_GRAPHQL_ENABLED = os.getenv("GITHUB_GRAPHQL_ENABLED", "false").lower() == "true"
+GITHUB_GRAPHQL_BATCH_SIZE = int(os.getenv("GITHUB_GRAPHQL_BATCH_SIZE", 100))
+
+CACHE_WARMER_ENABLED = os.getenv("CACHE_WARMER_ENABLED", "false").lower() == "true"
+CACHE_WARMER_INTERVAL = float(os.getenv("CACHE_WARMER_INTERVAL", 60))
+CACHE_WARMER_TOP_N = int(os.getenv("CACHE_WARMER_TOP_N", 100))
+CACHE_WARMER_RATE_SHARE = float(os.getenv("CACHE_WARMER_RATE_SHARE", 0.2))
+CACHE_WARMER_DECAY = float(os.getenv("CACHE_WARMER_DECAY", 0.5))
+CACHE_HOT_KEYS_KEY = os.getenv("CACHE_HOT_KEYS_KEY", "popular:hot_keys")
+
+CACHE_SERIALIZER = os.getenv("CACHE_SERIALIZER", "json")
+CACHE_COMPRESSION = os.getenv("CACHE_COMPRESSION", "none")
+CACHE_COMPRESSION_THRESHOLD = int(os.getenv("CACHE_COMPRESSION_THRESHOLD", 4096))
+
+SERVER_APP = os.getenv("SERVER_APP", "api:create_app")
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", 8000))
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", os.cpu_count() or 1))
+SERVER_LOOP = os.getenv("SERVER_LOOP", "auto")
+SERVER_HTTP = os.getenv("SERVER_HTTP", "auto")
+SERVER_LIMIT_CONCURRENCY = int(os.getenv("SERVER_LIMIT_CONCURRENCY", 1000))
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", 2048))
+SERVER_KEEPALIVE_TIMEOUT = int(os.getenv("SERVER_KEEPALIVE_TIMEOUT", 5))
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", 30))
+SERVER_ACCESS_LOG = os.getenv("SERVER_ACCESS_LOG", "false").lower() == "true"
@@ -20,3 +20,28 @@ class RequestForbiddenException(Exception):
 
 class RequestMovedPermanently(Exception):
     pass
+
+
+class RequestNotModified(Exception):
+    pass
+
+
+class RequestRateLimited(Exception):
+    def __init__(self, retry_after: float = 0):
+        super().__init__(f"rate limited, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class InvalidCursorException(Exception):
+    pass
+
+
+class CircuitOpenException(Exception):
+    def __init__(self, dependency: str, retry_after: float = 0):
+        super().__init__(f"{dependency} circuit breaker open, retry after {retry_after:.0f}s")
+        self.dependency = dependency
+        self.retry_after = retry_after
+
+
+class WebhookPayloadException(Exception):
+    pass
@@ -0,0 +1,113 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+# from half a millisecond (a local cache or redis round trip) to ten seconds (a large org fetched from GitHub)
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "API requests, by route template, method and status, until their last byte is sent",
+    ["route", "method", "status"],
+    buckets=STAGE_BUCKETS,
+)
+
+HTTP_REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "API requests being served", multiprocess_mode="livesum")
+
+CACHE_OPERATION_DURATION = Histogram(
+    "cache_operation_duration_seconds",
+    "Redis round trips of the cache service, decoding and encoding of the entries included, by operation",
+    ["operation"],
+    buckets=STAGE_BUCKETS,
+)
+
+GITHUB_REQUEST_DURATION = Histogram(
+    "github_request_duration_seconds",
+    "GitHub API requests, by endpoint and response status (`error` when no response came)",
+    ["endpoint", "status"],
+    buckets=STAGE_BUCKETS,
+)
+
+GITHUB_REQUESTS_IN_FLIGHT = Gauge(
+    "github_requests_in_flight", "GitHub API requests waiting for their response", multiprocess_mode="livesum"
+)
+
+SCORING_DURATION = Histogram(
+    "scoring_duration_seconds",
+    "Scoring of GitHub repositories, one at a time (`single`) or by columns (`bulk`)",
+    ["mode"],
+    buckets=STAGE_BUCKETS,
+)
+
+ENCODING_DURATION = Histogram(
+    "encoding_duration_seconds",
+    "Serialization of the response bodies, by format (`json`, `ndjson`, or `org` for the assembly of a cached org)",
+    ["format"],
+    buckets=STAGE_BUCKETS,
+)
+
+GITHUB_HTTP_REQUESTS = Counter(
+    "github_http_requests_total",
+    "Requests sent to the GitHub API, by whether they opened a new connection or reused a pooled one",
+    ["connection"],
+)
+
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "Cache lookups, by whether the entry was fresh (hit), past its soft TTL (stale) or missing (miss)",
+    ["result"],
+)
+
+CACHE_REFRESHES = Counter(
+    "cache_background_refreshes_total",
+    "Background refreshes of served cache entries, triggered by a stale entry or early by XFetch",
+    ["trigger"],
+)
+
+LOCAL_CACHE_LOOKUPS = Counter("local_cache_lookups_total", "In-process cache lookups", ["result"])
+
+GITHUB_RATE_LIMIT_REMAINING = Gauge(
+    "github_rate_limit_remaining",
+    "Requests left in the GitHub rate limit window of each access token, from its last response headers",
+    ["token"],
+    multiprocess_mode="mostrecent",
+)
+
+GITHUB_RATE_LIMIT_RESET = Gauge(
+    "github_rate_limit_reset_timestamp_seconds",
+    "When the GitHub rate limit window of each access token resets, from its last response headers",
+    ["token"],
+    multiprocess_mode="mostrecent",
+)
+
+GITHUB_TOKEN_REQUESTS = Counter(
+    "github_token_requests_total", "Requests sent with each GitHub access token", ["token"]
+)
+
+GITHUB_RATE_LIMITED = Counter(
+    "github_rate_limited_total",
+    "GitHub responses refused by the primary (quota exhausted) or secondary (abuse detection) rate limit",
+    ["limit"],
+)
+
+GITHUB_THROTTLE_WAIT = Counter(
+    "github_throttle_wait_seconds_total", "Time spent waiting for the GitHub request token bucket"
+)
+
+CACHE_WARMER_REFRESHES = Counter(
+    "cache_warmer_refreshes_total",
+    "Hot keys looked at by the cache warmer, by whether it refreshed them, left them for lack of rate limit budget "
+    "(skipped) or failed",
+    ["result"],
+)
+
+CIRCUIT_BREAKER_STATE = Gauge(
+    "circuit_breaker_state",
+    "State of the circuit breaker of each dependency: 0 closed, 1 half-open, 2 open",
+    ["dependency"],
+    multiprocess_mode="livemax",
+)
+
+WEBHOOK_DELIVERIES = Counter(
+    "github_webhook_deliveries_total",
+    "GitHub webhook deliveries by event and by what was done: updated, removed, ignored, rejected, invalid, failed",
+    ["event", "result"],
+)
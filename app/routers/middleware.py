@@ -0,0 +1,48 @@
+import time
+
+from metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class MetricsMiddleware:
+    """Requests in flight and their duration until the last byte, by route template and status."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            HTTP_REQUEST_DURATION.labels(
+                route=route_template(scope), method=scope["method"], status=str(status_code)
+            ).observe(time.perf_counter() - started)
+
+
+def route_template(scope: Scope) -> str:
+    """Path template of the route that served the request, `unmatched` when none did."""
+    route = scope.get("route")
+    path_regex, path_format = getattr(route, "path_regex", None), getattr(route, "path_format", None)
+    if path_regex is None or path_format is None:
+        return "unmatched"
+    # depending on the FastAPI version, the route of an included router holds its prefix or matches what follows it
+    path = scope["path"]
+    for start, char in enumerate(path):
+        if char == "/" and path_regex.match(path[start:]):
+            return path[:start] + path_format
+    return "unmatched"
@@ -1,28 +1,61 @@
-import json
+import asyncio
+import base64
+import binascii
+import math
+import time
+from functools import partial
 from logging import Logger
+from typing import AsyncIterator, Awaitable, Callable, List, Literal, Optional, Set, Tuple
 
+from config import BATCH_CONCURRENCY, BATCH_MAX_REPOSITORIES, GITHUB_WEBHOOK_SECRET
 from exceptions import (
     CalculateScoreException,
+    CircuitOpenException,
     GitHubServiceRequestException,
+    InvalidCursorException,
     RepositoryNameException,
     RequestForbiddenException,
     RequestMovedPermanently,
     RequestNotFoundException,
+    RequestNotModified,
+    RequestRateLimited,
+    WebhookPayloadException,
 )
-from fastapi.encoders import jsonable_encoder
+from fastapi import Header, Query, Request
 from fastapi_utils.cbv import cbv
 from fastapi_utils.inferring_router import InferringRouter
-from schemas.popular import PopularResponseListModel, PopularResponseModel
-from services.cache import CacheService
+from metrics import CACHE_REFRESHES, ENCODING_DURATION, WEBHOOK_DELIVERIES
+from routers.responses import ORJSONResponse
+from schemas.github import GitHupApiOrgResponse
+from schemas.popular import (
+    PopularBatchRequestModel,
+    PopularBatchResponseModel,
+    PopularResponseListModel,
+    PopularResponseModel,
+)
+from services.cache import CacheEntry, CacheService, query_body, repository_key
+from services.codec import dumps, loads
 from services.github import GitHubService
-from services.popular import PopularService
+from services.popular import PopularService, ScoredRepositories
+from services.rate_limit import get_rate_limiter
+from services.singleflight import SingleFlight
+from services.token_pool import get_token_pool
+from services.webhook import WEBHOOK_EVENTS, WebhookEvent, parse_event, verify_signature
 from starlette import status
-from starlette.responses import JSONResponse
+from starlette.responses import Response, StreamingResponse
+from typing_extensions import Annotated
 
 router = InferringRouter()
 
+JSON_MEDIA_TYPE = "application/json"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
 logger = Logger(f"{__name__}")
 
+repository_flight = SingleFlight()
+org_flight = SingleFlight()
+background_refreshes: Set[asyncio.Future] = set()
+
 
 @cbv(router)
 class PopularView:
@@ -35,24 +68,29 @@ class PopularView:
         return router
 
     @router.get("/repository", response_model=PopularResponseModel)
-    def check(self, repository_name: str):
+    async def check(self, repository_name: str):
         try:
-            cache_value = self.cache_service.check(key=repository_name)
+            cache_entry = await self.cache_service.check_entry(key=repository_key(repository_name))
 
-            if cache_value:
-                cache_data = json.loads(cache_value)
-                return JSONResponse(content=cache_data, status_code=status.HTTP_200_OK)
+            if cache_entry:
+                revalidate(
+                    entry=cache_entry,
+                    flight=repository_flight,
+                    key=repository_name,
+                    fn=lambda: self.refresh_repository(repository_name=repository_name, cache_entry=cache_entry),
+                )
+                return Response(content=cache_entry.value, media_type=JSON_MEDIA_TYPE)
 
-            repo_data = self.github_service.get_info(repository_name=repository_name)
-            popular_data = self.popular_service.calculate_score(repository_data=repo_data)
-            self.cache_service.set_key(key=repository_name, value=popular_data.dict())
+            popular_data = await repository_flight.do(
+                key=repository_name, fn=lambda: self.refresh_repository(repository_name=repository_name)
+            )
 
-            return JSONResponse(content=jsonable_encoder(popular_data), status_code=status.HTTP_200_OK)
+            return ORJSONResponse(content=popular_data.dict())
 
         except RequestNotFoundException as ex:
             msg = f"repository {repository_name} not found"
             logger.error(f"{msg}, ex: {ex}")
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=status.HTTP_404_NOT_FOUND,
                 content={"title": "Error", "message": msg},
             )
@@ -60,63 +98,186 @@ class PopularView:
         except RepositoryNameException as ex:
             msg = "An error occurred when trying to parse repository name"
             logger.error(f"{msg}, ex: {ex}")
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 content={"title": "Error", "message": msg},
             )
 
         except RequestForbiddenException as ex:
             logger.error(f"Error when retrieving repository info, ex: {ex}")
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 content={"title": "Error", "message": "An error occurred when trying to get repository info"},
             )
 
         except RequestMovedPermanently as ex:
             logger.error(f"Error when retrieving repository info, ex: {ex}")
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 content={"title": "Error", "message": "An error occurred when trying to get repository info"},
             )
 
+        except RequestRateLimited as ex:
+            logger.error(f"Error when retrieving repository info, ex: {ex}")
+            return ORJSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"title": "Error", "message": "GitHub rate limit exceeded, try again later"},
+                headers={"Retry-After": str(math.ceil(ex.retry_after))},
+            )
+
+        except CircuitOpenException as ex:
+            logger.error(f"Error when retrieving repository info, ex: {ex}")
+            return ORJSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"title": "Error", "message": "GitHub is unavailable, try again later"},
+                headers={"Retry-After": str(math.ceil(ex.retry_after))},
+            )
+
         except GitHubServiceRequestException as ex:
             logger.error(f"Error when retrieving repository info, ex: {ex}")
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 content={"title": "Error", "message": "An error occurred when trying to get repository info"},
             )
         except CalculateScoreException as ex:
             logger.error(f"Error when calculating score, ex: {ex}")
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 content={"title": "Error", "message": "An error occurred when trying to calculate score"},
             )
 
+    @router.post("/repositories", response_model=PopularBatchResponseModel)
+    async def check_many(self, batch: PopularBatchRequestModel):
+        repository_names = list(dict.fromkeys(batch.repositories))
+
+        if len(repository_names) > BATCH_MAX_REPOSITORIES:
+            return ORJSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content={"title": "Error", "message": f"At most {BATCH_MAX_REPOSITORIES} repositories per request"},
+            )
+
+        cache_entries = await self.cache_service.check_many(keys=[repository_key(name) for name in repository_names])
+        results = {}
+        for repository_name, cache_entry in zip(repository_names, cache_entries):
+            if cache_entry:
+                revalidate(
+                    entry=cache_entry,
+                    flight=repository_flight,
+                    key=repository_name,
+                    fn=partial(self.refresh_repository, repository_name=repository_name, cache_entry=cache_entry),
+                )
+                results[repository_name] = cache_entry.value
+        misses = [name for name in repository_names if name not in results]
+
+        started = time.monotonic()
+        repositories = await self.github_service.get_many_info(repository_names=misses, concurrency=BATCH_CONCURRENCY)
+        delta = time.monotonic() - started
+
+        errors = {}
+        fetched = {}
+        validators = {}
+        for repository_name, repo_data in zip(misses, repositories):
+            if isinstance(repo_data, Exception):
+                errors[repository_name] = batch_error(repository_name=repository_name, ex=repo_data)
+                continue
+            try:
+                fetched[repository_name] = self.popular_service.calculate_score(repository_data=repo_data).dict()
+            except CalculateScoreException as ex:
+                errors[repository_name] = batch_error(repository_name=repository_name, ex=ex)
+                continue
+            validators[repository_name] = (repo_data.etag, repo_data.last_modified)
+
+        if fetched:
+            await self.cache_service.set_repositories(values=fetched, delta=delta, validators=validators)
+        with ENCODING_DURATION.labels(format="json").time():
+            results.update((repository_name, dumps(value)) for repository_name, value in fetched.items())
+            items = []
+            for repository_name in batch.repositories:
+                if repository_name in results:
+                    items.append(
+                        batch_item(
+                            repository_name=repository_name,
+                            status_code=status.HTTP_200_OK,
+                            result=results[repository_name],
+                        )
+                    )
+                else:
+                    status_code, msg = errors[repository_name]
+                    items.append(batch_item(repository_name=repository_name, status_code=status_code, error=msg))
+            body = b'{"items":[' + b",".join(items) + b"]}"
+
+        return Response(content=body, media_type=JSON_MEDIA_TYPE)
+
     @router.get("/org", response_model=PopularResponseListModel)
-    def check_org(self, org_name: str):
+    async def check_org(
+        self,
+        org_name: str,
+        stream: bool = False,
+        accept: Annotated[Optional[str], Header()] = None,
+        popular_only: bool = False,
+        min_score: Optional[int] = None,
+        sort: Optional[Literal["score", "-score"]] = None,
+        limit: Annotated[Optional[int], Query(ge=1)] = None,
+        cursor: Optional[str] = None,
+    ):
+        stream = stream or NDJSON_MEDIA_TYPE in (accept or "")
         try:
-            cache_value = self.cache_service.check(key=org_name)
+            if popular_only or min_score is not None or sort or limit or cursor:
+                if popular_only:
+                    threshold = self.popular_service.popular_threshold
+                    min_score = threshold if min_score is None else max(min_score, threshold)
+                return await self.query_org(
+                    org_name=org_name,
+                    stream=stream,
+                    min_score=min_score,
+                    descending=sort != "score",
+                    limit=limit,
+                    cursor=cursor,
+                )
 
-            if cache_value:
-                cache_data = json.loads(cache_value)
-                return JSONResponse(content=cache_data, status_code=status.HTTP_200_OK)
+            cache_entry = await self.cache_service.check_org(org_name=org_name)
 
-            response_data = []
-            repos_data = self.github_service.get_org_info(org_name=org_name)
+            if cache_entry:
+                revalidate(
+                    entry=cache_entry,
+                    flight=org_flight,
+                    key=org_name,
+                    fn=lambda: self.refresh_org(org_name=org_name, cache_entry=cache_entry),
+                )
+                if stream:
+                    return Response(content=cache_entry.value, media_type=NDJSON_MEDIA_TYPE)
+                return Response(content=ndjson_to_json_list(cache_entry.value), media_type=JSON_MEDIA_TYPE)
 
-            for repo in repos_data.items:
-                popular_data = self.popular_service.calculate_score(repository_data=repo)
-                response_data.append(popular_data)
+            if stream and org_name not in org_flight.calls:
+                pages: "asyncio.Queue[bytes]" = asyncio.Queue()
+                call = org_flight.start(
+                    key=org_name, fn=lambda: self.refresh_org(org_name=org_name, on_page=pages.put_nowait)
+                )
+                first_chunk = await next_chunk(call=call, pages=pages)
+                if first_chunk is None:
+                    return Response(content=call.result(), media_type=NDJSON_MEDIA_TYPE)
+                return StreamingResponse(
+                    self.stream_org(org_name=org_name, first_chunk=first_chunk, call=call, pages=pages),
+                    media_type=NDJSON_MEDIA_TYPE,
+                )
 
-            pop_list_response = PopularResponseListModel(items=response_data)
+            body = await org_flight.do(key=org_name, fn=lambda: self.refresh_org(org_name=org_name))
 
-            self.cache_service.set_key(key=org_name, value=pop_list_response.dict())
+            # a stream that joins a fetch already in flight sends the body that fetch cached
+            if stream:
+                return Response(content=body, media_type=NDJSON_MEDIA_TYPE)
+            return Response(content=ndjson_to_json_list(body), media_type=JSON_MEDIA_TYPE)
+        except InvalidCursorException as ex:
+            logger.error(f"Invalid org cursor, ex: {ex}")
+            return ORJSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content={"title": "Error", "message": "Invalid cursor"},
+            )
 
-            return JSONResponse(content=jsonable_encoder(pop_list_response), status_code=status.HTTP_200_OK)
         except RequestNotFoundException as ex:
             msg = f"org {org_name} not found"
             logger.error(f"{msg}, ex: {ex}")
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=status.HTTP_404_NOT_FOUND,
                 content={"title": "Error", "message": msg},
             )
@@ -124,34 +285,350 @@ class PopularView:
         except RepositoryNameException as ex:
             msg = "An error occurred when trying to parse repository name"
             logger.error(f"{msg}, ex: {ex}")
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 content={"title": "Error", "message": msg},
             )
 
         except RequestForbiddenException as ex:
             logger.error(f"Error when retrieving org info, ex: {ex}")
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 content={"title": "Error", "message": "An error occurred when trying to get org info"},
             )
 
         except RequestMovedPermanently as ex:
             logger.error(f"Error when retrieving org info, ex: {ex}")
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 content={"title": "Error", "message": "An error occurred when trying to get org info"},
             )
 
+        except RequestRateLimited as ex:
+            logger.error(f"Error when retrieving org info, ex: {ex}")
+            return ORJSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"title": "Error", "message": "GitHub rate limit exceeded, try again later"},
+                headers={"Retry-After": str(math.ceil(ex.retry_after))},
+            )
+
+        except CircuitOpenException as ex:
+            logger.error(f"Error when retrieving org info, ex: {ex}")
+            return ORJSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"title": "Error", "message": "GitHub is unavailable, try again later"},
+                headers={"Retry-After": str(math.ceil(ex.retry_after))},
+            )
+
         except GitHubServiceRequestException as ex:
             logger.error(f"Error when retrieving org info, ex: {ex}")
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 content={"title": "Error", "message": "An error occurred when trying to get org info"},
             )
         except CalculateScoreException as ex:
             logger.error(f"Error when calculating score, ex: {ex}")
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 content={"title": "Error", "message": "An error occurred when trying to calculate score"},
             )
+
+    @router.post("/webhook")
+    async def webhook(
+        self,
+        request: Request,
+        x_github_event: Annotated[Optional[str], Header()] = None,
+        x_hub_signature_256: Annotated[Optional[str], Header()] = None,
+    ):
+        """Apply the signed `star`, `watch`, `fork` and `repository` deliveries to the cache, ignore the others."""
+        if not GITHUB_WEBHOOK_SECRET:
+            return ORJSONResponse(
+                status_code=status.HTTP_404_NOT_FOUND,
+                content={"title": "Error", "message": "Webhook not configured"},
+            )
+
+        event_label = x_github_event if x_github_event in WEBHOOK_EVENTS else "other"
+        body = await request.body()
+        if not verify_signature(secret=GITHUB_WEBHOOK_SECRET, body=body, signature=x_hub_signature_256):
+            logger.error(f"Webhook delivery with an invalid signature, event: {x_github_event}")
+            WEBHOOK_DELIVERIES.labels(event=event_label, result="rejected").inc()
+            return ORJSONResponse(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                content={"title": "Error", "message": "Invalid signature"},
+            )
+
+        if x_github_event not in WEBHOOK_EVENTS:
+            WEBHOOK_DELIVERIES.labels(event=event_label, result="ignored").inc()
+            return ORJSONResponse(content={"event": x_github_event, "repository": None, "result": "ignored"})
+
+        try:
+            event = parse_event(event=x_github_event, payload=loads(body))
+        except (WebhookPayloadException, ValueError) as ex:
+            logger.error(f"Invalid webhook delivery, ex: {ex}")
+            WEBHOOK_DELIVERIES.labels(event=event_label, result="invalid").inc()
+            return ORJSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content={"title": "Error", "message": "Invalid webhook payload"},
+            )
+
+        try:
+            result = await self.apply_webhook(event=event)
+        except CalculateScoreException as ex:
+            logger.error(f"Error when calculating score, ex: {ex}")
+            WEBHOOK_DELIVERIES.labels(event=event_label, result="failed").inc()
+            return ORJSONResponse(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                content={"title": "Error", "message": "An error occurred when trying to calculate score"},
+            )
+
+        WEBHOOK_DELIVERIES.labels(event=event_label, result=result).inc()
+        return ORJSONResponse(content={"event": event.event, "repository": event.repository_name, "result": result})
+
+    async def apply_webhook(self, event: WebhookEvent) -> str:
+        """Store the repository of `event` and drop the keys it makes wrong; return `updated` or `removed`."""
+        stale_keys = event.stale_keys()
+        if stale_keys:
+            await self.cache_service.invalidate(keys=stale_keys)
+        if event.deleted:
+            return "removed"
+
+        popular_data = self.popular_service.calculate_score(repository_data=event.repository)
+        await self.cache_service.set_repositories(values={event.repository_name: popular_data.dict()})
+        return "updated"
+
+    async def query_org(
+        self,
+        org_name: str,
+        stream: bool,
+        min_score: Optional[int],
+        descending: bool,
+        limit: Optional[int],
+        cursor: Optional[str],
+    ) -> Response:
+        """Answer a filtered, sorted or paged org query from the org index."""
+        after = decode_cursor(cursor) if cursor else None
+        query = partial(
+            self.cache_service.query_org,
+            org_name=org_name,
+            min_score=min_score,
+            descending=descending,
+            limit=limit,
+            after=after,
+        )
+        result = await query()
+        if result is None:
+            body = await org_flight.do(key=org_name, fn=lambda: self.refresh_org(org_name=org_name))
+            result = await query()
+            if result is None:
+                # redis is bypassed: the org only exists in the body of its refresh
+                page = query_body(body, min_score=min_score, descending=descending, limit=limit, after=after)
+                result = (None, *page)
+
+        org_entry, values, following = result
+        if org_entry is not None:
+            revalidate(
+                entry=org_entry,
+                flight=org_flight,
+                key=org_name,
+                fn=lambda: self.refresh_org(org_name=org_name, cache_entry=org_entry),
+            )
+        next_cursor = encode_cursor(following) if following else None
+        if stream:
+            headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+            with ENCODING_DURATION.labels(format="ndjson").time():
+                body = b"".join(value + b"\n" for value in values)
+            return Response(content=body, media_type=NDJSON_MEDIA_TYPE, headers=headers)
+        with ENCODING_DURATION.labels(format="json").time():
+            body = b'{"items":[' + b",".join(values) + b'],"next_cursor":' + dumps(next_cursor) + b"}"
+        return Response(content=body, media_type=JSON_MEDIA_TYPE)
+
+    async def refresh_repository(
+        self, repository_name: str, cache_entry: Optional[CacheEntry] = None
+    ) -> PopularResponseModel:
+        """Fetch and score `repository_name` again, conditionally when `cache_entry` has validators."""
+        async with self.cache_service.refresh_lock(key=repository_name) as waited:
+            if waited:
+                cache_entry = await self.cache_service.check_entry(key=repository_key(repository_name))
+                if cache_entry and not cache_entry.is_stale:
+                    return PopularResponseModel(**loads(cache_entry.value))
+
+            started = time.monotonic()
+            try:
+                repo_data = await self.github_service.get_info(
+                    repository_name=repository_name,
+                    etag=cache_entry.etag if cache_entry else None,
+                    last_modified=cache_entry.last_modified if cache_entry else None,
+                )
+            except RequestNotModified:
+                await self.cache_service.renew(key=repository_key(repository_name), entry=cache_entry)
+                return PopularResponseModel(**loads(cache_entry.value))
+
+            popular_data = self.popular_service.calculate_score(repository_data=repo_data)
+            await self.cache_service.set_repositories(
+                values={repository_name: popular_data.dict()},
+                delta=time.monotonic() - started,
+                validators={repository_name: (repo_data.etag, repo_data.last_modified)},
+            )
+
+        return popular_data
+
+    async def refresh_org(
+        self,
+        org_name: str,
+        cache_entry: Optional[CacheEntry] = None,
+        on_page: Optional[Callable[[bytes], None]] = None,
+    ) -> bytes:
+        """Fetch and score the org again, revalidating the page ETags of `cache_entry` first.
+
+        `on_page` gets the NDJSON of every page fetched from GitHub as soon as it is scored.
+        """
+        async with self.cache_service.refresh_lock(key=org_name) as waited:
+            if waited:
+                cache_entry = await self.cache_service.check_org(org_name=org_name)
+                if cache_entry and not cache_entry.is_stale:
+                    return cache_entry.value
+
+            if cache_entry and cache_entry.etag:
+                if await self.github_service.org_not_modified(org_name=org_name, etags=cache_entry.etag.split(",")):
+                    renewed = await self.cache_service.renew_org(org_name=org_name, entry=cache_entry)
+                    if renewed is not None:
+                        return renewed.value
+
+            started = time.monotonic()
+            items, fetched = [], []
+            async for page in self.github_service.iter_org_pages(org_name=org_name):
+                page_items = list(self.score_page(page=page).dicts())
+                items.extend(page_items)
+                fetched.append(page)
+                if on_page:
+                    on_page(to_ndjson(page_items))
+
+            cache_entry = await self.cache_service.set_org(
+                org_name=org_name,
+                items=items,
+                delta=time.monotonic() - started,
+                etag=org_etag(pages=fetched),
+            )
+
+        return cache_entry.value
+
+    def score_page(self, page: GitHupApiOrgResponse) -> ScoredRepositories:
+        return self.popular_service.score_repositories(repositories=page.items)
+
+    async def stream_org(
+        self, org_name: str, first_chunk: bytes, call: "asyncio.Future[bytes]", pages: "asyncio.Queue[bytes]"
+    ) -> AsyncIterator[bytes]:
+        """Send the org as NDJSON page by page while `call` fetches and caches it."""
+        try:
+            chunk: Optional[bytes] = first_chunk
+            while chunk is not None:
+                yield chunk
+                chunk = await next_chunk(call=call, pages=pages)
+        except (GitHubServiceRequestException, CalculateScoreException) as ex:
+            logger.error(f"Error when streaming org {org_name} info, ex: {ex}")
+            raise
+
+
+async def next_chunk(call: "asyncio.Future[bytes]", pages: "asyncio.Queue[bytes]") -> Optional[bytes]:
+    """Wait for the next page `call` puts in `pages`, None once `call` is done and every page was taken."""
+    if pages.empty() and not call.done():
+        get = asyncio.ensure_future(pages.get())
+        await asyncio.wait({get, call}, return_when=asyncio.FIRST_COMPLETED)
+        if get.done():
+            return get.result()
+        get.cancel()
+    if not pages.empty():
+        return pages.get_nowait()
+    # raises what the call raised
+    call.result()
+    return None
+
+
+def revalidate(entry: CacheEntry, flight: SingleFlight, key: str, fn: Callable[[], Awaitable]) -> None:
+    """Refresh `key` in the background when its entry is stale or XFetch says so, unless the GitHub budget is low."""
+    if not entry.should_refresh() or get_token_pool().budget_low or get_rate_limiter().blocked:
+        return
+    CACHE_REFRESHES.labels(trigger="stale" if entry.is_stale else "early").inc()
+    task = asyncio.ensure_future(flight.do(key=key, fn=fn))
+    background_refreshes.add(task)
+    task.add_done_callback(finish_refresh)
+
+
+def finish_refresh(task: asyncio.Future) -> None:
+    background_refreshes.discard(task)
+    if not task.cancelled() and task.exception():
+        logger.error(f"Error when refreshing cache in background, ex: {task.exception()!r}")
+
+
+def org_etag(pages: List[GitHupApiOrgResponse]) -> Optional[str]:
+    """Join the page ETags in page order, the validator `refresh_org` revalidates; None unless every page has one."""
+    pages = sorted(pages, key=lambda page: page.page)
+    if not pages or not all(page.etag for page in pages):
+        return None
+    return ",".join(page.etag for page in pages)
+
+
+def encode_cursor(position: Tuple[float, int]) -> str:
+    score, skip = position
+    return base64.urlsafe_b64encode(f"{score!r}:{skip}".encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    """Read back the (score, skip) position of `encode_cursor`, raising InvalidCursorException on anything else."""
+    try:
+        score, skip = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8").split(":")
+        position = float(score), int(skip)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as ex:
+        raise InvalidCursorException(cursor) from ex
+    if not math.isfinite(position[0]) or position[1] < 0:
+        raise InvalidCursorException(cursor)
+    return position
+
+
+def to_ndjson_line(item: dict) -> bytes:
+    return dumps(item) + b"\n"
+
+
+def to_ndjson(items: List[dict]) -> bytes:
+    with ENCODING_DURATION.labels(format="ndjson").time():
+        return b"".join(to_ndjson_line(item) for item in items)
+
+
+def ndjson_to_json_list(value: bytes) -> bytes:
+    with ENCODING_DURATION.labels(format="json").time():
+        return b'{"items":[' + b",".join(value.splitlines()) + b"]}"
+
+
+def batch_item(
+    repository_name: str, status_code: int, result: Optional[bytes] = None, error: Optional[str] = None
+) -> bytes:
+    """A PopularBatchItemModel as JSON, with `result` (the repository JSON, as cached) spliced in without decoding."""
+    return (
+        b'{"repository_name":'
+        + dumps(repository_name)
+        + b',"status":'
+        + str(status_code).encode("utf-8")
+        + b',"result":'
+        + (result if result is not None else b"null")
+        + b',"error":'
+        + dumps(error)
+        + b"}"
+    )
+
+
+def batch_error(repository_name: str, ex: Exception) -> Tuple[int, str]:
+    """Map an exception raised while scoring one repository of a batch to the status and message of that item."""
+    if isinstance(ex, RequestNotFoundException):
+        return status.HTTP_404_NOT_FOUND, f"repository {repository_name} not found"
+    if isinstance(ex, RequestRateLimited):
+        return status.HTTP_503_SERVICE_UNAVAILABLE, "GitHub rate limit exceeded, try again later"
+    if isinstance(ex, CircuitOpenException):
+        return status.HTTP_503_SERVICE_UNAVAILABLE, "GitHub is unavailable, try again later"
+    if isinstance(ex, RepositoryNameException):
+        msg = "An error occurred when trying to parse repository name"
+    elif isinstance(ex, CalculateScoreException):
+        msg = "An error occurred when trying to calculate score"
+    else:
+        msg = "An error occurred when trying to get repository info"
+    logger.error(f"{msg} for {repository_name}, ex: {ex}")
+    return status.HTTP_500_INTERNAL_SERVER_ERROR, msg
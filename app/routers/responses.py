@@ -0,0 +1,11 @@
+from typing import Any
+
+import orjson
+from metrics import ENCODING_DURATION
+from starlette.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        with ENCODING_DURATION.labels(format="json").time():
+            return orjson.dumps(content)
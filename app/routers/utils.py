@@ -1,9 +1,13 @@
+import os
 from logging import Logger
 
 from fastapi_utils.cbv import cbv
 from fastapi_utils.inferring_router import InferringRouter
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest, multiprocess
+from routers.responses import ORJSONResponse
+from services.circuit_breaker import circuit_breakers
 from starlette import status
-from starlette.responses import JSONResponse
+from starlette.responses import Response
 
 router = InferringRouter()
 
@@ -17,4 +21,20 @@ class UtilsView:
 
     @router.get("/healthcheck")
     def health_check(self):
-        return JSONResponse(content={"message": "I'm alive"}, status_code=status.HTTP_200_OK)
+        return ORJSONResponse(content={"message": "I'm alive"}, status_code=status.HTTP_200_OK)
+
+    @router.get("/metrics")
+    def metrics(self):
+        if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+            return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+        # several workers (see server.py): sum up what each of them wrote
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(content=generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+    @router.get("/circuit-breakers")
+    def circuit_breaker_states(self):
+        return ORJSONResponse(
+            content={name: breaker.snapshot() for name, breaker in circuit_breakers().items()},
+            status_code=status.HTTP_200_OK,
+        )
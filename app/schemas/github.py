@@ -1,14 +1,21 @@
-from typing import List
+from dataclasses import dataclass, field
+from typing import List, Optional
 
-from pydantic import BaseModel
 
-
-class GitHupApiResponse(BaseModel):
+# What GitHub answered, as parsed by GitHubService. These never leave the service and GitHub already sends the
+# right types, so they are plain dataclasses: pydantic is kept for the API schemas of schemas.popular.
+@dataclass
+class GitHupApiResponse:
     stars: int
     forks: int
     owner: str
     name: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
 
 
-class GitHupApiOrgResponse(BaseModel):
-    items: List[GitHupApiResponse]
+@dataclass
+class GitHupApiOrgResponse:
+    items: List[GitHupApiResponse] = field(default_factory=list)
+    page: int = 1
+    etag: Optional[str] = None
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel
 
@@ -12,3 +12,19 @@ class PopularResponseModel(BaseModel):
 
 class PopularResponseListModel(BaseModel):
     items: List[PopularResponseModel]
+    next_cursor: Optional[str] = None
+
+
+class PopularBatchRequestModel(BaseModel):
+    repositories: List[str]
+
+
+class PopularBatchItemModel(BaseModel):
+    repository_name: str
+    status: int
+    result: Optional[PopularResponseModel] = None
+    error: Optional[str] = None
+
+
+class PopularBatchResponseModel(BaseModel):
+    items: List[PopularBatchItemModel]
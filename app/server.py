@@ -0,0 +1,71 @@
+"""Production entry point: the API with SERVER_WORKERS uvicorn worker processes behind a single socket."""
+
+import glob
+import os
+import socket
+import tempfile
+
+import uvicorn
+from config import (
+    SERVER_ACCESS_LOG,
+    SERVER_APP,
+    SERVER_BACKLOG,
+    SERVER_GRACEFUL_TIMEOUT,
+    SERVER_HOST,
+    SERVER_HTTP,
+    SERVER_KEEPALIVE_TIMEOUT,
+    SERVER_LIMIT_CONCURRENCY,
+    SERVER_LOOP,
+    SERVER_PORT,
+    SERVER_WORKERS,
+)
+from uvicorn.config import HTTP_PROTOCOLS
+from uvicorn.importer import import_from_string
+
+HTTPProtocol = import_from_string(HTTP_PROTOCOLS[SERVER_HTTP])
+
+
+class NoDelayHTTPProtocol(HTTPProtocol):
+    """The SERVER_HTTP protocol with TCP_NODELAY, which asyncio does not set on the socket workers inherit."""
+
+    def connection_made(self, transport):
+        sock = transport.get_extra_info("socket")
+        if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        super().connection_made(transport)
+
+
+def prepare_metrics_dir() -> None:
+    """Point the workers at an empty PROMETHEUS_MULTIPROC_DIR, before any of them imports prometheus_client."""
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory is None:
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="popular-metrics-")
+        return
+    os.makedirs(directory, exist_ok=True)
+    # the files of a previous run would add up with the new ones
+    for path in glob.glob(os.path.join(directory, "*.db")):
+        os.remove(path)
+
+
+def main(workers: int = SERVER_WORKERS) -> None:
+    if workers > 1:
+        prepare_metrics_dir()
+    uvicorn.run(
+        SERVER_APP,
+        factory=True,
+        host=SERVER_HOST,
+        port=SERVER_PORT,
+        workers=workers,
+        loop=SERVER_LOOP,
+        http=NoDelayHTTPProtocol,
+        lifespan="on",
+        limit_concurrency=SERVER_LIMIT_CONCURRENCY or None,
+        backlog=SERVER_BACKLOG,
+        timeout_keep_alive=SERVER_KEEPALIVE_TIMEOUT,
+        timeout_graceful_shutdown=SERVER_GRACEFUL_TIMEOUT,
+        access_log=SERVER_ACCESS_LOG,
+    )
+
+
+if __name__ == "__main__":
+    main()
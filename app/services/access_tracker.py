@@ -0,0 +1,40 @@
+import logging
+from collections import Counter
+from typing import Iterable, Optional
+
+from config import CACHE_HOT_KEYS_KEY, CACHE_WARMER_ENABLED
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+
+class AccessTracker:
+    """Count the cache lookups of each key in memory, added to CACHE_HOT_KEYS_KEY on `flush`."""
+
+    def __init__(self):
+        self.counts: Counter = Counter()
+
+    def record(self, keys: Iterable[str]) -> None:
+        self.counts.update(keys)
+
+    async def flush(self, connection) -> None:
+        if not self.counts:
+            return
+        counts, self.counts = self.counts, Counter()
+        pipeline = connection.pipeline(transaction=False)
+        for key, count in counts.items():
+            pipeline.zincrby(CACHE_HOT_KEYS_KEY, count, key)
+        try:
+            await pipeline.execute()
+        except RedisError as ex:
+            logger.error(f"Could not flush the cache access counts, ex: {ex}")
+
+
+_access_tracker: Optional[AccessTracker] = None
+
+
+def get_access_tracker() -> Optional[AccessTracker]:
+    global _access_tracker
+    if CACHE_WARMER_ENABLED and _access_tracker is None:
+        _access_tracker = AccessTracker()
+    return _access_tracker
@@ -1,22 +1,577 @@
-import json
+import functools
 import logging
-from typing import Optional
+import math
+import random
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, replace
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
 
-import redis
-from config import REDIS_DB, REDIS_HOST, REDIS_KEY_TTL, REDIS_PORT
+from config import (
+    CACHE_HARD_TTL,
+    CACHE_INVALIDATION_CHANNEL,
+    CACHE_LOCK_ENABLED,
+    CACHE_LOCK_TIMEOUT,
+    CACHE_LOCK_WAIT,
+    CACHE_SOFT_TTL,
+    CACHE_WEBHOOK_HARD_TTL,
+    CACHE_WEBHOOK_SOFT_TTL,
+    CACHE_XFETCH_BETA,
+    GITHUB_WEBHOOK_OWNERS,
+)
+from metrics import CACHE_LOOKUPS, CACHE_OPERATION_DURATION, ENCODING_DURATION
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import LockError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+from services.access_tracker import get_access_tracker
+from services.circuit_breaker import get_circuit_breaker
+from services.codec import compress, decompress, dumps, loads
+from services.local_cache import get_local_cache, invalidation_message
+from services.redis_client import get_redis, is_cluster
 
 logger = logging.getLogger(__name__)
 
+REPOSITORY_PREFIX = "repo:"
+ORG_PREFIX = "org:"
+ENTRY_VERSION = b"v2"
+
+
+def guarded(operation: str, fallback: Optional[Callable] = None):
+    """Time the decorated redis call, and return `fallback(...)` or None instead while redis is unreachable."""
+    histogram = CACHE_OPERATION_DURATION.labels(operation=operation)
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(self, *args, **kwargs):
+            if not self.circuit_breaker.allow():
+                return fallback(self, *args, **kwargs) if fallback else None
+            started = time.perf_counter()
+            try:
+                result = await fn(self, *args, **kwargs)
+            except (RedisConnectionError, RedisTimeoutError) as ex:
+                self.circuit_breaker.record_failure()
+                logger.error(f"Redis unreachable, bypassing the cache for {operation}, ex: {ex!r}")
+                return fallback(self, *args, **kwargs) if fallback else None
+            finally:
+                histogram.observe(time.perf_counter() - started)
+            self.circuit_breaker.record_success()
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def repository_key(repository_name: str) -> str:
+    return f"{REPOSITORY_PREFIX}{repository_name.lower()}"
+
+
+def org_key(org_name: str) -> str:
+    """Key of the org entry, whose value is the number of repositories of the org."""
+    return f"{ORG_PREFIX}{org_name.lower()}"
+
+
+def org_index_key(org_name: str) -> str:
+    """Key of the sorted set of the org repositories by score."""
+    return f"{ORG_PREFIX}{org_name.lower()}:repos"
+
+
+def webhook_covered(key: str) -> bool:
+    """Whether `key` belongs to an owner of GITHUB_WEBHOOK_OWNERS, whose webhook deliveries keep it up to date."""
+    if not GITHUB_WEBHOOK_OWNERS:
+        return False
+    owner = key.partition(":")[2].partition("/")[0].partition(":")[0]
+    return owner in GITHUB_WEBHOOK_OWNERS
+
+
+def soft_ttl(key: str) -> float:
+    return CACHE_WEBHOOK_SOFT_TTL if webhook_covered(key) else CACHE_SOFT_TTL
+
+
+def hard_ttl(key: str) -> int:
+    return CACHE_WEBHOOK_HARD_TTL if webhook_covered(key) else CACHE_HARD_TTL
+
+
+@dataclass
+class CacheEntry:
+    """A cached value with when it was fetched, how long that took (`delta`) and its GitHub validators."""
+
+    value: bytes
+    fetched_at: float
+    delta: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    soft_ttl: float = CACHE_SOFT_TTL
+
+    @property
+    def is_stale(self) -> bool:
+        return time.time() - self.fetched_at >= self.soft_ttl
+
+    def should_refresh(self) -> bool:
+        """Probabilistic early expiration (XFetch); stale entries always need a refresh."""
+        jitter = -self.delta * CACHE_XFETCH_BETA * math.log(1 - random.random())
+        return time.time() + jitter >= self.fetched_at + self.soft_ttl
+
+    def encode(self) -> bytes:
+        header = f"{self.fetched_at:.3f} {self.delta:.3f}"
+        if self.etag or self.last_modified:
+            # an ETag has no spaces, an HTTP date does, so the date goes last
+            header += f" {self.etag or '-'} {self.last_modified or ''}".rstrip()
+        compression, value = compress(self.value)
+        return ENTRY_VERSION + f" {compression} {header}\n".encode("utf-8") + value
+
+    @classmethod
+    def decode(cls, raw: bytes, soft_ttl: float = CACHE_SOFT_TTL) -> Optional["CacheEntry"]:
+        """None for an entry of an unknown version or that cannot be decoded, which is then a miss."""
+        header, _, value = raw.partition(b"\n")
+        try:
+            if header.startswith(b"v"):
+                version, compression, header = header.split(b" ", 2)
+                if version != ENTRY_VERSION:
+                    return None
+                value = decompress(compression.decode("utf-8"), value)
+            # unversioned headers were written before entries carried a version
+            fetched_at, delta, *validators = header.decode("utf-8").split(" ", 3)
+            etag = validators[0] if validators and validators[0] != "-" else None
+            last_modified = validators[1] if len(validators) > 1 else None
+            return cls(
+                value=value,
+                fetched_at=float(fetched_at),
+                delta=float(delta),
+                etag=etag,
+                last_modified=last_modified,
+                soft_ttl=soft_ttl,
+            )
+        except Exception as ex:
+            # an unknown compression, a corrupt value or a header that does not parse
+            logger.warning(f"Could not decode a cache entry, ex: {ex!r}")
+            return None
+
 
 class CacheService:
-    def __init__(self, *, connection=None):
-        self.connection = connection or redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB)
+    def __init__(self, *, connection=None, local_cache=None, access_tracker=None, circuit_breaker=None):
+        self.connection = connection or get_redis()
+        self.circuit_breaker = circuit_breaker or get_circuit_breaker("redis")
+        # keys spread over the slots of a cluster: MGET and transactions can only span the keys of one slot
+        self.cluster = is_cluster(self.connection)
+        self.local_cache = local_cache if local_cache is not None else get_local_cache()
+        self.access_tracker = access_tracker if access_tracker is not None else get_access_tracker()
+
+    async def renew(self, key: str, entry: CacheEntry) -> None:
+        await self.set_entry(key=key, entry=replace(entry, fetched_at=time.time()))
+
+    @guarded("set")
+    async def set_entry(self, key: str, entry: CacheEntry) -> None:
+        if self.local_cache is None:
+            await self.connection.set(key, entry.encode(), ex=hard_ttl(key))
+            return
+
+        owner_key = repository_org_key(key)
+        pipeline = self.connection.pipeline(transaction=False)
+        pipeline.set(key, entry.encode(), ex=hard_ttl(key))
+        pipeline.publish(CACHE_INVALIDATION_CHANNEL, invalidation_message(key))
+        if owner_key is not None:
+            pipeline.publish(CACHE_INVALIDATION_CHANNEL, invalidation_message(owner_key))
+        await pipeline.execute()
+        self.local_cache.set(key, entry, size=len(entry.value))
+        if owner_key is not None:
+            self.local_cache.invalidate(owner_key)
+
+    async def check_entry(self, key: str) -> Optional[CacheEntry]:
+        if self.access_tracker is not None:
+            self.access_tracker.record([key])
+
+        if self.local_cache is not None:
+            entry = self.local_cache.get(key)
+            if entry is not None:
+                return self.count_lookup(entry)
+
+        return self.count_lookup(await self.fetch(key=key))
+
+    async def check_many(self, keys: List[str], track: bool = True) -> List[Optional[CacheEntry]]:
+        if track and self.access_tracker is not None:
+            self.access_tracker.record(keys)
+
+        entries = {}
+        if self.local_cache is not None:
+            entries = {key: entry for key in keys if (entry := self.local_cache.get(key)) is not None}
+
+        remote_keys = [key for key in keys if key not in entries]
+        if remote_keys:
+            entries.update(zip(remote_keys, await self.fetch_many(keys=remote_keys)))
+
+        return [self.count_lookup(entries[key]) for key in keys]
+
+    @guarded("get")
+    async def fetch(self, key: str) -> Optional[CacheEntry]:
+        return self.to_entry(key=key, value=await self.connection.get(key))
+
+    @guarded("get_many", fallback=lambda self, keys: [None] * len(keys))
+    async def fetch_many(self, keys: List[str]) -> List[Optional[CacheEntry]]:
+        return [self.to_entry(key=key, value=value) for key, value in zip(keys, await self.read_many(keys))]
+
+    async def read_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        """Raw values of `keys` in one round trip, one per node on a cluster."""
+        if not keys:
+            return []
+        if self.cluster:
+            return await self.connection.mget_nonatomic(keys)
+        return await self.connection.mget(keys)
+
+    async def set_repositories(
+        self,
+        values: Dict[str, dict],
+        delta: float = 0,
+        validators: Optional[Dict[str, Tuple[Optional[str], Optional[str]]]] = None,
+    ) -> None:
+        """Store scored repositories by `owner/name` and move them in the index of their org when it is cached."""
+        validators = validators or {}
+        entries = self.new_entries(
+            values={repository_key(name): value for name, value in values.items()},
+            delta=delta,
+            validators={repository_key(name): validator for name, validator in validators.items()},
+        )
+        await self.write(entries=entries, scores=list(values.values()))
+
+    @guarded("set_many")
+    async def write(self, entries: Dict[str, CacheEntry], scores: Optional[List[dict]] = None) -> None:
+        pipeline = self.connection.pipeline(transaction=False)
+        for key, entry in entries.items():
+            pipeline.set(key, entry.encode(), ex=hard_ttl(key))
+            if self.local_cache is not None:
+                pipeline.publish(CACHE_INVALIDATION_CHANNEL, invalidation_message(key))
+        for value in scores or []:
+            # XX: only orgs already indexed are updated, a repository never creates the index of its owner
+            pipeline.zadd(org_index_key(value["owner"]), {index_member(value): value["score"]}, xx=True)
+        # the orgs assembled in local caches hold the previous value and order of these repositories
+        owner_keys = {org_key(value["owner"]) for value in scores or []}
+        if self.local_cache is not None:
+            for key in owner_keys:
+                pipeline.publish(CACHE_INVALIDATION_CHANNEL, invalidation_message(key))
+        await pipeline.execute()
+
+        if self.local_cache is not None:
+            for key, entry in entries.items():
+                self.local_cache.set(key, entry, size=len(entry.value))
+            for key in owner_keys:
+                self.local_cache.invalidate(key)
 
-    def set_key(self, key: str, value: dict) -> None:
-        self.connection.set(key, json.dumps(value), ex=REDIS_KEY_TTL)
+    def new_entries(
+        self,
+        values: Dict[str, dict],
+        delta: float = 0,
+        validators: Optional[Dict[str, Tuple[Optional[str], Optional[str]]]] = None,
+    ) -> Dict[str, CacheEntry]:
+        fetched_at = time.time()
+        validators = validators or {}
+        return {
+            key: CacheEntry(
+                value=dumps(value),
+                fetched_at=fetched_at,
+                delta=delta,
+                etag=validators.get(key, (None, None))[0],
+                last_modified=validators.get(key, (None, None))[1],
+                soft_ttl=soft_ttl(key),
+            )
+            for key, value in values.items()
+        }
 
-    def check(self, key: str) -> Optional[str]:
-        value = self.connection.get(key)
-        if value:
-            return value.decode("utf-8")
+    async def check_org(self, org_name: str, track: bool = True) -> Optional[CacheEntry]:
+        """The cached org, its value assembled from the entries of its repositories by descending score."""
+        key = org_key(org_name)
+        if track and self.access_tracker is not None:
+            self.access_tracker.record([key])
+
+        if self.local_cache is not None:
+            entry = self.local_cache.get(key)
+            if entry is not None:
+                return self.count_lookup(entry)
+
+        entry = await self.read_org(org_name=org_name)
+        if entry is not None and self.local_cache is not None:
+            self.local_cache.set(key, entry, size=len(entry.value))
+        return self.count_lookup(entry)
+
+    @guarded("get_org")
+    async def read_org(self, org_name: str) -> Optional[CacheEntry]:
+        pipeline = self.connection.pipeline(transaction=False)
+        pipeline.get(org_key(org_name))
+        pipeline.zrevrange(org_index_key(org_name), 0, -1)
+        raw, members = await pipeline.execute()
+        entry = CacheEntry.decode(raw, soft_ttl=soft_ttl(org_key(org_name))) if raw is not None else None
+        if entry is None:
+            return None
+
+        values = entry_values(await self.read_many([repository_key(member.decode("utf-8")) for member in members]))
+        if values is None or not entry.value.isdigit() or int(entry.value) != len(values):
+            return None
+        return replace(entry, value=assemble_org(values))
+
+    @guarded("org_size")
+    async def org_size(self, org_name: str) -> int:
+        """Number of repositories indexed for the org, 0 when it is not indexed."""
+        return await self.connection.zcard(org_index_key(org_name))
+
+    @guarded("set_org", fallback=lambda self, *args, **kwargs: self.org_entry(*args, **kwargs))
+    async def set_org(
+        self, org_name: str, items: List[dict], delta: float = 0, etag: Optional[str] = None
+    ) -> CacheEntry:
+        """Store the org, rewriting only the repositories whose value changed; return it as `check_org` would."""
+        fetched_at = time.time()
+        values = {repository_key(index_member(item)): (item, dumps(item)) for item in items}
+        keys = list(values)
+        current = [CacheEntry.decode(raw) if raw is not None else None for raw in await self.read_many(keys)]
+        # every repository was just fetched, the unchanged ones keep the validators of their own requests
+        entries = {
+            key: (
+                CacheEntry(value=values[key][1], fetched_at=fetched_at, delta=delta, soft_ttl=soft_ttl(key))
+                if stored is None or stored.value != values[key][1]
+                else replace(stored, fetched_at=fetched_at, delta=delta, soft_ttl=soft_ttl(key))
+            )
+            for key, stored in zip(keys, current)
+        }
+        entry = CacheEntry(
+            value=str(len(values)).encode("utf-8"),
+            fetched_at=fetched_at,
+            delta=delta,
+            etag=etag,
+            soft_ttl=soft_ttl(org_key(org_name)),
+        )
+        index = org_index_key(org_name)
+
+        pipeline = self.connection.pipeline(transaction=not self.cluster)
+        for key, repository_entry in entries.items():
+            pipeline.set(key, repository_entry.encode(), ex=hard_ttl(key))
+        pipeline.delete(index)
+        if values:
+            pipeline.zadd(index, {index_member(item): item["score"] for item, _ in values.values()})
+            pipeline.expire(index, hard_ttl(index))
+        pipeline.set(org_key(org_name), entry.encode(), ex=hard_ttl(org_key(org_name)))
+        if self.local_cache is not None:
+            for key in [*entries, org_key(org_name)]:
+                pipeline.publish(CACHE_INVALIDATION_CHANNEL, invalidation_message(key))
+        await pipeline.execute()
+
+        entry = replace(entry, value=ranked_org(values.values()))
+        if self.local_cache is not None:
+            for key, repository_entry in entries.items():
+                self.local_cache.set(key, repository_entry, size=len(repository_entry.value))
+            self.local_cache.set(org_key(org_name), entry, size=len(entry.value))
+        return entry
+
+    def org_entry(self, org_name: str, items: List[dict], delta: float = 0, etag: Optional[str] = None) -> CacheEntry:
+        return CacheEntry(
+            value=ranked_org((item, dumps(item)) for item in items),
+            fetched_at=time.time(),
+            delta=delta,
+            etag=etag,
+            soft_ttl=soft_ttl(org_key(org_name)),
+        )
+
+    @guarded("renew_org")
+    async def renew_org(self, org_name: str, entry: CacheEntry) -> Optional[CacheEntry]:
+        """Renew the org and its repositories when none of its pages changed; None when a repository is missing."""
+        members = await self.connection.zrevrange(org_index_key(org_name), 0, -1)
+        keys = [repository_key(member.decode("utf-8")) for member in members]
+        stored = decode_entries(await self.read_many(keys))
+        if stored is None:
+            return None
+        fetched_at = time.time()
+        entries = {
+            key: replace(repository_entry, fetched_at=fetched_at, soft_ttl=soft_ttl(key))
+            for key, repository_entry in zip(keys, stored)
+        }
+        entry = replace(entry, value=str(len(keys)).encode("utf-8"), fetched_at=fetched_at)
+
+        pipeline = self.connection.pipeline(transaction=False)
+        for key, repository_entry in entries.items():
+            pipeline.set(key, repository_entry.encode(), ex=hard_ttl(key))
+        pipeline.expire(org_index_key(org_name), hard_ttl(org_key(org_name)))
+        pipeline.set(org_key(org_name), entry.encode(), ex=hard_ttl(org_key(org_name)))
+        if self.local_cache is not None:
+            for key in [*entries, org_key(org_name)]:
+                pipeline.publish(CACHE_INVALIDATION_CHANNEL, invalidation_message(key))
+        await pipeline.execute()
+
+        entry = replace(entry, value=assemble_org([repository_entry.value for repository_entry in stored]))
+        if self.local_cache is not None:
+            for key, repository_entry in entries.items():
+                self.local_cache.set(key, repository_entry, size=len(repository_entry.value))
+            self.local_cache.set(org_key(org_name), entry, size=len(entry.value))
+        return entry
+
+    @guarded("invalidate")
+    async def invalidate(self, keys: List[str]) -> None:
+        """Delete `keys`, from the local cache of every worker too."""
+        pipeline = self.connection.pipeline(transaction=False)
+        for key in keys:
+            pipeline.delete(key)
+            if self.local_cache is not None:
+                pipeline.publish(CACHE_INVALIDATION_CHANNEL, invalidation_message(key))
+        await pipeline.execute()
+
+        if self.local_cache is not None:
+            for key in keys:
+                self.local_cache.invalidate(key)
+
+    @guarded("query_org")
+    async def query_org(
+        self,
+        org_name: str,
+        min_score: Optional[float] = None,
+        descending: bool = True,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[float, int]] = None,
+    ) -> Optional[Tuple[CacheEntry, List[bytes], Optional[Tuple[float, int]]]]:
+        """Page through the org index by score from the `after` (score, skip) position; None when not cached."""
+        key = org_key(org_name)
+        if self.access_tracker is not None:
+            self.access_tracker.record([key])
+
+        low, high, offset = score_range(min_score=min_score, descending=descending, after=after)
+        pipeline = self.connection.pipeline(transaction=False)
+        pipeline.get(key)
+        if descending:
+            pipeline.zrevrangebyscore(
+                org_index_key(org_name), high, low, start=offset, num=limit + 1 if limit else -1, withscores=True
+            )
+        else:
+            pipeline.zrangebyscore(
+                org_index_key(org_name), low, high, start=offset, num=limit + 1 if limit else -1, withscores=True
+            )
+        raw, rows = await pipeline.execute()
+        if raw is None:
+            return self.count_lookup(None)
+
+        rows, following = next_page(rows, limit=limit, after=after)
+        entry = CacheEntry.decode(raw, soft_ttl=soft_ttl(key))
+        values = entry_values(await self.read_many([repository_key(member.decode("utf-8")) for member, _ in rows]))
+        if entry is None or values is None:
+            return self.count_lookup(None)
+
+        return self.count_lookup(entry), values, following
+
+    def to_entry(self, key: str, value: Optional[bytes]) -> Optional[CacheEntry]:
+        if value is None:
+            return None
+        entry = CacheEntry.decode(value, soft_ttl=soft_ttl(key))
+        if entry is not None and self.local_cache is not None:
+            self.local_cache.set(key, entry, size=len(entry.value))
+        return entry
+
+    def count_lookup(self, entry: Optional[CacheEntry]) -> Optional[CacheEntry]:
+        if entry is None:
+            CACHE_LOOKUPS.labels(result="miss").inc()
+        else:
+            CACHE_LOOKUPS.labels(result="stale" if entry.is_stale else "hit").inc()
+        return entry
+
+    @asynccontextmanager
+    async def refresh_lock(self, key: str) -> AsyncIterator[bool]:
+        """Hold the fleet wide refresh lock of `key`; yields whether another worker was holding it."""
+        if not CACHE_LOCK_ENABLED or not self.circuit_breaker.allow():
+            yield False
+            return
+
+        lock = self.connection.lock(f"lock:{key}", timeout=CACHE_LOCK_TIMEOUT, blocking_timeout=CACHE_LOCK_WAIT)
+        try:
+            waited = not await lock.acquire(blocking=False)
+            acquired = not waited or await lock.acquire()
+        except (RedisConnectionError, RedisTimeoutError) as ex:
+            self.circuit_breaker.record_failure()
+            logger.error(f"Redis unreachable, refreshing {key} without the lock, ex: {ex!r}")
+            waited = acquired = False
+        try:
+            yield waited
+        finally:
+            if acquired:
+                try:
+                    await lock.release()
+                except LockError as ex:
+                    logger.warning(f"Refresh lock of {key} expired before release, ex: {ex}")
+
+
+def score_range(
+    min_score: Optional[float], descending: bool, after: Optional[Tuple[float, int]]
+) -> Tuple[float, float, int]:
+    """Lowest and highest score of an org query, and how many repositories to skip at the `after` score."""
+    low, high, offset = float("-inf") if min_score is None else min_score, float("inf"), 0
+    if after is not None:
+        score, offset = after
+        if descending:
+            high = score
+        else:
+            low = max(low, score)
+    return low, high, offset
+
+
+def next_page(
+    rows: List[Tuple[bytes, float]], limit: Optional[int], after: Optional[Tuple[float, int]]
+) -> Tuple[List[Tuple[bytes, float]], Optional[Tuple[float, int]]]:
+    """Cut the (member, score) rows read past `after`, up to `limit + 1`, to a page and the position of the next."""
+    if not limit or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last_score = rows[-1][1]
+    skip = sum(1 for _, score in rows if score == last_score)
+    if after is not None and after[0] == last_score:
+        skip += after[1]
+    return rows, (last_score, skip)
+
+
+def query_body(
+    body: bytes,
+    min_score: Optional[float] = None,
+    descending: bool = True,
+    limit: Optional[int] = None,
+    after: Optional[Tuple[float, int]] = None,
+) -> Tuple[List[bytes], Optional[Tuple[float, int]]]:
+    """`CacheService.query_org` over the NDJSON body of an org, for when its index cannot be read."""
+    low, high, offset = score_range(min_score=min_score, descending=descending, after=after)
+    items = [(loads(line), line) for line in body.splitlines()]
+    ranked = sorted(
+        ((float(item["score"]), index_member(item), line) for item, line in items if low <= item["score"] <= high),
+        key=lambda row: row[:2],
+        reverse=descending,
+    )
+    rows, following = next_page(
+        [(line, score) for score, _, line in ranked[offset : offset + limit + 1 if limit else None]],
+        limit=limit,
+        after=after,
+    )
+    return [line for line, _ in rows], following
+
+
+def ranked_org(values: Iterable[Tuple[dict, bytes]]) -> bytes:
+    """NDJSON body of an org from its scored repositories and their serialization, by descending score."""
+    ranked = sorted(values, key=lambda value: (value[0]["score"], index_member(value[0])), reverse=True)
+    return b"".join(value + b"\n" for _, value in ranked)
+
+
+def decode_entries(raws: List[Optional[bytes]]) -> Optional[List[CacheEntry]]:
+    """The raw repository entries decoded; None when one of them is missing or cannot be decoded."""
+    entries = [CacheEntry.decode(raw) if raw is not None else None for raw in raws]
+    if any(entry is None for entry in entries):
+        return None
+    return entries
+
+
+def entry_values(raws: List[Optional[bytes]]) -> Optional[List[bytes]]:
+    entries = decode_entries(raws)
+    return None if entries is None else [entry.value for entry in entries]
+
+
+def assemble_org(values: List[bytes]) -> bytes:
+    with ENCODING_DURATION.labels(format="org").time():
+        return b"".join(value + b"\n" for value in values)
+
+
+def repository_org_key(key: str) -> Optional[str]:
+    """Org entry of the owner of the repository at `key`, None for the other keys."""
+    if not key.startswith(REPOSITORY_PREFIX):
         return None
+    return org_key(key[len(REPOSITORY_PREFIX) :].split("/", 1)[0])
+
+
+def index_member(value: dict) -> str:
+    return f"{value['owner']}/{value['name']}".lower()
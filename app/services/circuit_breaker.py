@@ -0,0 +1,87 @@
+import logging
+import time
+from typing import Dict
+
+from config import (
+    GITHUB_CIRCUIT_FAILURE_THRESHOLD,
+    GITHUB_CIRCUIT_RESET_TIMEOUT,
+    REDIS_CIRCUIT_FAILURE_THRESHOLD,
+    REDIS_CIRCUIT_RESET_TIMEOUT,
+)
+from metrics import CIRCUIT_BREAKER_STATE
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    """Refuse calls for `reset_timeout` seconds after `failure_threshold` failures in a row, then try one."""
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.changed_at = time.monotonic()
+        CIRCUIT_BREAKER_STATE.labels(dependency=name).set(STATE_VALUES[CLOSED])
+
+    @property
+    def retry_after(self) -> float:
+        """Seconds before the breaker lets a call through again, 0 when it does now."""
+        if self.state == CLOSED:
+            return 0.0
+        return max(0.0, self.changed_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        """Whether the next call may go to the dependency. Past the reset timeout, the call is the trial."""
+        if self.state == CLOSED:
+            return True
+        if self.retry_after > 0:
+            return False
+        self.transition(HALF_OPEN)
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        if self.state != CLOSED:
+            self.transition(CLOSED)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+            self.transition(OPEN)
+
+    def transition(self, state: str) -> None:
+        if state != self.state:
+            logger.warning(f"{self.name} circuit breaker {self.state} -> {state} after {self.failures} failures")
+        self.state = state
+        self.changed_at = time.monotonic()
+        CIRCUIT_BREAKER_STATE.labels(dependency=self.name).set(STATE_VALUES[state])
+
+    def snapshot(self) -> dict:
+        return {"state": self.state, "failures": self.failures, "retry_after": round(self.retry_after, 1)}
+
+
+BREAKERS = {
+    "github": (GITHUB_CIRCUIT_FAILURE_THRESHOLD, GITHUB_CIRCUIT_RESET_TIMEOUT),
+    "redis": (REDIS_CIRCUIT_FAILURE_THRESHOLD, REDIS_CIRCUIT_RESET_TIMEOUT),
+}
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    if name not in _breakers:
+        failure_threshold, reset_timeout = BREAKERS[name]
+        _breakers[name] = CircuitBreaker(name=name, failure_threshold=failure_threshold, reset_timeout=reset_timeout)
+    return _breakers[name]
+
+
+def circuit_breakers() -> Dict[str, CircuitBreaker]:
+    return {name: get_circuit_breaker(name) for name in BREAKERS}
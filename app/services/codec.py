@@ -0,0 +1,71 @@
+import json
+from typing import Any, Callable, Dict, Tuple
+
+from config import CACHE_COMPRESSION, CACHE_COMPRESSION_THRESHOLD, CACHE_SERIALIZER
+
+
+def zstd_codec() -> Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]:
+    import zstandard
+
+    return zstandard.ZstdCompressor(level=3).compress, zstandard.ZstdDecompressor().decompress
+
+
+def lz4_codec() -> Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]:
+    import lz4.frame
+
+    return lz4.frame.compress, lz4.frame.decompress
+
+
+COMPRESSIONS = {"zstd": zstd_codec, "lz4": lz4_codec}
+SERIALIZERS = ["json", "orjson"]
+
+
+def check_settings(serializer: str, compression: str) -> None:
+    if serializer not in SERIALIZERS:
+        raise ValueError(f"Unknown CACHE_SERIALIZER {serializer}, expected one of {SERIALIZERS}")
+    if compression != "none" and compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown CACHE_COMPRESSION {compression}, expected one of {['none', *sorted(COMPRESSIONS)]}")
+
+
+check_settings(serializer=CACHE_SERIALIZER, compression=CACHE_COMPRESSION)
+
+_codecs: Dict[str, Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {}
+
+
+def get_codec(name: str) -> Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]:
+    if name not in _codecs:
+        if name not in COMPRESSIONS:
+            raise ValueError(f"Unknown cache compression {name}, expected one of {sorted(COMPRESSIONS)}")
+        _codecs[name] = COMPRESSIONS[name]()
+    return _codecs[name]
+
+
+def compress(value: bytes) -> Tuple[str, bytes]:
+    """Compress `value` with CACHE_COMPRESSION when it is large enough; return the compression used and the result."""
+    if CACHE_COMPRESSION == "none" or len(value) < CACHE_COMPRESSION_THRESHOLD:
+        return "none", value
+    compress_value, _ = get_codec(CACHE_COMPRESSION)
+    return CACHE_COMPRESSION, compress_value(value)
+
+
+def decompress(name: str, value: bytes) -> bytes:
+    if name == "none":
+        return value
+    _, decompress_value = get_codec(name)
+    return decompress_value(value)
+
+
+if CACHE_SERIALIZER == "orjson":
+    import orjson
+
+    def dumps(value: Any) -> bytes:
+        return orjson.dumps(value)
+
+    loads = orjson.loads
+
+else:
+
+    def dumps(value: Any) -> bytes:
+        return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+    loads = json.loads
@@ -1,48 +1,208 @@
+import asyncio
 import logging
+import time
+from typing import AsyncIterator, List, Optional, Tuple, Union
 
-import requests
-from config import GITHUB_API_ACCESS_TOKEN, GITHUB_API_URL
+import httpx
+from config import (
+    GITHUB_API_URL,
+    GITHUB_CONNECT_TIMEOUT,
+    GITHUB_GRAPHQL_BATCH_SIZE,
+    GITHUB_GRAPHQL_ENABLED,
+    GITHUB_HTTP2,
+    GITHUB_HTTP_KEEPALIVE_EXPIRY,
+    GITHUB_HTTP_MAX_CONNECTIONS,
+    GITHUB_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    GITHUB_ORG_PAGE_CONCURRENCY,
+    GITHUB_ORG_PAGE_SIZE,
+    GITHUB_RATE_LIMIT_MAX_WAIT,
+    GITHUB_READ_TIMEOUT,
+    GITHUB_RETRY_ATTEMPTS,
+    GITHUB_RETRY_BACKOFF,
+)
 from exceptions import (
+    CircuitOpenException,
     GitHubServiceRequestException,
     RepositoryNameException,
     RequestForbiddenException,
     RequestMovedPermanently,
     RequestNotFoundException,
+    RequestNotModified,
+    RequestRateLimited,
 )
+from metrics import GITHUB_HTTP_REQUESTS, GITHUB_REQUEST_DURATION, GITHUB_REQUESTS_IN_FLIGHT
 from schemas.github import GitHupApiOrgResponse, GitHupApiResponse
+from services.circuit_breaker import get_circuit_breaker
+from services.rate_limit import backoff, get_rate_limiter, rate_limit_kind, retry_after
+from services.token_pool import TokenPool, get_token_pool
 from starlette import status
 
 logger = logging.getLogger(__name__)
 
+GRAPHQL_ORG_QUERY = """
+query($org: String!, $first: Int!, $cursor: String) {
+  organization(login: $org) {
+    login
+    repositories(first: $first, after: $cursor) {
+      pageInfo { hasNextPage endCursor }
+      nodes { name stargazerCount forkCount }
+    }
+  }
+}
+"""
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=GITHUB_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=GITHUB_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=GITHUB_HTTP_KEEPALIVE_EXPIRY,
+            ),
+            http2=GITHUB_HTTP2,
+            timeout=httpx.Timeout(GITHUB_READ_TIMEOUT, connect=GITHUB_CONNECT_TIMEOUT),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
 
 class GitHubService:
-    def __init__(self, *, url=None, access_token=None):
+    def __init__(
+        self,
+        *,
+        url=None,
+        access_token=None,
+        token_pool=None,
+        client=None,
+        page_concurrency=None,
+        rate_limiter=None,
+        retries=None,
+        graphql=None,
+        circuit_breaker=None,
+    ):
         self.url = url or GITHUB_API_URL
-        self.access_token = access_token or GITHUB_API_ACCESS_TOKEN
+        self.token_pool = token_pool or (TokenPool(tokens=[access_token]) if access_token else get_token_pool())
+        self.client = client or get_client()
+        self.page_concurrency = page_concurrency or GITHUB_ORG_PAGE_CONCURRENCY
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.retries = retries if retries is not None else GITHUB_RETRY_ATTEMPTS
+        self.graphql = graphql if graphql is not None else GITHUB_GRAPHQL_ENABLED
+        self.circuit_breaker = circuit_breaker or get_circuit_breaker("github")
 
-    def get_info(self, repository_name: str) -> GitHupApiResponse:
-        try:
-            owner, repository = repository_name.split("/")
-        except ValueError as ex:
-            logger.error(f"Error: repository_name {repository_name}" f" could not be parsed. ex: {ex}")
-            raise RepositoryNameException
+    async def request(
+        self, url: str, params: Optional[dict] = None, headers: Optional[dict] = None, json: Optional[dict] = None
+    ) -> httpx.Response:
+        """Call the GitHub API through the rate limiter, the token pool and the circuit breaker, with retries."""
+        for attempt in range(self.retries + 1):
+            if not self.circuit_breaker.allow():
+                raise CircuitOpenException(dependency="github", retry_after=self.circuit_breaker.retry_after)
+            await self.rate_limiter.acquire()
+            token = self.token_pool.pick()
+            response = await self.send(url=url, params=params, headers=headers, json=json, token=token.token)
+            await self.rate_limiter.observe(response)
+            self.token_pool.observe(state=token, response=response)
+
+            if attempt == self.retries:
+                return response
+            limit = rate_limit_kind(response)
+            if limit == "primary" or response.status_code == status.HTTP_401_UNAUTHORIZED:
+                if not self.token_pool.available():
+                    return response
+                continue
+            if limit != "secondary":
+                return response
+            delay = backoff(attempt=attempt, base=GITHUB_RETRY_BACKOFF, minimum=retry_after(response))
+            if delay > GITHUB_RATE_LIMIT_MAX_WAIT:
+                return response
+            logger.warning(f"GitHub secondary rate limit hit, retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    async def send(
+        self,
+        url: str,
+        params: Optional[dict] = None,
+        headers: Optional[dict] = None,
+        json: Optional[dict] = None,
+        token: str = "",
+    ) -> httpx.Response:
+        new_connection = False
+
+        async def trace(event_name: str, info: dict) -> None:
+            nonlocal new_connection
+            if event_name == "connection.connect_tcp.started":
+                new_connection = True
+
+        started = time.perf_counter()
         try:
-            response = requests.get(
-                url=f"{self.url}/repos/{owner}/{repository}", headers={"Authorization": f"token {self.access_token}"}
-            )
+            with GITHUB_REQUESTS_IN_FLIGHT.track_inprogress():
+                response = await self.client.request(
+                    method="GET" if json is None else "POST",
+                    url=url,
+                    params=params,
+                    json=json,
+                    headers={**({"Authorization": f"token {token}"} if token else {}), **(headers or {})},
+                    extensions={"trace": trace},
+                )
         except Exception as ex:
+            GITHUB_REQUEST_DURATION.labels(endpoint=endpoint_name(url), status="error").observe(
+                time.perf_counter() - started
+            )
+            self.circuit_breaker.record_failure()
             logger.error(f"An unexpected error occurred." f" ex: {ex}")
             raise GitHubServiceRequestException
 
+        GITHUB_REQUEST_DURATION.labels(endpoint=endpoint_name(url), status=str(response.status_code)).observe(
+            time.perf_counter() - started
+        )
+        # only GitHub being down counts against it, not what it answers about a repository or a token
+        if response.status_code >= status.HTTP_500_INTERNAL_SERVER_ERROR:
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.record_success()
+        GITHUB_HTTP_REQUESTS.labels(connection="new" if new_connection else "reused").inc()
+        return response
+
+    async def get_info(
+        self, repository_name: str, etag: Optional[str] = None, last_modified: Optional[str] = None
+    ) -> GitHupApiResponse:
+        """Fetch the repository stars and forks; RequestNotModified when the validators still match."""
+        owner, repository = split_repository_name(repository_name)
+
+        response = await self.request(
+            url=f"{self.url}/repos/{owner}/{repository}",
+            headers=conditional_headers(etag=etag, last_modified=last_modified),
+        )
+
         self.check_response_status(kind="Repository", name=repository_name, response=response)
 
         data = response.json()
 
         return GitHupApiResponse(
-            stars=data["stargazers_count"], forks=data["forks_count"], owner=owner, name=repository
+            stars=data["stargazers_count"],
+            forks=data["forks_count"],
+            owner=owner,
+            name=repository,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
         )
 
     def check_response_status(self, kind: str, name: str, response):
+        if response.status_code == status.HTTP_304_NOT_MODIFIED:
+            logger.info(f"{kind}: {name} not modified")
+            raise RequestNotModified
+        if rate_limit_kind(response) is not None:
+            logger.error(f"Error: GitHub rate limit exceeded when requesting {kind}: {name}")
+            raise RequestRateLimited(retry_after=retry_after(response))
         if response.status_code == status.HTTP_404_NOT_FOUND:
             logger.info(f"{kind}: {name} not found")
             raise RequestNotFoundException
@@ -56,26 +216,220 @@ class GitHubService:
             logger.error(f"An unexpected error occurred." f" status: {response.status_code}")
             raise GitHubServiceRequestException
 
-    def get_org_info(self, org_name: str):
-        try:
-            response = requests.get(
-                url=f"{self.url}/orgs/{org_name}/repos", headers={"Authorization": f"token {self.access_token}"}
+    async def get_many_info(
+        self, repository_names: List[str], concurrency: int
+    ) -> List[Union[GitHupApiResponse, Exception]]:
+        """Fetch several repositories; each item is the repository or the exception fetching it raised."""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(fn, **kwargs):
+            async with semaphore:
+                return await fn(**kwargs)
+
+        if not self.graphql:
+            return await asyncio.gather(
+                *(fetch(self.get_info, repository_name=name) for name in repository_names), return_exceptions=True
             )
 
-        except Exception as ex:
-            logger.error(f"An unexpected error occurred." f" ex: {ex}")
-            raise GitHubServiceRequestException
+        results = {}
+        names = []
+        for repository_name in repository_names:
+            try:
+                split_repository_name(repository_name)
+                names.append(repository_name)
+            except RepositoryNameException as ex:
+                results[repository_name] = ex
+
+        chunks = [
+            names[start : start + GITHUB_GRAPHQL_BATCH_SIZE]
+            for start in range(0, len(names), GITHUB_GRAPHQL_BATCH_SIZE)
+        ]
+        for chunk, chunk_results in zip(
+            chunks,
+            await asyncio.gather(
+                *(fetch(self.graphql_repositories, repository_names=chunk) for chunk in chunks), return_exceptions=True
+            ),
+        ):
+            if isinstance(chunk_results, Exception):
+                chunk_results = [chunk_results] * len(chunk)
+            results.update(zip(chunk, chunk_results))
+
+        return [results[repository_name] for repository_name in repository_names]
 
+    async def graphql_repositories(self, repository_names: List[str]) -> List[Union[GitHupApiResponse, Exception]]:
+        repositories = [split_repository_name(repository_name) for repository_name in repository_names]
+        variables, arguments, fields = {}, [], []
+        for index, (owner, repository) in enumerate(repositories):
+            variables.update({f"o{index}": owner, f"n{index}": repository})
+            arguments.append(f"$o{index}: String!, $n{index}: String!")
+            fields.append(f"r{index}: repository(owner: $o{index}, name: $n{index}) {{ stargazerCount forkCount }}")
+        query = f"query({', '.join(arguments)}) {{ {' '.join(fields)} }}"
+
+        body = await self.graphql_query(
+            kind="Repositories", name=",".join(repository_names), query=query, variables=variables
+        )
+        data = body.get("data") or {}
+        errors = {error["path"][0]: error for error in body.get("errors") or [] if error.get("path")}
+
+        results = []
+        for index, (owner, repository) in enumerate(repositories):
+            node = data.get(f"r{index}")
+            if node is not None:
+                results.append(
+                    GitHupApiResponse(
+                        stars=node["stargazerCount"], forks=node["forkCount"], owner=owner, name=repository
+                    )
+                )
+            elif errors.get(f"r{index}", {}).get("type") == "NOT_FOUND":
+                logger.info(f"Repository: {owner}/{repository} not found")
+                results.append(RequestNotFoundException())
+            else:
+                logger.error(f"An unexpected error occurred. errors: {errors.get(f'r{index}')}")
+                results.append(GitHubServiceRequestException())
+        return results
+
+    async def graphql_query(self, kind: str, name: str, query: str, variables: dict) -> dict:
+        response = await self.request(url=f"{self.url}/graphql", json={"query": query, "variables": variables})
+        self.check_response_status(kind=kind, name=name, response=response)
+        body = response.json()
+        if any(error.get("type") == "RATE_LIMITED" for error in body.get("errors") or []):
+            logger.error(f"Error: GitHub GraphQL rate limit exceeded when requesting {kind}: {name}")
+            raise RequestRateLimited(retry_after=retry_after(response))
+        return body
+
+    async def iter_org_pages(self, org_name: str) -> AsyncIterator[GitHupApiOrgResponse]:
+        """Yield the org pages as they are fetched, the ones after the first concurrently with the REST backend."""
+        if self.graphql:
+            async for page in self.iter_org_pages_graphql(org_name=org_name):
+                yield page
+            return
+
+        url = f"{self.url}/orgs/{org_name}/repos"
+
+        response = await self.request(url=url, params={"per_page": GITHUB_ORG_PAGE_SIZE, "page": 1})
         self.check_response_status(kind="Org", name=org_name, response=response)
+        yield self.parse_org_page(org_name=org_name, page=1, response=response)
+
+        semaphore = asyncio.Semaphore(self.page_concurrency)
+
+        async def fetch_page(page: int) -> GitHupApiOrgResponse:
+            async with semaphore:
+                page_response = await self.request(url=url, params={"per_page": GITHUB_ORG_PAGE_SIZE, "page": page})
+            self.check_response_status(kind="Org", name=org_name, response=page_response)
+            return self.parse_org_page(org_name=org_name, page=page, response=page_response)
+
+        tasks = [asyncio.ensure_future(fetch_page(page)) for page in range(2, self.get_last_page(response) + 1)]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def iter_org_pages_graphql(self, org_name: str) -> AsyncIterator[GitHupApiOrgResponse]:
+        cursor = None
+        page = 1
+        while True:
+            body = await self.graphql_query(
+                kind="Org",
+                name=org_name,
+                query=GRAPHQL_ORG_QUERY,
+                variables={"org": org_name, "first": GITHUB_ORG_PAGE_SIZE, "cursor": cursor},
+            )
+            organization = (body.get("data") or {}).get("organization")
+            if organization is None:
+                if any(error.get("type") == "NOT_FOUND" for error in body.get("errors") or []):
+                    logger.info(f"Org: {org_name} not found")
+                    raise RequestNotFoundException
+                logger.error(f"An unexpected error occurred. errors: {body.get('errors')}")
+                raise GitHubServiceRequestException
 
-        all_data = response.json()
-        org_items = []
+            repositories = organization["repositories"]
+            yield GitHupApiOrgResponse(
+                items=[
+                    GitHupApiResponse(
+                        stars=node["stargazerCount"],
+                        forks=node["forkCount"],
+                        owner=organization["login"],
+                        name=node["name"],
+                    )
+                    for node in repositories["nodes"]
+                ],
+                page=page,
+            )
+            if not repositories["pageInfo"]["hasNextPage"]:
+                return
+            cursor = repositories["pageInfo"]["endCursor"]
+            page += 1
+
+    def get_last_page(self, response: httpx.Response) -> int:
+        last_url = response.links.get("last", {}).get("url")
+        if not last_url:
+            return 1
+        return int(httpx.URL(last_url).params.get("page", 1))
+
+    async def org_not_modified(self, org_name: str, etags: List[str]) -> bool:
+        url = f"{self.url}/orgs/{org_name}/repos"
+        semaphore = asyncio.Semaphore(self.page_concurrency)
+
+        async def page_not_modified(page: int, etag: str) -> bool:
+            async with semaphore:
+                response = await self.request(
+                    url=url, params={"per_page": GITHUB_ORG_PAGE_SIZE, "page": page}, headers={"If-None-Match": etag}
+                )
+            return response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        tasks = [asyncio.ensure_future(page_not_modified(page, etag)) for page, etag in enumerate(etags, start=1)]
+        try:
+            for task in asyncio.as_completed(tasks):
+                if not await task:
+                    return False
+            return True
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
 
-        for data in all_data:
-            org_items.append(
+    def parse_org_page(self, org_name: str, page: int, response: httpx.Response) -> GitHupApiOrgResponse:
+        return GitHupApiOrgResponse(
+            items=[
                 GitHupApiResponse(
-                    stars=data["stargazers_count"], forks=data["forks_count"], owner=org_name, name=data["name"]
+                    stars=data["stargazers_count"],
+                    forks=data["forks_count"],
+                    owner=data["owner"]["login"],
+                    name=data["name"],
                 )
-            )
+                for data in response.json()
+            ],
+            page=page,
+            etag=response.headers.get("ETag"),
+        )
+
+
+def endpoint_name(url: str) -> str:
+    """Label of the GitHub API endpoint of `url`, without the names it holds so the metric keeps few series."""
+    if url.endswith("/graphql"):
+        return "graphql"
+    if "/orgs/" in url:
+        return "org_repos"
+    if "/repos/" in url:
+        return "repository"
+    return "other"
+
+
+def conditional_headers(etag: Optional[str], last_modified: Optional[str]) -> dict:
+    if etag:
+        return {"If-None-Match": etag}
+    if last_modified:
+        return {"If-Modified-Since": last_modified}
+    return {}
+
 
-        return GitHupApiOrgResponse(items=org_items)
+def split_repository_name(repository_name: str) -> Tuple[str, str]:
+    try:
+        owner, repository = repository_name.split("/")
+    except ValueError as ex:
+        logger.error(f"Error: repository_name {repository_name}" f" could not be parsed. ex: {ex}")
+        raise RepositoryNameException
+    return owner, repository
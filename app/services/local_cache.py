@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from config import (
+    CACHE_INVALIDATION_CHANNEL,
+    LOCAL_CACHE_ENABLED,
+    LOCAL_CACHE_MAX_BYTES,
+    LOCAL_CACHE_MAX_ENTRIES,
+    LOCAL_CACHE_TTL,
+)
+from metrics import LOCAL_CACHE_LOOKUPS
+from services.redis_client import create_redis
+
+logger = logging.getLogger(__name__)
+
+WORKER_ID = uuid.uuid4().hex
+
+
+class LocalCache:
+    """In-process LRU cache of decoded entries with a per-entry TTL, in front of redis."""
+
+    def __init__(self, *, ttl=None, max_entries=None, max_bytes=None):
+        self.ttl = ttl or LOCAL_CACHE_TTL
+        self.max_entries = max_entries or LOCAL_CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes or LOCAL_CACHE_MAX_BYTES
+        self.entries: "OrderedDict[str, Tuple[float, object, int]]" = OrderedDict()
+        self.size = 0
+
+    def get(self, key: str):
+        item = self.entries.get(key)
+        if item is None:
+            LOCAL_CACHE_LOOKUPS.labels(result="miss").inc()
+            return None
+
+        expires_at, value, _ = item
+        if expires_at <= time.monotonic():
+            self.invalidate(key)
+            LOCAL_CACHE_LOOKUPS.labels(result="miss").inc()
+            return None
+
+        self.entries.move_to_end(key)
+        LOCAL_CACHE_LOOKUPS.labels(result="hit").inc()
+        return value
+
+    def set(self, key: str, value, size: int) -> None:
+        self.invalidate(key)
+        if size > self.max_bytes:
+            return
+
+        self.entries[key] = (time.monotonic() + self.ttl, value, size)
+        self.size += size
+        while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+            _, (_, _, evicted_size) = self.entries.popitem(last=False)
+            self.size -= evicted_size
+
+    def invalidate(self, key: str) -> None:
+        item = self.entries.pop(key, None)
+        if item is not None:
+            self.size -= item[2]
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.size = 0
+
+    def handle_invalidation(self, message: bytes) -> None:
+        worker_id, _, key = message.decode("utf-8").partition(":")
+        if worker_id != WORKER_ID:
+            self.invalidate(key)
+
+
+def invalidation_message(key: str) -> str:
+    return f"{WORKER_ID}:{key}"
+
+
+_local_cache: Optional[LocalCache] = None
+_listener: Optional[asyncio.Task] = None
+
+
+def get_local_cache() -> Optional[LocalCache]:
+    """Return the process wide local cache, or None when LOCAL_CACHE_ENABLED is not set."""
+    global _local_cache
+    if LOCAL_CACHE_ENABLED and _local_cache is None:
+        _local_cache = LocalCache()
+    return _local_cache
+
+
+async def listen_for_invalidations(local_cache: LocalCache, connection) -> None:
+    """Evict the keys other workers write from `local_cache` until cancelled."""
+    try:
+        while True:
+            try:
+                async with connection.pubsub() as pubsub:
+                    await pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+                    local_cache.clear()
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            local_cache.handle_invalidation(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:
+                logger.error(f"Cache invalidation subscription failed, ex: {ex}")
+                local_cache.clear()
+                await asyncio.sleep(1)
+    finally:
+        await connection.aclose()
+
+
+def start_invalidation_listener() -> None:
+    global _listener
+    local_cache = get_local_cache()
+    if local_cache is None or _listener is not None:
+        return
+    # a connection of its own, without read timeout, as the subscription stays idle between invalidations
+    connection = create_redis(socket_timeout=None)
+    _listener = asyncio.ensure_future(listen_for_invalidations(local_cache=local_cache, connection=connection))
+
+
+async def stop_invalidation_listener() -> None:
+    global _listener
+    if _listener is None:
+        return
+    _listener.cancel()
+    await asyncio.gather(_listener, return_exceptions=True)
+    _listener = None
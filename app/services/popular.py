@@ -1,13 +1,36 @@
 import logging
+from array import array
+from dataclasses import dataclass
+from itertools import repeat
+from operator import add, mul
+from typing import Iterator, List, Sequence, Tuple
 
 from config import FORK_MULTIPLIER, POPULAR_THRESHOLD, STAR_MULTIPLIER
 from exceptions import CalculateScoreException
+from metrics import SCORING_DURATION
 from schemas.github import GitHupApiResponse
 from schemas.popular import PopularResponseModel
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class ScoredRepositories:
+    """Scores of many repositories, kept as columns until they are serialized."""
+
+    owners: List[str]
+    names: List[str]
+    scores: Sequence[int]
+    popular: List[bool]
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def dicts(self) -> Iterator[dict]:
+        for score, owner, name, is_popular in zip(self.scores, self.owners, self.names, self.popular):
+            yield {"score": score, "owner": owner, "name": name, "is_popular": is_popular}
+
+
 class PopularService:
     def __init__(self):
         self.star_multiplier = STAR_MULTIPLIER
@@ -16,12 +39,44 @@ class PopularService:
 
     def calculate_score(self, repository_data: GitHupApiResponse) -> PopularResponseModel:
         try:
-            score = repository_data.stars * self.star_multiplier + repository_data.forks * self.fork_multiplier
-            is_popular = score >= self.popular_threshold
+            with SCORING_DURATION.labels(mode="single").time():
+                score = repository_data.stars * self.star_multiplier + repository_data.forks * self.fork_multiplier
+                is_popular = score >= self.popular_threshold
 
-            return PopularResponseModel(
-                owner=repository_data.owner, score=score, name=repository_data.name, is_popular=is_popular
-            )
+                return PopularResponseModel(
+                    owner=repository_data.owner, score=score, name=repository_data.name, is_popular=is_popular
+                )
         except Exception as ex:
             logger.error(f"Error calculating score ex: {ex}")
             raise CalculateScoreException(ex)
+
+    def calculate_scores(self, stars: Sequence[int], forks: Sequence[int]) -> Tuple[array, List[bool]]:
+        """Score repositories from columns of star and fork counts; return the scores and the popularity flags."""
+        try:
+            if len(stars) != len(forks):
+                raise ValueError(f"{len(stars)} star counts for {len(forks)} fork counts")
+            with SCORING_DURATION.labels(mode="bulk").time():
+                scores = array(
+                    "q",
+                    map(
+                        add,
+                        map(mul, stars, repeat(self.star_multiplier)),
+                        map(mul, forks, repeat(self.fork_multiplier)),
+                    ),
+                )
+                return scores, list(map(self.popular_threshold.__le__, scores))
+        except Exception as ex:
+            logger.error(f"Error calculating scores ex: {ex}")
+            raise CalculateScoreException(ex)
+
+    def score_repositories(self, repositories: List[GitHupApiResponse]) -> ScoredRepositories:
+        scores, popular = self.calculate_scores(
+            stars=[repository.stars for repository in repositories],
+            forks=[repository.forks for repository in repositories],
+        )
+        return ScoredRepositories(
+            owners=[repository.owner for repository in repositories],
+            names=[repository.name for repository in repositories],
+            scores=scores,
+            popular=popular,
+        )
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import httpx
+from config import (
+    GITHUB_RATE_LIMIT_BURST,
+    GITHUB_RATE_LIMIT_ENABLED,
+    GITHUB_RATE_LIMIT_MAX_WAIT,
+    GITHUB_RATE_LIMIT_RATE,
+)
+from exceptions import RequestRateLimited
+from metrics import GITHUB_RATE_LIMITED, GITHUB_THROTTLE_WAIT
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import RedisError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+from services.circuit_breaker import get_circuit_breaker
+from services.redis_client import get_redis
+from starlette import status
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# both keys share a hash tag so the script can use them together on a redis cluster
+BUCKET_KEY = "{github:rate_limit}:bucket"
+BLOCKED_KEY = "{github:rate_limit}:blocked"
+
+# Takes a token from the bucket, refilled at ARGV[1] tokens per second up to ARGV[2], and returns how long the
+# caller must wait before sending its request. The token is only reserved when that wait is at most ARGV[4].
+# While BLOCKED_KEY lives (GitHub asked us to back off) its remaining time is returned and nothing is reserved.
+ACQUIRE_SCRIPT = """
+local blocked = redis.call("PTTL", KEYS[2])
+if blocked > 0 then
+    return tostring(blocked / 1000)
+end
+local rate, burst, now, max_wait = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "updated_at")
+local tokens = tonumber(bucket[1]) or burst
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated_at) * rate)
+local wait = math.max(0, 1 - tokens) / rate
+if wait <= max_wait then
+    tokens = tokens - 1
+end
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "updated_at", tostring(now))
+redis.call("EXPIRE", KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RateLimiter:
+    """Keep the GitHub calls of the whole fleet inside the rate limit, with a token bucket shared in redis."""
+
+    def __init__(self, *, connection=None, rate=None, burst=None, max_wait=None, circuit_breaker=None):
+        self.connection = connection
+        self.circuit_breaker = circuit_breaker or get_circuit_breaker("redis")
+        self.rate = rate or GITHUB_RATE_LIMIT_RATE
+        self.burst = burst or GITHUB_RATE_LIMIT_BURST
+        self.max_wait = max_wait if max_wait is not None else GITHUB_RATE_LIMIT_MAX_WAIT
+        self.blocked_until = 0.0
+        self.acquire_script = connection.register_script(ACQUIRE_SCRIPT) if connection is not None else None
+
+    @property
+    def blocked(self) -> bool:
+        return time.time() < self.blocked_until
+
+    async def acquire(self) -> None:
+        """Wait for the turn of the next request, or raise RequestRateLimited when it is more than `max_wait` away."""
+        wait = max(0.0, self.blocked_until - time.time())
+        if not wait and self.acquire_script is not None:
+            shared_wait = await self.call_redis(
+                lambda: self.acquire_script(
+                    keys=[BUCKET_KEY, BLOCKED_KEY], args=[self.rate, self.burst, time.time(), self.max_wait]
+                ),
+                error="Could not take a GitHub rate limit token, sending the request anyway",
+            )
+            wait = float(shared_wait) if shared_wait is not None else 0.0
+
+        if wait > self.max_wait:
+            raise RequestRateLimited(retry_after=wait)
+        if wait:
+            GITHUB_THROTTLE_WAIT.inc(wait)
+            await asyncio.sleep(wait)
+
+    async def observe(self, response: httpx.Response) -> None:
+        """Back off when GitHub's secondary rate limit refused `response`."""
+        limit = rate_limit_kind(response)
+        if limit is not None:
+            GITHUB_RATE_LIMITED.labels(limit=limit).inc()
+        if limit == "secondary":
+            await self.block(seconds=retry_after(response))
+
+    async def block(self, seconds: float) -> None:
+        if seconds <= 0:
+            return
+        self.blocked_until = max(self.blocked_until, time.time() + seconds)
+        if self.connection is not None:
+            await self.call_redis(
+                lambda: self.connection.set(BLOCKED_KEY, 1, px=int(seconds * 1000)),
+                error="Could not share the GitHub rate limit back off",
+            )
+
+    async def call_redis(self, call: Callable[[], Awaitable[T]], error: str) -> Optional[T]:
+        """Run `call` through the redis circuit breaker; None, after logging `error`, when redis did not answer."""
+        if not self.circuit_breaker.allow():
+            return None
+        try:
+            result = await call()
+        except (RedisConnectionError, RedisTimeoutError) as ex:
+            self.circuit_breaker.record_failure()
+            logger.error(f"{error}. ex: {ex!r}")
+            return None
+        except RedisError as ex:
+            logger.error(f"{error}. ex: {ex!r}")
+            return None
+        self.circuit_breaker.record_success()
+        return result
+
+
+def rate_limit_kind(response: httpx.Response) -> Optional[str]:
+    """Which rate limit of GitHub, if any, refused `response`."""
+    if response.status_code not in (status.HTTP_403_FORBIDDEN, status.HTTP_429_TOO_MANY_REQUESTS):
+        return None
+    if response.headers.get("X-RateLimit-Remaining") == "0":
+        return "primary"
+    if "Retry-After" in response.headers or "secondary rate limit" in response.text.lower():
+        return "secondary"
+    if response.status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+        return "secondary"
+    return None
+
+
+def retry_after(response: httpx.Response) -> float:
+    """Seconds GitHub wants us to wait before the next request, 0 when it did not say."""
+    if "Retry-After" in response.headers:
+        try:
+            return max(0.0, float(response.headers["Retry-After"]))
+        except ValueError:
+            return 0.0
+    if response.headers.get("X-RateLimit-Remaining") == "0":
+        return max(0.0, float(response.headers.get("X-RateLimit-Reset", 0)) - time.time())
+    return 0.0
+
+
+def backoff(attempt: int, base: float, minimum: float = 0) -> float:
+    """Exponential back off with full jitter, never shorter than `minimum`."""
+    return max(minimum, random.uniform(0, base * 2**attempt))
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    global _rate_limiter
+    if _rate_limiter is None:
+        connection = None
+        if GITHUB_RATE_LIMIT_ENABLED:
+            connection = get_redis()
+        _rate_limiter = RateLimiter(connection=connection)
+    return _rate_limiter
@@ -0,0 +1,73 @@
+from typing import Optional, Tuple
+
+from config import (
+    REDIS_CONNECT_TIMEOUT,
+    REDIS_DB,
+    REDIS_HEALTH_CHECK_INTERVAL,
+    REDIS_HOST,
+    REDIS_MAX_CONNECTIONS,
+    REDIS_MODE,
+    REDIS_POOL_TIMEOUT,
+    REDIS_PORT,
+    REDIS_SENTINEL_MASTER,
+    REDIS_SENTINELS,
+    REDIS_SOCKET_TIMEOUT,
+)
+from redis import asyncio as aioredis
+from redis.asyncio.cluster import RedisCluster
+from redis.asyncio.sentinel import Sentinel
+
+MODES = ("standalone", "sentinel", "cluster")
+
+
+def create_redis(socket_timeout: Optional[float] = REDIS_SOCKET_TIMEOUT):
+    """A client with its own pool of at most REDIS_MAX_CONNECTIONS connections."""
+    options = {
+        "socket_timeout": socket_timeout,
+        "socket_connect_timeout": REDIS_CONNECT_TIMEOUT,
+        "health_check_interval": REDIS_HEALTH_CHECK_INTERVAL,
+    }
+    if REDIS_MODE == "cluster":
+        return RedisCluster(host=REDIS_HOST, port=REDIS_PORT, max_connections=REDIS_MAX_CONNECTIONS, **options)
+    if REDIS_MODE == "sentinel":
+        sentinel = Sentinel([sentinel_address(address) for address in REDIS_SENTINELS], **options)
+        return sentinel.master_for(
+            REDIS_SENTINEL_MASTER, db=REDIS_DB, max_connections=REDIS_MAX_CONNECTIONS, **options
+        )
+    if REDIS_MODE != "standalone":
+        raise ValueError(f"Unknown REDIS_MODE {REDIS_MODE}, expected one of {MODES}")
+    pool = aioredis.BlockingConnectionPool(
+        host=REDIS_HOST,
+        port=REDIS_PORT,
+        db=REDIS_DB,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        timeout=REDIS_POOL_TIMEOUT,
+        **options,
+    )
+    return aioredis.Redis(connection_pool=pool)
+
+
+def sentinel_address(address: str) -> Tuple[str, int]:
+    host, _, port = address.rpartition(":")
+    return host, int(port)
+
+
+def is_cluster(connection) -> bool:
+    return isinstance(connection, RedisCluster)
+
+
+_redis = None
+
+
+def get_redis():
+    global _redis
+    if _redis is None:
+        _redis = create_redis()
+    return _redis
+
+
+async def close_redis() -> None:
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
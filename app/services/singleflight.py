@@ -0,0 +1,24 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into a single execution."""
+
+    def __init__(self):
+        self.calls: Dict[str, asyncio.Future] = {}
+
+    def start(self, key: str, fn: Callable[[], Awaitable[T]]) -> "asyncio.Future[T]":
+        """Return the call in flight for `key`, starting `fn` when there is none."""
+        call = self.calls.get(key)
+        if call is None:
+            call = asyncio.ensure_future(fn())
+            self.calls[key] = call
+            call.add_done_callback(lambda _: self.calls.pop(key, None))
+        return call
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        # shield so a caller that goes away does not cancel the call the others are waiting on
+        return await asyncio.shield(self.start(key=key, fn=fn))
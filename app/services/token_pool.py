@@ -0,0 +1,96 @@
+import hashlib
+import logging
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+import httpx
+from config import GITHUB_API_ACCESS_TOKENS, GITHUB_RATE_LIMIT_RESERVE, GITHUB_TOKEN_INVALID_COOLDOWN
+from exceptions import RequestRateLimited
+from metrics import GITHUB_RATE_LIMIT_REMAINING, GITHUB_RATE_LIMIT_RESET, GITHUB_TOKEN_REQUESTS
+from services.rate_limit import rate_limit_kind, retry_after
+from starlette import status
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TokenState:
+    """What the last GitHub responses told about one access token."""
+
+    token: str
+    label: str
+    remaining: Optional[int] = None
+    reset_at: float = 0.0
+    disabled_until: float = 0.0
+
+    def available(self, now: float) -> bool:
+        return now >= self.disabled_until
+
+    def budget(self, now: float) -> float:
+        if self.remaining is None or now >= self.reset_at:
+            return float("inf")
+        return self.remaining
+
+
+class TokenPool:
+    """Spread the GitHub calls over several access tokens, each call going to the one with the most budget left."""
+
+    def __init__(self, *, tokens=None, invalid_cooldown=None, reserve=None):
+        # without any token the requests go unauthenticated, with GitHub's much lower anonymous quota
+        tokens = tokens or GITHUB_API_ACCESS_TOKENS or [""]
+        self.tokens = [TokenState(token=token, label=token_label(token)) for token in tokens]
+        self.invalid_cooldown = invalid_cooldown or GITHUB_TOKEN_INVALID_COOLDOWN
+        self.reserve = reserve if reserve is not None else GITHUB_RATE_LIMIT_RESERVE
+
+    def available(self) -> List[TokenState]:
+        now = time.time()
+        return [state for state in self.tokens if state.available(now)]
+
+    def pick(self) -> TokenState:
+        now = time.time()
+        available = [state for state in self.tokens if state.available(now)]
+        if not available:
+            raise RequestRateLimited(retry_after=min(state.disabled_until for state in self.tokens) - now)
+
+        state = max(available, key=lambda state: state.budget(now))
+        if state.remaining is not None:
+            # count the request right away, so concurrent requests do not all pick the same token
+            state.remaining -= 1
+        GITHUB_TOKEN_REQUESTS.labels(token=state.label).inc()
+        return state
+
+    def observe(self, state: TokenState, response: httpx.Response) -> None:
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        if remaining is not None:
+            state.remaining = int(remaining)
+            state.reset_at = float(response.headers.get("X-RateLimit-Reset", 0))
+            GITHUB_RATE_LIMIT_REMAINING.labels(token=state.label).set(state.remaining)
+            GITHUB_RATE_LIMIT_RESET.labels(token=state.label).set(state.reset_at)
+
+        if response.status_code == status.HTTP_401_UNAUTHORIZED:
+            logger.error(f"GitHub rejected access token {state.label}, out of rotation for {self.invalid_cooldown}s")
+            state.disabled_until = time.time() + self.invalid_cooldown
+        elif state.remaining == 0 or rate_limit_kind(response) == "primary":
+            state.disabled_until = max(state.disabled_until, time.time() + retry_after(response))
+
+    @property
+    def budget_low(self) -> bool:
+        """Whether GitHub calls should be saved for cache misses, the usable tokens having few requests left."""
+        now = time.time()
+        return sum(state.budget(now) for state in self.tokens if state.available(now)) <= self.reserve
+
+
+def token_label(token: str) -> str:
+    """Identify a token in logs and metrics without exposing it."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()[:8]
+
+
+_token_pool: Optional[TokenPool] = None
+
+
+def get_token_pool() -> TokenPool:
+    global _token_pool
+    if _token_pool is None:
+        _token_pool = TokenPool()
+    return _token_pool
@@ -0,0 +1,82 @@
+import hashlib
+import hmac
+from dataclasses import dataclass
+from typing import List, Optional
+
+from exceptions import WebhookPayloadException
+from schemas.github import GitHupApiResponse
+from services.cache import org_key, repository_key
+
+WEBHOOK_EVENTS = {"star", "watch", "fork", "repository"}
+
+
+def verify_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """Whether `signature`, the `X-Hub-Signature-256` header, is the HMAC of `body` with `secret`."""
+    if not signature or not signature.startswith("sha256="):
+        return False
+    expected = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature[len("sha256=") :])
+
+
+@dataclass
+class WebhookEvent:
+    """A delivery of one of WEBHOOK_EVENTS: the repository as it is now and, when it moved, its former name."""
+
+    event: str
+    action: Optional[str]
+    repository: GitHupApiResponse
+    previous_name: Optional[str] = None
+
+    @property
+    def deleted(self) -> bool:
+        return self.event == "repository" and self.action == "deleted"
+
+    def stale_keys(self) -> List[str]:
+        """Keys the delivery makes wrong: the former name of a moved repository and the orgs it left or joined."""
+        if self.event != "repository":
+            return []
+        if self.action == "deleted":
+            return [repository_key(self.repository_name), org_key(self.repository.owner)]
+        if self.action == "created":
+            return [org_key(self.repository.owner)]
+        if self.previous_name:
+            previous_owner = self.previous_name.partition("/")[0]
+            keys = [repository_key(self.previous_name), org_key(previous_owner), org_key(self.repository.owner)]
+            return list(dict.fromkeys(keys))
+        return []
+
+    @property
+    def repository_name(self) -> str:
+        return f"{self.repository.owner}/{self.repository.name}"
+
+
+def parse_event(event: str, payload: dict) -> WebhookEvent:
+    """Read the repository of a `event` delivery, raising WebhookPayloadException when it is missing or malformed."""
+    try:
+        data = payload["repository"]
+        repository = GitHupApiResponse(
+            stars=int(data["stargazers_count"]),
+            forks=int(data["forks_count"]),
+            owner=data["owner"]["login"],
+            name=data["name"],
+        )
+        action = payload.get("action")
+        return WebhookEvent(
+            event=event,
+            action=action,
+            repository=repository,
+            previous_name=previous_name(action=action, payload=payload, repository=repository),
+        )
+    except (KeyError, TypeError, ValueError) as ex:
+        raise WebhookPayloadException(f"{event} delivery without a valid repository: {ex!r}") from ex
+
+
+def previous_name(action: Optional[str], payload: dict, repository: GitHupApiResponse) -> Optional[str]:
+    changes = payload.get("changes") or {}
+    if action == "renamed":
+        return f"{repository.owner}/{changes['repository']['name']['from']}"
+    if action == "transferred":
+        owner = changes["owner"]["from"]
+        login = (owner.get("user") or owner.get("organization"))["login"]
+        return f"{login}/{repository.name}"
+    return None
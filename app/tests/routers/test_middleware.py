@@ -0,0 +1,56 @@
+import httpx
+import pytest
+from api import create_app
+from fastapi import APIRouter, FastAPI
+from prometheus_client import REGISTRY
+from routers.middleware import MetricsMiddleware
+
+
+def duration_count(route: str, status: str) -> float:
+    labels = {"route": route, "method": "GET", "status": status}
+    return REGISTRY.get_sample_value("http_request_duration_seconds_count", labels) or 0
+
+
+@pytest.mark.asyncio
+async def test_metrics_middleware():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+    router = APIRouter()
+    in_flight = []
+
+    nested = APIRouter(prefix="/nested")
+
+    @router.get("/items/{name}")
+    async def item(name: str):
+        in_flight.append(REGISTRY.get_sample_value("http_requests_in_flight"))
+        return {"name": name}
+
+    @nested.get("/items/{position:int}")
+    async def nested_item(position: int):
+        return {"position": position}
+
+    router.include_router(nested)
+    app.include_router(router, prefix="/v1")
+    matched_before = duration_count(route="/v1/items/{name}", status="200")
+    nested_before = duration_count(route="/v1/nested/items/{position}", status="200")
+    unmatched_before = duration_count(route="unmatched", status="404")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        assert (await client.get("/v1/items/one")).status_code == 200
+        assert (await client.get("/v1/nested/items/2")).status_code == 200
+        assert (await client.get("/other")).status_code == 404
+
+    assert in_flight == [1]
+    assert REGISTRY.get_sample_value("http_requests_in_flight") == 0
+    assert duration_count(route="/v1/items/{name}", status="200") == matched_before + 1
+    assert duration_count(route="/v1/nested/items/{position}", status="200") == nested_before + 1
+    assert duration_count(route="unmatched", status="404") == unmatched_before + 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_middleware_app_routes():
+    app = create_app()
+    before = duration_count(route="/v1/utils/healthcheck", status="200")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        assert (await client.get("/v1/utils/healthcheck")).status_code == 200
+
+    assert duration_count(route="/v1/utils/healthcheck", status="200") == before + 1
@@ -1,69 +1,105 @@
+import asyncio
+import hashlib
+import hmac
 import json
+import time
+from contextlib import asynccontextmanager
+from dataclasses import replace
 
+import fakeredis
 import pytest
+from config import BATCH_CONCURRENCY, CACHE_SOFT_TTL, POPULAR_THRESHOLD
 from exceptions import (
     CalculateScoreException,
+    CircuitOpenException,
     GitHubServiceRequestException,
     RepositoryNameException,
     RequestForbiddenException,
     RequestMovedPermanently,
     RequestNotFoundException,
+    RequestNotModified,
+    RequestRateLimited,
 )
-from routers.popular import PopularView
+from routers.popular import PopularView, background_refreshes, decode_cursor, encode_cursor, org_etag
 from schemas.github import GitHupApiOrgResponse, GitHupApiResponse
-from schemas.popular import PopularResponseModel
-from services.cache import CacheService
+from schemas.popular import PopularBatchRequestModel, PopularResponseModel
+from services.cache import CacheEntry, CacheService
+from services.circuit_breaker import CircuitBreaker
 from services.github import GitHubService
-from services.popular import PopularService
+from services.popular import PopularService, ScoredRepositories
+from starlette.requests import Request
+from starlette.responses import StreamingResponse
 
 
-def test_check_no_cache(mocker):
-    mocked_git_service = mocker.Mock(autospec=GitHubService)
+async def org_pages(*pages):
+    for page, items in enumerate(pages, start=1):
+        yield GitHupApiOrgResponse(items=items, page=page)
+
+
+@asynccontextmanager
+async def refresh_lock(key):
+    yield False
+
+
+def fresh_entry(value):
+    return CacheEntry(value=value, fetched_at=time.time(), delta=0)
+
+
+def stale_entry(value):
+    return CacheEntry(value=value, fetched_at=time.time() - CACHE_SOFT_TTL, delta=0)
+
+
+@pytest.mark.asyncio
+async def test_check_no_cache(mocker):
+    mocked_git_service = mocker.AsyncMock(autospec=GitHubService)
     mocked_popular_service = mocker.Mock(autospec=PopularService)
-    mocked_cache_service = mocker.Mock(autospec=CacheService)
+    mocked_cache_service = mocker.AsyncMock(autospec=CacheService)
+    mocked_cache_service.refresh_lock = refresh_lock
 
     view = PopularView(
         github_service=mocked_git_service, popular_service=mocked_popular_service, cache_service=mocked_cache_service
     )
 
-    mocked_cache_service.check.return_value = None
+    mocked_cache_service.check_entry.return_value = None
     mocked_git_service.get_info.return_value = GitHupApiResponse(stars=5, name="test", forks=9, owner="lore")
     mocked_popular_service.calculate_score.return_value = PopularResponseModel(
         score=5, owner="lore", name="test", is_popular=False
     )
 
-    response = view.check(repository_name="test")
+    response = await view.check(repository_name="test")
 
     assert response.status_code == 200
-    mocked_git_service.get_info.assert_called_once()
+    mocked_git_service.get_info.assert_awaited_once()
     mocked_popular_service.calculate_score.assert_called_once()
-    mocked_cache_service.check.assert_called_once()
-    mocked_cache_service.set_key.assert_called_once()
+    mocked_cache_service.check_entry.assert_awaited_once()
+    mocked_cache_service.set_repositories.assert_awaited_once()
 
 
-def test_check_has_cache(mocker):
-    mocked_git_service = mocker.Mock(autospec=GitHubService)
+@pytest.mark.asyncio
+async def test_check_has_cache(mocker):
+    mocked_git_service = mocker.AsyncMock(autospec=GitHubService)
     mocked_popular_service = mocker.Mock(autospec=PopularService)
-    mocked_cache_service = mocker.Mock(autospec=CacheService)
+    mocked_cache_service = mocker.AsyncMock(autospec=CacheService)
+    mocked_cache_service.refresh_lock = refresh_lock
 
     view = PopularView(
         github_service=mocked_git_service, popular_service=mocked_popular_service, cache_service=mocked_cache_service
     )
 
-    mocked_cache_service.check.return_value = json.dumps(
-        {"score": 5, "owner": "lore", "name": "test", "is_popular": False}
+    mocked_cache_service.check_entry.return_value = fresh_entry(
+        b'{"score": 5, "owner": "lore", "name": "test", "is_popular": false}'
     )
     mocked_git_service.get_info.return_value = GitHupApiResponse(stars=5, name="test", forks=9, owner="lore")
     mocked_popular_service.calculate_score.return_value = PopularResponseModel(
         score=5, owner="lore", name="test", is_popular=False
     )
 
-    response = view.check(repository_name="test")
+    response = await view.check(repository_name="test")
 
     assert response.status_code == 200
-    mocked_git_service.get_info.assert_not_called()
+    mocked_git_service.get_info.assert_not_awaited()
     mocked_popular_service.calculate_score.assert_not_called()
-    mocked_cache_service.check.assert_called_once()
+    mocked_cache_service.check_entry.assert_awaited_once()
 
 
 @pytest.mark.parametrize(
@@ -76,99 +112,112 @@ def test_check_has_cache(mocker):
         (GitHubServiceRequestException, 500),
     ],
 )
-def test_check_github_service_exceptions(mocker, custom_exception, status_code):
-    mocked_git_service = mocker.Mock(autospec=GitHubService)
+@pytest.mark.asyncio
+async def test_check_github_service_exceptions(mocker, custom_exception, status_code):
+    mocked_git_service = mocker.AsyncMock(autospec=GitHubService)
     mocked_popular_service = mocker.Mock(autospec=PopularService)
-    mocked_cache_service = mocker.Mock(autospec=CacheService)
+    mocked_cache_service = mocker.AsyncMock(autospec=CacheService)
+    mocked_cache_service.refresh_lock = refresh_lock
 
     view = PopularView(
         github_service=mocked_git_service, popular_service=mocked_popular_service, cache_service=mocked_cache_service
     )
 
-    mocked_cache_service.check.return_value = None
+    mocked_cache_service.check_entry.return_value = None
     mocked_git_service.get_info.side_effect = custom_exception
     mocked_popular_service.calculate_score.return_value = PopularResponseModel(
         score=5, owner="lore", name="test", is_popular=False
     )
 
-    response = view.check(repository_name="test")
+    response = await view.check(repository_name="test")
 
     assert response.status_code == status_code
-    mocked_git_service.get_info.assert_called_once()
+    mocked_git_service.get_info.assert_awaited_once()
     mocked_popular_service.calculate_score.assert_not_called()
 
 
-def test_check_popular_service_exceptions(mocker):
-    mocked_git_service = mocker.Mock(autospec=GitHubService)
+@pytest.mark.asyncio
+async def test_check_popular_service_exceptions(mocker):
+    mocked_git_service = mocker.AsyncMock(autospec=GitHubService)
     mocked_popular_service = mocker.Mock(autospec=PopularService)
-    mocked_cache_service = mocker.Mock(autospec=CacheService)
+    mocked_cache_service = mocker.AsyncMock(autospec=CacheService)
+    mocked_cache_service.refresh_lock = refresh_lock
 
     view = PopularView(
         github_service=mocked_git_service, popular_service=mocked_popular_service, cache_service=mocked_cache_service
     )
 
-    mocked_cache_service.check.return_value = None
+    mocked_cache_service.check_entry.return_value = None
     mocked_git_service.get_info.return_value = GitHupApiResponse(stars=5, name="test", forks=9, owner="lore")
     mocked_popular_service.calculate_score.side_effect = CalculateScoreException
 
-    response = view.check(repository_name="test")
+    response = await view.check(repository_name="test")
 
     assert response.status_code == 500
-    mocked_git_service.get_info.assert_called_once()
+    mocked_git_service.get_info.assert_awaited_once()
     mocked_popular_service.calculate_score.assert_called_once()
 
 
-def test_check_org_no_cache(mocker):
-    mocked_git_service = mocker.Mock(autospec=GitHubService)
+@pytest.mark.asyncio
+async def test_check_org_no_cache(mocker):
+    mocked_git_service = mocker.AsyncMock(autospec=GitHubService)
     mocked_popular_service = mocker.Mock(autospec=PopularService)
-    mocked_cache_service = mocker.Mock(autospec=CacheService)
+    mocked_cache_service = mocker.AsyncMock(autospec=CacheService)
+    mocked_cache_service.refresh_lock = refresh_lock
 
     view = PopularView(
         github_service=mocked_git_service, popular_service=mocked_popular_service, cache_service=mocked_cache_service
     )
 
-    mocked_cache_service.check.return_value = None
-    mocked_git_service.get_org_info.return_value = GitHupApiOrgResponse(
-        items=[GitHupApiResponse(stars=5, name="test", forks=9, owner="lore")]
+    mocked_cache_service.check_org.return_value = None
+    mocked_cache_service.set_org.return_value = fresh_entry(
+        b'{"score":5,"owner":"lore","name":"test","is_popular":false}\n'
     )
-    mocked_popular_service.calculate_score.return_value = PopularResponseModel(
-        score=5, owner="lore", name="test", is_popular=False
+    mocked_git_service.iter_org_pages = mocker.Mock(
+        return_value=org_pages([GitHupApiResponse(stars=5, name="test", forks=9, owner="lore")])
+    )
+    mocked_popular_service.score_repositories.return_value = ScoredRepositories(
+        owners=["lore"], names=["test"], scores=[5], popular=[False]
     )
 
-    response = view.check_org(org_name="test")
+    response = await view.check_org(org_name="test")
 
     assert response.status_code == 200
-    mocked_git_service.get_org_info.assert_called_once()
-    mocked_popular_service.calculate_score.assert_called_once()
-    mocked_cache_service.check.assert_called_once()
-    mocked_cache_service.set_key.assert_called_once()
+    assert json.loads(response.body) == {"items": [{"score": 5, "owner": "lore", "name": "test", "is_popular": False}]}
+    mocked_git_service.iter_org_pages.assert_called_once()
+    mocked_popular_service.score_repositories.assert_called_once()
+    mocked_cache_service.check_org.assert_awaited_once()
+    mocked_cache_service.set_org.assert_awaited_once()
 
 
-def test_check_org_has_cache(mocker):
-    mocked_git_service = mocker.Mock(autospec=GitHubService)
+@pytest.mark.asyncio
+async def test_check_org_has_cache(mocker):
+    mocked_git_service = mocker.AsyncMock(autospec=GitHubService)
     mocked_popular_service = mocker.Mock(autospec=PopularService)
-    mocked_cache_service = mocker.Mock(autospec=CacheService)
+    mocked_cache_service = mocker.AsyncMock(autospec=CacheService)
+    mocked_cache_service.refresh_lock = refresh_lock
 
     view = PopularView(
         github_service=mocked_git_service, popular_service=mocked_popular_service, cache_service=mocked_cache_service
     )
 
-    mocked_cache_service.check.return_value = json.dumps(
-        [{"score": 5, "owner": "lore", "name": "test", "is_popular": False}]
+    mocked_cache_service.check_org.return_value = fresh_entry(
+        b'{"score":5,"owner":"lore","name":"test","is_popular":false}\n'
     )
-    mocked_git_service.get_org_info.return_value = GitHupApiOrgResponse(
-        items=[GitHupApiResponse(stars=5, name="test", forks=9, owner="lore")]
+    mocked_git_service.iter_org_pages = mocker.Mock(
+        return_value=org_pages([GitHupApiResponse(stars=5, name="test", forks=9, owner="lore")])
     )
-    mocked_popular_service.calculate_score.return_value = PopularResponseModel(
-        score=5, owner="lore", name="test", is_popular=False
+    mocked_popular_service.score_repositories.return_value = ScoredRepositories(
+        owners=["lore"], names=["test"], scores=[5], popular=[False]
     )
 
-    response = view.check_org(org_name="test")
+    response = await view.check_org(org_name="test")
 
     assert response.status_code == 200
-    mocked_git_service.get_org_info.assert_not_called()
-    mocked_popular_service.calculate_score.assert_not_called()
-    mocked_cache_service.check.assert_called_once()
+    assert json.loads(response.body) == {"items": [{"score": 5, "owner": "lore", "name": "test", "is_popular": False}]}
+    mocked_git_service.iter_org_pages.assert_not_called()
+    mocked_popular_service.score_repositories.assert_not_called()
+    mocked_cache_service.check_org.assert_awaited_once()
 
 
 @pytest.mark.parametrize(
@@ -181,45 +230,747 @@ def test_check_org_has_cache(mocker):
         (GitHubServiceRequestException, 500),
     ],
 )
-def test_check_org_github_service_exceptions(mocker, custom_exception, status_code):
-    mocked_git_service = mocker.Mock(autospec=GitHubService)
+@pytest.mark.asyncio
+async def test_check_org_github_service_exceptions(mocker, custom_exception, status_code):
+    mocked_git_service = mocker.AsyncMock(autospec=GitHubService)
+    mocked_popular_service = mocker.Mock(autospec=PopularService)
+    mocked_cache_service = mocker.AsyncMock(autospec=CacheService)
+    mocked_cache_service.refresh_lock = refresh_lock
+
+    view = PopularView(
+        github_service=mocked_git_service, popular_service=mocked_popular_service, cache_service=mocked_cache_service
+    )
+
+    mocked_cache_service.check_org.return_value = None
+    mocked_git_service.iter_org_pages = mocker.Mock(side_effect=custom_exception)
+    mocked_popular_service.score_repositories.return_value = ScoredRepositories(
+        owners=["lore"], names=["test"], scores=[5], popular=[False]
+    )
+
+    response = await view.check_org(org_name="test")
+
+    assert response.status_code == status_code
+    mocked_git_service.iter_org_pages.assert_called_once()
+    mocked_popular_service.score_repositories.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_check_org_popular_service_exceptions(mocker):
+    mocked_git_service = mocker.AsyncMock(autospec=GitHubService)
+    mocked_popular_service = mocker.Mock(autospec=PopularService)
+    mocked_cache_service = mocker.AsyncMock(autospec=CacheService)
+    mocked_cache_service.refresh_lock = refresh_lock
+
+    view = PopularView(
+        github_service=mocked_git_service, popular_service=mocked_popular_service, cache_service=mocked_cache_service
+    )
+
+    mocked_cache_service.check_org.return_value = None
+    mocked_git_service.iter_org_pages = mocker.Mock(
+        return_value=org_pages([GitHupApiResponse(stars=5, name="test", forks=9, owner="lore")])
+    )
+    mocked_popular_service.score_repositories.side_effect = CalculateScoreException
+
+    response = await view.check_org(org_name="test")
+
+    assert response.status_code == 500
+    mocked_git_service.iter_org_pages.assert_called_once()
+    mocked_popular_service.score_repositories.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_check_org_stream_no_cache(mocker):
+    mocked_git_service = mocker.AsyncMock(autospec=GitHubService)
     mocked_popular_service = mocker.Mock(autospec=PopularService)
-    mocked_cache_service = mocker.Mock(autospec=CacheService)
+    mocked_cache_service = mocker.AsyncMock(autospec=CacheService)
+    mocked_cache_service.refresh_lock = refresh_lock
 
     view = PopularView(
         github_service=mocked_git_service, popular_service=mocked_popular_service, cache_service=mocked_cache_service
     )
 
-    mocked_cache_service.check.return_value = None
-    mocked_git_service.get_org_info.side_effect = custom_exception
+    mocked_cache_service.check_org.return_value = None
+    mocked_git_service.iter_org_pages = mocker.Mock(
+        return_value=org_pages(
+            [GitHupApiResponse(stars=5, name="test", forks=9, owner="lore")],
+            [GitHupApiResponse(stars=5, name="test", forks=9, owner="lore")],
+        )
+    )
+    mocked_popular_service.score_repositories.return_value = ScoredRepositories(
+        owners=["lore"], names=["test"], scores=[5], popular=[False]
+    )
+
+    response = await view.check_org(org_name="test", stream=True)
+    body = b"".join([chunk async for chunk in response.body_iterator])
+
+    assert response.status_code == 200
+    assert response.media_type == "application/x-ndjson"
+    assert body == b'{"score":5,"owner":"lore","name":"test","is_popular":false}\n' * 2
+    mocked_cache_service.set_org.assert_awaited_once_with(
+        org_name="test",
+        items=[{"score": 5, "owner": "lore", "name": "test", "is_popular": False}] * 2,
+        delta=mocker.ANY,
+        etag=None,
+    )
+
+
+@pytest.mark.asyncio
+async def test_check_org_stream_has_cache(mocker):
+    mocked_git_service = mocker.AsyncMock(autospec=GitHubService)
+    mocked_popular_service = mocker.Mock(autospec=PopularService)
+    mocked_cache_service = mocker.AsyncMock(autospec=CacheService)
+    mocked_cache_service.refresh_lock = refresh_lock
+
+    view = PopularView(
+        github_service=mocked_git_service, popular_service=mocked_popular_service, cache_service=mocked_cache_service
+    )
+
+    cache_value = b'{"score":5,"owner":"lore","name":"test","is_popular":false}\n'
+    mocked_cache_service.check_org.return_value = fresh_entry(cache_value)
+    mocked_git_service.iter_org_pages = mocker.Mock()
+
+    response = await view.check_org(org_name="test", accept="application/x-ndjson")
+
+    assert response.status_code == 200
+    assert response.body == cache_value
+    mocked_git_service.iter_org_pages.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_check_org_stream_later_page_fails(mocker):
+    mocked_git_service = mocker.AsyncMock(autospec=GitHubService)
+    mocked_popular_service = mocker.Mock(autospec=PopularService)
+    mocked_cache_service = mocker.AsyncMock(autospec=CacheService)
+    mocked_cache_service.refresh_lock = refresh_lock
+
+    view = PopularView(
+        github_service=mocked_git_service, popular_service=mocked_popular_service, cache_service=mocked_cache_service
+    )
+
+    async def failing_pages():
+        yield GitHupApiOrgResponse(items=[GitHupApiResponse(stars=5, name="test", forks=9, owner="lore")])
+        raise GitHubServiceRequestException
+
+    mocked_cache_service.check_org.return_value = None
+    mocked_git_service.iter_org_pages = mocker.Mock(return_value=failing_pages())
+    mocked_popular_service.score_repositories.return_value = ScoredRepositories(
+        owners=["lore"], names=["test"], scores=[5], popular=[False]
+    )
+
+    response = await view.check_org(org_name="test", stream=True)
+
+    with pytest.raises(GitHubServiceRequestException):
+        [chunk async for chunk in response.body_iterator]
+    mocked_cache_service.set_org.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_check_many(mocker):
+    mocked_git_service = mocker.AsyncMock(autospec=GitHubService)
+    mocked_popular_service = mocker.Mock(autospec=PopularService)
+    mocked_cache_service = mocker.AsyncMock(autospec=CacheService)
+    mocked_cache_service.refresh_lock = refresh_lock
+
+    view = PopularView(
+        github_service=mocked_git_service, popular_service=mocked_popular_service, cache_service=mocked_cache_service
+    )
+
+    mocked_cache_service.check_many.return_value = [
+        fresh_entry(b'{"score": 1, "owner": "lore", "name": "cached", "is_popular": false}'),
+        None,
+        None,
+    ]
+    mocked_git_service.get_many_info.return_value = [
+        GitHupApiResponse(stars=5, name="test", forks=9, owner="lore"),
+        RequestNotFoundException(),
+    ]
     mocked_popular_service.calculate_score.return_value = PopularResponseModel(
         score=5, owner="lore", name="test", is_popular=False
     )
 
-    response = view.check_org(org_name="test")
+    response = await view.check_many(
+        batch=PopularBatchRequestModel(repositories=["lore/cached", "lore/test", "lore/missing", "lore/test"])
+    )
 
-    assert response.status_code == status_code
-    mocked_git_service.get_org_info.assert_called_once()
+    assert response.status_code == 200
+    assert json.loads(response.body) == {
+        "items": [
+            {
+                "repository_name": "lore/cached",
+                "status": 200,
+                "result": {"score": 1, "owner": "lore", "name": "cached", "is_popular": False},
+                "error": None,
+            },
+            {
+                "repository_name": "lore/test",
+                "status": 200,
+                "result": {"score": 5, "owner": "lore", "name": "test", "is_popular": False},
+                "error": None,
+            },
+            {
+                "repository_name": "lore/missing",
+                "status": 404,
+                "result": None,
+                "error": "repository lore/missing not found",
+            },
+            {
+                "repository_name": "lore/test",
+                "status": 200,
+                "result": {"score": 5, "owner": "lore", "name": "test", "is_popular": False},
+                "error": None,
+            },
+        ]
+    }
+    assert b'"result":{"score": 1, "owner": "lore", "name": "cached", "is_popular": false}' in response.body
+    mocked_cache_service.check_many.assert_awaited_once_with(
+        keys=["repo:lore/cached", "repo:lore/test", "repo:lore/missing"]
+    )
+    mocked_git_service.get_many_info.assert_awaited_once_with(
+        repository_names=["lore/test", "lore/missing"], concurrency=BATCH_CONCURRENCY
+    )
+    mocked_cache_service.set_repositories.assert_awaited_once_with(
+        values={"lore/test": {"score": 5, "owner": "lore", "name": "test", "is_popular": False}},
+        delta=mocker.ANY,
+        validators={"lore/test": (None, None)},
+    )
+
+
+@pytest.mark.asyncio
+async def test_check_many_too_many_repositories(mocker):
+    mocked_cache_service = mocker.AsyncMock(autospec=CacheService)
+    mocked_cache_service.refresh_lock = refresh_lock
+    mocker.patch("routers.popular.BATCH_MAX_REPOSITORIES", 1)
+
+    view = PopularView(
+        github_service=mocker.AsyncMock(autospec=GitHubService),
+        popular_service=mocker.Mock(autospec=PopularService),
+        cache_service=mocked_cache_service,
+    )
+
+    response = await view.check_many(batch=PopularBatchRequestModel(repositories=["lore/a", "lore/b"]))
+
+    assert response.status_code == 400
+    mocked_cache_service.check_many.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_check_concurrent_misses_single_upstream_call(mocker):
+    mocked_git_service = mocker.AsyncMock(autospec=GitHubService)
+    mocked_popular_service = mocker.Mock(autospec=PopularService)
+    mocked_cache_service = mocker.AsyncMock(autospec=CacheService)
+    mocked_cache_service.refresh_lock = refresh_lock
+
+    view = PopularView(
+        github_service=mocked_git_service, popular_service=mocked_popular_service, cache_service=mocked_cache_service
+    )
+
+    async def get_info(repository_name, etag, last_modified):
+        await asyncio.sleep(0.01)
+        return GitHupApiResponse(stars=5, name="test", forks=9, owner="lore")
+
+    mocked_cache_service.check_entry.return_value = None
+    mocked_git_service.get_info.side_effect = get_info
+    mocked_popular_service.calculate_score.return_value = PopularResponseModel(
+        score=5, owner="lore", name="test", is_popular=False
+    )
+
+    responses = await asyncio.gather(*(view.check(repository_name="lore/test") for _ in range(20)))
+
+    assert [response.status_code for response in responses] == [200] * 20
+    assert mocked_cache_service.check_entry.await_count == 20
+    mocked_git_service.get_info.assert_awaited_once()
+    mocked_cache_service.set_repositories.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_check_org_concurrent_misses_single_upstream_call(mocker):
+    mocked_git_service = mocker.AsyncMock(autospec=GitHubService)
+    mocked_popular_service = mocker.Mock(autospec=PopularService)
+    mocked_cache_service = mocker.AsyncMock(autospec=CacheService)
+    mocked_cache_service.refresh_lock = refresh_lock
+
+    view = PopularView(
+        github_service=mocked_git_service, popular_service=mocked_popular_service, cache_service=mocked_cache_service
+    )
+
+    async def slow_pages(org_name):
+        await asyncio.sleep(0.01)
+        yield GitHupApiOrgResponse(items=[GitHupApiResponse(stars=5, name="test", forks=9, owner="lore")])
+
+    mocked_cache_service.check_org.return_value = None
+    mocked_cache_service.set_org.return_value = fresh_entry(
+        b'{"score":5,"owner":"lore","name":"test","is_popular":false}\n'
+    )
+    mocked_git_service.iter_org_pages = mocker.Mock(side_effect=slow_pages)
+    mocked_popular_service.score_repositories.return_value = ScoredRepositories(
+        owners=["lore"], names=["test"], scores=[5], popular=[False]
+    )
+
+    responses = await asyncio.gather(*(view.check_org(org_name="lore") for _ in range(20)))
+
+    assert {response.body for response in responses} == {
+        b'{"items":[{"score":5,"owner":"lore","name":"test","is_popular":false}]}'
+    }
+    mocked_git_service.iter_org_pages.assert_called_once()
+    mocked_cache_service.set_org.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_check_org_stream_concurrent_misses_single_upstream_call(mocker):
+    mocked_git_service = mocker.AsyncMock(autospec=GitHubService)
+    mocked_popular_service = mocker.Mock(autospec=PopularService)
+    mocked_cache_service = mocker.AsyncMock(autospec=CacheService)
+    mocked_cache_service.refresh_lock = refresh_lock
+
+    view = PopularView(
+        github_service=mocked_git_service, popular_service=mocked_popular_service, cache_service=mocked_cache_service
+    )
+
+    async def slow_pages(org_name):
+        for _ in range(2):
+            await asyncio.sleep(0.01)
+            yield GitHupApiOrgResponse(items=[GitHupApiResponse(stars=5, name="test", forks=9, owner="lore")])
+
+    mocked_cache_service.check_org.return_value = None
+    mocked_cache_service.set_org.return_value = fresh_entry(
+        b'{"score":5,"owner":"lore","name":"test","is_popular":false}\n' * 2
+    )
+    mocked_git_service.iter_org_pages = mocker.Mock(side_effect=slow_pages)
+    mocked_popular_service.score_repositories.return_value = ScoredRepositories(
+        owners=["lore"], names=["test"], scores=[5], popular=[False]
+    )
+
+    async def read(response):
+        if isinstance(response, StreamingResponse):
+            return b"".join([chunk async for chunk in response.body_iterator])
+        return response.body
+
+    responses = await asyncio.gather(*(view.check_org(org_name="lore", stream=True) for _ in range(20)))
+    bodies = await asyncio.gather(*(read(response) for response in responses))
+
+    assert set(bodies) == {b'{"score":5,"owner":"lore","name":"test","is_popular":false}\n' * 2}
+    assert {response.media_type for response in responses} == {"application/x-ndjson"}
+    mocked_git_service.iter_org_pages.assert_called_once()
+    mocked_cache_service.set_org.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_check_waits_for_refresh_lock_holder(mocker):
+    mocked_git_service = mocker.AsyncMock(autospec=GitHubService)
+    mocked_popular_service = mocker.Mock(autospec=PopularService)
+    mocked_cache_service = mocker.AsyncMock(autospec=CacheService)
+
+    @asynccontextmanager
+    async def held_refresh_lock(key):
+        yield True
+
+    mocked_cache_service.refresh_lock = held_refresh_lock
+
+    view = PopularView(
+        github_service=mocked_git_service, popular_service=mocked_popular_service, cache_service=mocked_cache_service
+    )
+
+    mocked_cache_service.check_entry.side_effect = [
+        None,
+        fresh_entry(b'{"score": 5, "owner": "lore", "name": "test", "is_popular": false}'),
+    ]
+
+    response = await view.check(repository_name="lore/test")
+
+    assert response.status_code == 200
+    assert json.loads(response.body) == {"score": 5, "owner": "lore", "name": "test", "is_popular": False}
+    mocked_git_service.get_info.assert_not_awaited()
+    mocked_cache_service.set_repositories.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_check_stale_cache_refreshes_in_background(mocker):
+    mocked_git_service = mocker.AsyncMock(autospec=GitHubService)
+    mocked_popular_service = mocker.Mock(autospec=PopularService)
+    mocked_cache_service = mocker.AsyncMock(autospec=CacheService)
+    mocked_cache_service.refresh_lock = refresh_lock
+
+    view = PopularView(
+        github_service=mocked_git_service, popular_service=mocked_popular_service, cache_service=mocked_cache_service
+    )
+
+    mocked_cache_service.check_entry.return_value = stale_entry(
+        b'{"score": 1, "owner": "lore", "name": "test", "is_popular": false}'
+    )
+    mocked_git_service.get_info.return_value = GitHupApiResponse(stars=5, name="test", forks=9, owner="lore")
+    mocked_popular_service.calculate_score.return_value = PopularResponseModel(
+        score=5, owner="lore", name="test", is_popular=False
+    )
+
+    response = await view.check(repository_name="lore/test")
+
+    assert json.loads(response.body) == {"score": 1, "owner": "lore", "name": "test", "is_popular": False}
+    mocked_git_service.get_info.assert_not_awaited()
+
+    await asyncio.gather(*background_refreshes)
+
+    mocked_git_service.get_info.assert_awaited_once()
+    mocked_cache_service.set_repositories.assert_awaited_once_with(
+        values={"lore/test": {"score": 5, "owner": "lore", "name": "test", "is_popular": False}},
+        delta=mocker.ANY,
+        validators={"lore/test": (None, None)},
+    )
+
+
+@pytest.mark.asyncio
+async def test_check_org_stale_cache_refreshes_in_background(mocker):
+    mocked_git_service = mocker.AsyncMock(autospec=GitHubService)
+    mocked_popular_service = mocker.Mock(autospec=PopularService)
+    mocked_cache_service = mocker.AsyncMock(autospec=CacheService)
+    mocked_cache_service.refresh_lock = refresh_lock
+
+    view = PopularView(
+        github_service=mocked_git_service, popular_service=mocked_popular_service, cache_service=mocked_cache_service
+    )
+
+    cache_value = b'{"score":1,"owner":"lore","name":"test","is_popular":false}\n'
+    mocked_cache_service.check_org.return_value = stale_entry(cache_value)
+    mocked_git_service.iter_org_pages = mocker.Mock(
+        return_value=org_pages([GitHupApiResponse(stars=5, name="test", forks=9, owner="lore")])
+    )
+    mocked_popular_service.score_repositories.return_value = ScoredRepositories(
+        owners=["lore"], names=["test"], scores=[5], popular=[False]
+    )
+
+    response = await view.check_org(org_name="lore", stream=True)
+
+    assert response.body == cache_value
+
+    await asyncio.gather(*background_refreshes)
+
+    mocked_git_service.iter_org_pages.assert_called_once()
+    mocked_cache_service.set_org.assert_awaited_once_with(
+        org_name="lore",
+        items=[{"score": 5, "owner": "lore", "name": "test", "is_popular": False}],
+        delta=mocker.ANY,
+        etag=None,
+    )
+
+
+@pytest.mark.asyncio
+async def test_check_stale_cache_not_modified_renews_entry(mocker):
+    mocked_git_service = mocker.AsyncMock(autospec=GitHubService)
+    mocked_popular_service = mocker.Mock(autospec=PopularService)
+    mocked_cache_service = mocker.AsyncMock(autospec=CacheService)
+    mocked_cache_service.refresh_lock = refresh_lock
+
+    view = PopularView(
+        github_service=mocked_git_service, popular_service=mocked_popular_service, cache_service=mocked_cache_service
+    )
+
+    cache_entry = replace(
+        stale_entry(b'{"score": 1, "owner": "lore", "name": "test", "is_popular": false}'), etag='"abc"'
+    )
+    mocked_cache_service.check_entry.return_value = cache_entry
+    mocked_git_service.get_info.side_effect = RequestNotModified
+
+    await view.check(repository_name="lore/test")
+    await asyncio.gather(*background_refreshes)
+
+    mocked_git_service.get_info.assert_awaited_once_with(repository_name="lore/test", etag='"abc"', last_modified=None)
+    mocked_cache_service.renew.assert_awaited_once_with(key="repo:lore/test", entry=cache_entry)
     mocked_popular_service.calculate_score.assert_not_called()
+    mocked_cache_service.set_repositories.assert_not_awaited()
 
 
-def test_check_org_popular_service_exceptions(mocker):
-    mocked_git_service = mocker.Mock(autospec=GitHubService)
+@pytest.mark.asyncio
+async def test_check_org_stale_cache_not_modified_renews_entry(mocker):
+    mocked_git_service = mocker.AsyncMock(autospec=GitHubService)
     mocked_popular_service = mocker.Mock(autospec=PopularService)
-    mocked_cache_service = mocker.Mock(autospec=CacheService)
+    mocked_cache_service = mocker.AsyncMock(autospec=CacheService)
+    mocked_cache_service.refresh_lock = refresh_lock
 
     view = PopularView(
         github_service=mocked_git_service, popular_service=mocked_popular_service, cache_service=mocked_cache_service
     )
 
-    mocked_cache_service.check.return_value = None
-    mocked_git_service.get_org_info.return_value = GitHupApiOrgResponse(
-        items=[GitHupApiResponse(stars=5, name="test", forks=9, owner="lore")]
+    cache_entry = replace(
+        stale_entry(b'{"score":1,"owner":"lore","name":"test","is_popular":false}\n'), etag='"1","2"'
     )
-    mocked_popular_service.calculate_score.side_effect = CalculateScoreException
+    mocked_cache_service.check_org.return_value = cache_entry
+    mocked_git_service.org_not_modified.return_value = True
+    mocked_git_service.iter_org_pages = mocker.Mock()
 
-    response = view.check_org(org_name="test")
+    await view.check_org(org_name="lore")
+    await asyncio.gather(*background_refreshes)
 
-    assert response.status_code == 500
-    mocked_git_service.get_org_info.assert_called_once()
-    mocked_popular_service.calculate_score.assert_called_once()
+    mocked_git_service.org_not_modified.assert_awaited_once_with(org_name="lore", etags=['"1"', '"2"'])
+    mocked_cache_service.renew_org.assert_awaited_once_with(org_name="lore", entry=cache_entry)
+    mocked_git_service.iter_org_pages.assert_not_called()
+    mocked_cache_service.set_org.assert_not_awaited()
+
+
+def test_org_etag():
+    pages = [GitHupApiOrgResponse(items=[], page=2, etag='"2"'), GitHupApiOrgResponse(items=[], page=1, etag='"1"')]
+
+    assert org_etag(pages=pages) == '"1","2"'
+    assert org_etag(pages=pages + [GitHupApiOrgResponse(items=[], page=3)]) is None
+
+
+@pytest.mark.asyncio
+async def test_check_rate_limited(mocker):
+    mocked_git_service = mocker.AsyncMock(autospec=GitHubService)
+    mocked_popular_service = mocker.Mock(autospec=PopularService)
+    mocked_cache_service = mocker.AsyncMock(autospec=CacheService)
+    mocked_cache_service.refresh_lock = refresh_lock
+
+    view = PopularView(
+        github_service=mocked_git_service, popular_service=mocked_popular_service, cache_service=mocked_cache_service
+    )
+
+    mocked_cache_service.check_entry.return_value = None
+    mocked_git_service.get_info.side_effect = RequestRateLimited(retry_after=59.5)
+
+    response = await view.check(repository_name="lore/test")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "60"
+
+
+@pytest.mark.asyncio
+async def test_check_stale_cache_not_refreshed_when_rate_limit_budget_low(mocker):
+    mocked_git_service = mocker.AsyncMock(autospec=GitHubService)
+    mocked_popular_service = mocker.Mock(autospec=PopularService)
+    mocked_cache_service = mocker.AsyncMock(autospec=CacheService)
+    mocked_cache_service.refresh_lock = refresh_lock
+    mocker.patch("routers.popular.get_token_pool", return_value=mocker.Mock(budget_low=True))
+
+    view = PopularView(
+        github_service=mocked_git_service, popular_service=mocked_popular_service, cache_service=mocked_cache_service
+    )
+
+    mocked_cache_service.check_entry.return_value = stale_entry(
+        b'{"score": 1, "owner": "lore", "name": "test", "is_popular": false}'
+    )
+
+    response = await view.check(repository_name="lore/test")
+    await asyncio.gather(*background_refreshes)
+
+    assert json.loads(response.body) == {"score": 1, "owner": "lore", "name": "test", "is_popular": False}
+    mocked_git_service.get_info.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_check_org_query(mocker):
+    mocked_cache_service = mocker.AsyncMock(autospec=CacheService)
+    view = PopularView(
+        github_service=mocker.AsyncMock(autospec=GitHubService),
+        popular_service=PopularService(),
+        cache_service=mocked_cache_service,
+    )
+
+    value = b'{"score":900,"owner":"lore","name":"test","is_popular":true}'
+    mocked_cache_service.query_org.return_value = (fresh_entry(b"2"), [value], (900.0, 1))
+
+    response = await view.check_org(org_name="lore", popular_only=True, limit=1)
+
+    assert response.status_code == 200
+    assert json.loads(response.body) == {
+        "items": [{"score": 900, "owner": "lore", "name": "test", "is_popular": True}],
+        "next_cursor": encode_cursor((900.0, 1)),
+    }
+    mocked_cache_service.query_org.assert_awaited_once_with(
+        org_name="lore", min_score=POPULAR_THRESHOLD, descending=True, limit=1, after=None
+    )
+    mocked_cache_service.check_org.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_check_org_query_stream_with_cursor(mocker):
+    mocked_cache_service = mocker.AsyncMock(autospec=CacheService)
+    view = PopularView(
+        github_service=mocker.AsyncMock(autospec=GitHubService),
+        popular_service=PopularService(),
+        cache_service=mocked_cache_service,
+    )
+
+    value = b'{"score":5,"owner":"lore","name":"test","is_popular":false}'
+    mocked_cache_service.query_org.return_value = (fresh_entry(b"3"), [value], None)
+
+    response = await view.check_org(
+        org_name="lore", stream=True, sort="score", min_score=3, limit=1, cursor=encode_cursor((3.0, 2))
+    )
+
+    assert response.body == value + b"\n"
+    assert "X-Next-Cursor" not in response.headers
+    mocked_cache_service.query_org.assert_awaited_once_with(
+        org_name="lore", min_score=3, descending=False, limit=1, after=(3.0, 2)
+    )
+
+
+@pytest.mark.asyncio
+async def test_check_org_query_not_cached(mocker):
+    mocked_git_service = mocker.AsyncMock(autospec=GitHubService)
+    mocked_cache_service = mocker.AsyncMock(autospec=CacheService)
+    mocked_cache_service.refresh_lock = refresh_lock
+    view = PopularView(
+        github_service=mocked_git_service, popular_service=PopularService(), cache_service=mocked_cache_service
+    )
+
+    value = b'{"score":23,"owner":"lore","name":"test","is_popular":false}'
+    mocked_cache_service.query_org.side_effect = [None, (fresh_entry(b"1"), [value], None)]
+    mocked_cache_service.set_org.return_value = fresh_entry(value + b"\n")
+    mocked_git_service.iter_org_pages = mocker.Mock(
+        return_value=org_pages([GitHupApiResponse(stars=5, name="test", forks=9, owner="lore")])
+    )
+
+    response = await view.check_org(org_name="lore", limit=10)
+
+    assert json.loads(response.body)["items"] == [json.loads(value)]
+    assert mocked_cache_service.query_org.await_count == 2
+    mocked_cache_service.set_org.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_check_org_query_redis_down(mocker):
+    breaker = CircuitBreaker(name="redis", failure_threshold=1, reset_timeout=5)
+    breaker.record_failure()
+    cache_service = CacheService(
+        connection=fakeredis.FakeAsyncRedis(), local_cache=None, access_tracker=None, circuit_breaker=breaker
+    )
+    mocked_git_service = mocker.AsyncMock(autospec=GitHubService)
+    view = PopularView(
+        github_service=mocked_git_service, popular_service=PopularService(), cache_service=cache_service
+    )
+    mocked_git_service.iter_org_pages = mocker.Mock(
+        return_value=org_pages(
+            [GitHupApiResponse(stars=stars, name=name, forks=0, owner="lore") for name, stars in (("a", 1), ("b", 3))],
+            [GitHupApiResponse(stars=2, name="c", forks=0, owner="lore")],
+        )
+    )
+
+    response = await view.check_org(org_name="lore", min_score=2, sort="score", limit=1)
+
+    assert response.status_code == 200
+    body = json.loads(response.body)
+    assert [item["name"] for item in body["items"]] == ["c"]
+    assert decode_cursor(body["next_cursor"]) == (2.0, 1)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    ["not a cursor", encode_cursor((float("nan"), 1)), encode_cursor((float("inf"), 1)), encode_cursor((2.0, -1))],
+)
+@pytest.mark.asyncio
+async def test_check_org_query_invalid_cursor(mocker, cursor):
+    mocked_cache_service = mocker.AsyncMock(autospec=CacheService)
+    view = PopularView(
+        github_service=mocker.AsyncMock(autospec=GitHubService),
+        popular_service=PopularService(),
+        cache_service=mocked_cache_service,
+    )
+
+    response = await view.check_org(org_name="lore", cursor=cursor)
+
+    assert response.status_code == 400
+    mocked_cache_service.query_org.assert_not_awaited()
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor((1234.0, 3))) == (1234.0, 3)
+
+
+@pytest.mark.asyncio
+async def test_check_circuit_open(mocker):
+    mocked_git_service = mocker.AsyncMock(autospec=GitHubService)
+    mocked_cache_service = mocker.AsyncMock(autospec=CacheService)
+    mocked_cache_service.refresh_lock = refresh_lock
+    view = PopularView(
+        github_service=mocked_git_service, popular_service=PopularService(), cache_service=mocked_cache_service
+    )
+
+    mocked_cache_service.check_entry.return_value = None
+    mocked_git_service.get_info.side_effect = CircuitOpenException(dependency="github", retry_after=12.5)
+
+    response = await view.check(repository_name="lore/test")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "13"
+    assert json.loads(response.body)["message"] == "GitHub is unavailable, try again later"
+
+
+def webhook_request(body):
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return Request({"type": "http", "method": "POST", "headers": []}, receive)
+
+
+def webhook_delivery(event, payload, secret="secret"):
+    body = json.dumps(payload).encode("utf-8")
+    signature = "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return {"request": webhook_request(body), "x_github_event": event, "x_hub_signature_256": signature}
+
+
+def repository_payload(name, stars, forks=0, action="created", **extra):
+    return {
+        "action": action,
+        "repository": {"name": name, "owner": {"login": "Lore"}, "stargazers_count": stars, "forks_count": forks},
+        **extra,
+    }
+
+
+def webhook_view():
+    cache_service = CacheService(connection=fakeredis.FakeAsyncRedis(), local_cache=None, access_tracker=None)
+    return PopularView(github_service=GitHubService(), popular_service=PopularService(), cache_service=cache_service)
+
+
+@pytest.mark.asyncio
+async def test_webhook_star_updates_repository_and_org_index(mocker):
+    mocker.patch("routers.popular.GITHUB_WEBHOOK_SECRET", "secret")
+    get_info = mocker.patch.object(GitHubService, "get_info")
+    view = webhook_view()
+    items = [
+        {"score": score, "owner": "lore", "name": name, "is_popular": False} for name, score in (("a", 1), ("b", 2))
+    ]
+    await view.cache_service.set_org(org_name="lore", items=items)
+
+    response = await view.webhook(**webhook_delivery("star", repository_payload("A", stars=600, forks=10)))
+
+    assert response.status_code == 200
+    assert json.loads(response.body) == {"event": "star", "repository": "Lore/A", "result": "updated"}
+    get_info.assert_not_called()
+    assert (await view.cache_service.check_org(org_name="lore")).value.splitlines() == [
+        b'{"score":620,"owner":"Lore","name":"A","is_popular":true}',
+        b'{"score":2,"owner":"lore","name":"b","is_popular":false}',
+    ]
+
+
+@pytest.mark.asyncio
+async def test_webhook_repository_deleted_drops_repository_and_org(mocker):
+    mocker.patch("routers.popular.GITHUB_WEBHOOK_SECRET", "secret")
+    view = webhook_view()
+    items = [{"score": 1, "owner": "Lore", "name": "a", "is_popular": False}]
+    await view.cache_service.set_org(org_name="Lore", items=items)
+
+    response = await view.webhook(**webhook_delivery("repository", repository_payload("a", stars=1, action="deleted")))
+
+    assert json.loads(response.body)["result"] == "removed"
+    assert await view.cache_service.check_entry(key="repo:lore/a") is None
+    assert await view.cache_service.check_org(org_name="lore") is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "secret, delivery, status_code, result",
+    [
+        (None, webhook_delivery("star", repository_payload("a", stars=1)), 404, None),
+        ("secret", webhook_delivery("star", repository_payload("a", stars=1), secret="other"), 401, None),
+        ("secret", webhook_delivery("ping", {"zen": "Keep it logically awesome."}), 200, "ignored"),
+        ("secret", webhook_delivery("star", {"action": "created"}), 400, None),
+    ],
+)
+async def test_webhook_rejected_or_ignored(mocker, secret, delivery, status_code, result):
+    mocker.patch("routers.popular.GITHUB_WEBHOOK_SECRET", secret)
+    view = webhook_view()
+
+    response = await view.webhook(**delivery)
+
+    assert response.status_code == status_code
+    assert json.loads(response.body).get("result") == result
+    assert await view.cache_service.connection.keys() == []
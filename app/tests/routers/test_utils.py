@@ -1,3 +1,5 @@
+import json
+
 from routers.utils import UtilsView
 
 
@@ -7,3 +9,28 @@ def test_healthcheck():
     response = view.health_check()
 
     assert response.status_code == 200
+    assert response.body == b'{"message":"I\'m alive"}'
+
+
+def test_metrics():
+    view = UtilsView()
+
+    response = view.metrics()
+
+    assert response.status_code == 200
+    assert b"github_http_requests_total" in response.body
+    for histogram in (
+        "cache_operation_duration_seconds",
+        "github_request_duration_seconds",
+        "scoring_duration_seconds",
+    ):
+        assert f"# TYPE {histogram} histogram".encode("utf-8") in response.body
+
+
+def test_circuit_breaker_states():
+    view = UtilsView()
+
+    response = view.circuit_breaker_states()
+
+    assert response.status_code == 200
+    assert sorted(json.loads(response.body)) == ["github", "redis"]
@@ -1,34 +1,515 @@
-import redis
-from config import REDIS_KEY_TTL
-from services.cache import CacheService
+import json
+import time
 
+import fakeredis
+import pytest
+from config import (
+    CACHE_HARD_TTL,
+    CACHE_INVALIDATION_CHANNEL,
+    CACHE_LOCK_TIMEOUT,
+    CACHE_LOCK_WAIT,
+    CACHE_SOFT_TTL,
+    CACHE_WEBHOOK_HARD_TTL,
+    CACHE_WEBHOOK_SOFT_TTL,
+)
+from redis import asyncio as aioredis
+from redis.asyncio.cluster import RedisCluster
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+from services.cache import CacheEntry, CacheService, org_index_key, org_key, query_body, repository_key
+from services.circuit_breaker import CircuitBreaker
+from services.local_cache import LocalCache, invalidation_message
 
-def test_set_key(mocker):
-    mock_connection = mocker.Mock(autospec=redis.Redis)
+
+@pytest.mark.asyncio
+async def test_check_entry(mocker):
+    mock_connection = mocker.AsyncMock(autospec=aioredis.Redis)
     service = CacheService(connection=mock_connection)
 
-    service.set_key(key="test", value={"test": "test"})
+    mock_connection.get.return_value = b'100.000 0.250\n{"test": "test"}'
+    response = await service.check_entry(key="test")
 
-    mock_connection.set.assert_called_once_with("test", '{"test": "test"}', ex=REDIS_KEY_TTL)
+    assert response == CacheEntry(value=b'{"test": "test"}', fetched_at=100.0, delta=0.25)
 
 
-def test_check_none(mocker):
-    mock_connection = mocker.Mock(autospec=redis.Redis)
+@pytest.mark.asyncio
+async def test_check_none(mocker):
+    mock_connection = mocker.AsyncMock(autospec=aioredis.Redis)
     service = CacheService(connection=mock_connection)
 
     mock_connection.get.return_value = None
-    response = service.check(key="test")
+    response = await service.check_entry(key="test")
 
     assert response is None
-    mock_connection.get.assert_called_once_with("test")
+    mock_connection.get.assert_awaited_once_with("test")
+
+
+@pytest.mark.asyncio
+async def test_check_many(mocker):
+    mock_connection = mocker.AsyncMock(autospec=aioredis.Redis)
+    service = CacheService(connection=mock_connection)
+
+    mock_connection.mget.return_value = [b'100.000 0.250\n{"test": "test"}', None]
+    response = await service.check_many(keys=["test", "other"])
+
+    assert response == [CacheEntry(value=b'{"test": "test"}', fetched_at=100.0, delta=0.25), None]
+    mock_connection.mget.assert_awaited_once_with(["test", "other"])
+
+
+@pytest.mark.asyncio
+async def test_check_many_empty(mocker):
+    mock_connection = mocker.AsyncMock(autospec=aioredis.Redis)
+    service = CacheService(connection=mock_connection)
+
+    assert await service.check_many(keys=[]) == []
+    mock_connection.mget.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_set_repositories(mocker):
+    mock_connection = mocker.AsyncMock(autospec=aioredis.Redis)
+    mock_pipeline = mocker.Mock()
+    mock_pipeline.execute = mocker.AsyncMock()
+    mock_connection.pipeline = mocker.Mock(return_value=mock_pipeline)
+    service = CacheService(connection=mock_connection)
+
+    mocker.patch("services.cache.time.time", return_value=100.0)
+
+    await service.set_repositories(values={"Lore/Test": {"score": 1, "owner": "Lore", "name": "Test"}})
+
+    mock_connection.pipeline.assert_called_once_with(transaction=False)
+    mock_pipeline.set.assert_called_once_with(
+        "repo:lore/test", b'v2 none 100.000 0.000\n{"score":1,"owner":"Lore","name":"Test"}', ex=CACHE_HARD_TTL
+    )
+    mock_pipeline.zadd.assert_called_once_with("org:lore:repos", {"lore/test": 1}, xx=True)
+    mock_pipeline.execute.assert_awaited_once()
 
 
-def test_check(mocker):
-    mock_connection = mocker.Mock(autospec=redis.Redis)
+@pytest.mark.asyncio
+async def test_refresh_lock_disabled(mocker):
+    mock_connection = mocker.AsyncMock(autospec=aioredis.Redis)
     service = CacheService(connection=mock_connection)
 
-    mock_connection.get.return_value = b"{'test': 'test'}"
-    response = service.check(key="test")
+    async with service.refresh_lock(key="test") as waited:
+        assert waited is False
+
+    mock_connection.lock.assert_not_called()
+
+
+@pytest.mark.parametrize("free, waited", [(True, False), (False, True)])
+@pytest.mark.asyncio
+async def test_refresh_lock(mocker, free, waited):
+    mocker.patch("services.cache.CACHE_LOCK_ENABLED", True)
+    mock_connection = mocker.AsyncMock(autospec=aioredis.Redis)
+    mock_lock = mocker.AsyncMock()
+    mock_lock.acquire.side_effect = [free, True]
+    mock_connection.lock = mocker.Mock(return_value=mock_lock)
+    service = CacheService(connection=mock_connection)
+
+    async with service.refresh_lock(key="test") as result:
+        assert result is waited
+
+    mock_connection.lock.assert_called_once_with(
+        "lock:test", timeout=CACHE_LOCK_TIMEOUT, blocking_timeout=CACHE_LOCK_WAIT
+    )
+    mock_lock.release.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_refresh_lock_wait_timeout(mocker):
+    mocker.patch("services.cache.CACHE_LOCK_ENABLED", True)
+    mock_connection = mocker.AsyncMock(autospec=aioredis.Redis)
+    mock_lock = mocker.AsyncMock()
+    mock_lock.acquire.side_effect = [False, False]
+    mock_connection.lock = mocker.Mock(return_value=mock_lock)
+    service = CacheService(connection=mock_connection)
+
+    async with service.refresh_lock(key="test") as waited:
+        assert waited is True
+
+    mock_lock.release.assert_not_awaited()
+
+
+def test_cache_entry_decode_unversioned():
+    entry = CacheEntry.decode(b'100.000 0.250\n{"test": "test"}')
+
+    assert entry == CacheEntry(value=b'{"test": "test"}', fetched_at=100.0, delta=0.25)
+
+
+@pytest.mark.parametrize("raw", [b'{"test": "test"}', b"v3 none 100.000 0.250\n{}", b"v2 gzip 100.000 0.250\n{}"])
+def test_cache_entry_decode_unreadable_is_miss(raw):
+    assert CacheEntry.decode(raw) is None
+
+
+@pytest.mark.parametrize(
+    "etag, last_modified, header",
+    [
+        ('W/"abc"', None, b'v2 none 100.000 0.250 W/"abc"'),
+        (None, "Tue, 01 Sep 2026 10:00:00 GMT", b"v2 none 100.000 0.250 - Tue, 01 Sep 2026 10:00:00 GMT"),
+        ('"abc"', "Tue, 01 Sep 2026 10:00:00 GMT", b'v2 none 100.000 0.250 "abc" Tue, 01 Sep 2026 10:00:00 GMT'),
+    ],
+)
+def test_cache_entry_validators_round_trip(etag, last_modified, header):
+    entry = CacheEntry(value=b"{}", fetched_at=100.0, delta=0.25, etag=etag, last_modified=last_modified)
+
+    assert entry.encode() == header + b"\n{}"
+    assert CacheEntry.decode(entry.encode()) == entry
+
+
+@pytest.mark.asyncio
+async def test_renew(mocker):
+    mock_connection = mocker.AsyncMock(autospec=aioredis.Redis)
+    service = CacheService(connection=mock_connection)
+
+    mocker.patch("services.cache.time.time", return_value=200.0)
+
+    await service.renew(key="test", entry=CacheEntry(value=b"{}", fetched_at=100.0, delta=0.25, etag='"abc"'))
+
+    mock_connection.set.assert_awaited_once_with("test", b'v2 none 200.000 0.250 "abc"\n{}', ex=CACHE_HARD_TTL)
+
+
+def test_cache_entry_stale(mocker):
+    mocker.patch("services.cache.time.time", return_value=1000.0 + CACHE_SOFT_TTL)
+
+    assert CacheEntry(value=b"", fetched_at=1000.0, delta=0).is_stale
+    assert CacheEntry(value=b"", fetched_at=1000.0, delta=0).should_refresh()
+    assert not CacheEntry(value=b"", fetched_at=1001.0, delta=0).is_stale
+
+
+@pytest.mark.parametrize("random_value, should_refresh", [(0.0, False), (0.99, True)])
+def test_cache_entry_should_refresh_early(mocker, random_value, should_refresh):
+    mocker.patch("services.cache.time.time", return_value=1000.0 + CACHE_SOFT_TTL - 2)
+    mocker.patch("services.cache.random.random", return_value=random_value)
+    entry = CacheEntry(value=b"", fetched_at=1000.0, delta=1)
+
+    assert not entry.is_stale
+    assert entry.should_refresh() is should_refresh
+
+
+@pytest.mark.asyncio
+async def test_check_entry_local_cache(mocker):
+    mock_connection = mocker.AsyncMock(autospec=aioredis.Redis)
+    service = CacheService(connection=mock_connection, local_cache=LocalCache(ttl=10, max_entries=10, max_bytes=100))
+
+    mock_connection.get.return_value = b'100.000 0.250\n{"test": "test"}'
+    first = await service.check_entry(key="test")
+    second = await service.check_entry(key="test")
+
+    assert first == second == CacheEntry(value=b'{"test": "test"}', fetched_at=100.0, delta=0.25)
+    mock_connection.get.assert_awaited_once_with("test")
+
+
+@pytest.mark.asyncio
+async def test_check_many_local_cache(mocker):
+    mock_connection = mocker.AsyncMock(autospec=aioredis.Redis)
+    local_cache = LocalCache(ttl=10, max_entries=10, max_bytes=100)
+    local_entry = CacheEntry(value=b"local", fetched_at=100.0, delta=0)
+    local_cache.set("local", local_entry, size=5)
+    service = CacheService(connection=mock_connection, local_cache=local_cache)
+
+    mock_connection.mget.return_value = [b"100.000 0.000\nremote", None]
+    response = await service.check_many(keys=["remote", "local", "other"])
+
+    assert response == [CacheEntry(value=b"remote", fetched_at=100.0, delta=0), local_entry, None]
+    mock_connection.mget.assert_awaited_once_with(["remote", "other"])
+
+
+@pytest.mark.asyncio
+async def test_set_entry_local_cache(mocker):
+    mock_connection = mocker.AsyncMock(autospec=aioredis.Redis)
+    mock_pipeline = mocker.Mock()
+    mock_pipeline.execute = mocker.AsyncMock()
+    mock_connection.pipeline = mocker.Mock(return_value=mock_pipeline)
+    local_cache = LocalCache(ttl=10, max_entries=10, max_bytes=100)
+    service = CacheService(connection=mock_connection, local_cache=local_cache)
+    entry = CacheEntry(value=b"value", fetched_at=100.0, delta=0)
+
+    await service.set_entry(key="test", entry=entry)
+
+    mock_pipeline.set.assert_called_once_with("test", b"v2 none 100.000 0.000\nvalue", ex=CACHE_HARD_TTL)
+    mock_pipeline.publish.assert_called_once_with(CACHE_INVALIDATION_CHANNEL, invalidation_message("test"))
+    mock_pipeline.execute.assert_awaited_once()
+    assert local_cache.get("test") == CacheEntry(value=b"value", fetched_at=100.0, delta=0)
+
+
+def repository(name, score):
+    return {"score": score, "owner": "Lore", "name": name, "is_popular": False}
+
+
+@pytest.mark.asyncio
+async def test_set_org_check_org(mocker):
+    service = CacheService(connection=fakeredis.FakeAsyncRedis(), local_cache=None, access_tracker=None)
+    mocker.patch("services.cache.time.time", return_value=100.0)
+
+    stored = await service.set_org(
+        org_name="Lore", items=[repository("low", 1), repository("high", 9)], delta=0.5, etag='"1"'
+    )
+    assembled = await service.check_org(org_name="lore")
+
+    assert assembled == stored
+    assert assembled.value == (
+        b'{"score":9,"owner":"Lore","name":"high","is_popular":false}\n'
+        b'{"score":1,"owner":"Lore","name":"low","is_popular":false}\n'
+    )
+    assert (assembled.fetched_at, assembled.delta, assembled.etag) == (100.0, 0.5, '"1"')
+    assert await service.check_entry(key=repository_key("lore/HIGH")) == CacheEntry(
+        value=b'{"score":9,"owner":"Lore","name":"high","is_popular":false}', fetched_at=100.0, delta=0.5
+    )
+
+
+@pytest.mark.asyncio
+async def test_set_org_refreshes_every_repository(mocker):
+    service = CacheService(connection=fakeredis.FakeAsyncRedis(), local_cache=None, access_tracker=None)
+    time_mock = mocker.patch("services.cache.time.time", return_value=100.0)
+    await service.set_org(
+        org_name="lore", items=[repository("same", 1), repository("changed", 2), repository("gone", 3)]
+    )
+    await service.set_repositories(
+        values={"lore/same": repository("same", 1)}, validators={"lore/same": ('"a"', None)}
+    )
+
+    time_mock.return_value = 100.0 + CACHE_SOFT_TTL
+    await service.set_org(org_name="lore", items=[repository("same", 1), repository("changed", 5)])
+
+    same, changed = await service.check_many(keys=[repository_key("Lore/same"), repository_key("Lore/changed")])
+    assert (same.fetched_at, changed.fetched_at) == (100.0 + CACHE_SOFT_TTL, 100.0 + CACHE_SOFT_TTL)
+    assert not same.is_stale and not changed.is_stale
+    assert (same.etag, changed.etag) == ('"a"', None)
+    assert await service.connection.zrevrange(org_index_key("lore"), 0, -1, withscores=True) == [
+        (b"lore/changed", 5.0),
+        (b"lore/same", 1.0),
+    ]
+    assert (await service.check_org(org_name="lore")).value.count(b"\n") == 2
+
+
+@pytest.mark.asyncio
+async def test_check_org_missing_repository_entry():
+    service = CacheService(connection=fakeredis.FakeAsyncRedis(), local_cache=None, access_tracker=None)
+    await service.set_org(org_name="lore", items=[repository("first", 1), repository("second", 2)])
+
+    await service.connection.delete(repository_key("Lore/first"))
+
+    assert await service.check_org(org_name="lore") is None
+    assert await service.org_size(org_name="Lore") == 2
+    assert await service.org_size(org_name="other") == 0
+
+
+@pytest.mark.asyncio
+async def test_check_org_empty():
+    service = CacheService(connection=fakeredis.FakeAsyncRedis(), local_cache=None, access_tracker=None)
+
+    assert await service.check_org(org_name="lore") is None
+    await service.set_org(org_name="lore", items=[])
+    assert (await service.check_org(org_name="lore")).value == b""
+
+
+@pytest.mark.asyncio
+async def test_set_repositories_moves_them_in_cached_org_index():
+    service = CacheService(connection=fakeredis.FakeAsyncRedis(), local_cache=None, access_tracker=None)
+    await service.set_org(org_name="lore", items=[repository("first", 1), repository("second", 2)])
+
+    await service.set_repositories(
+        values={"lore/first": repository("first", 7), "other/repo": {**repository("repo", 3), "owner": "other"}},
+        validators={"lore/first": ('"abc"', None)},
+    )
+
+    assert (await service.check_entry(key=repository_key("lore/first"))).etag == '"abc"'
+    assert (await service.check_org(org_name="lore")).value.startswith(b'{"score":7')
+    assert not await service.connection.exists(org_index_key("other"))
+
+
+@pytest.mark.asyncio
+async def test_set_repositories_moves_them_in_org_index_whatever_the_casing():
+    service = CacheService(connection=fakeredis.FakeAsyncRedis(), local_cache=None, access_tracker=None)
+    await service.set_org(org_name="Lore", items=[repository("First", 1), repository("second", 2)])
+
+    await service.set_repositories(values={"lore/first": {**repository("first", 7), "owner": "lore"}})
+
+    assert await service.connection.zrevrange(org_index_key("lore"), 0, -1, withscores=True) == [
+        (b"lore/first", 7.0),
+        (b"lore/second", 2.0),
+    ]
+    entry, values, _ = await service.query_org(org_name="LORE", min_score=5)
+    assert [json.loads(value)["score"] for value in values] == [7]
+
+
+@pytest.mark.asyncio
+async def test_set_repositories_invalidates_local_org():
+    service = CacheService(connection=fakeredis.FakeAsyncRedis(), local_cache=LocalCache(), access_tracker=None)
+    await service.set_org(org_name="lore", items=[repository("first", 1), repository("second", 2)])
+    await service.check_org(org_name="lore")
+    pubsub = service.connection.pubsub()
+    await pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+    await pubsub.get_message(timeout=1)
+
+    await service.set_repositories(values={"lore/first": repository("first", 7)})
+
+    assert service.local_cache.get(org_key("lore")) is None
+    assert (await service.check_org(org_name="lore")).value.startswith(b'{"score":7')
+    messages = [await pubsub.get_message(timeout=1) for _ in range(2)]
+    assert invalidation_message(org_key("lore")).encode("utf-8") in [message["data"] for message in messages]
+
+
+@pytest.mark.asyncio
+async def test_invalidate():
+    service = CacheService(connection=fakeredis.FakeAsyncRedis(), local_cache=LocalCache(), access_tracker=None)
+    await service.set_org(org_name="lore", items=[repository("first", 1), repository("second", 2)])
+
+    await service.invalidate(keys=[repository_key("lore/first"), org_key("lore")])
+
+    assert await service.check_entry(key=repository_key("lore/first")) is None
+    assert await service.check_org(org_name="lore") is None
+    assert await service.check_entry(key=repository_key("lore/second")) is not None
+
+
+@pytest.mark.asyncio
+async def test_webhook_owners_keep_entries_longer(mocker):
+    mocker.patch("services.cache.GITHUB_WEBHOOK_OWNERS", {"lore"})
+    service = CacheService(connection=fakeredis.FakeAsyncRedis(), local_cache=None, access_tracker=None)
+
+    await service.set_org(org_name="Lore", items=[repository("first", 1)])
+    await service.set_repositories(values={"other/repo": {**repository("repo", 3), "owner": "other"}})
+
+    assert await service.connection.ttl(org_key("lore")) == CACHE_WEBHOOK_HARD_TTL
+    assert await service.connection.ttl(org_index_key("lore")) == CACHE_WEBHOOK_HARD_TTL
+    assert await service.connection.ttl(repository_key("lore/first")) == CACHE_WEBHOOK_HARD_TTL
+    assert await service.connection.ttl(repository_key("other/repo")) == CACHE_HARD_TTL
+    assert (await service.check_entry(key=repository_key("lore/first"))).soft_ttl == CACHE_WEBHOOK_SOFT_TTL
+    assert (await service.check_org(org_name="lore")).soft_ttl == CACHE_WEBHOOK_SOFT_TTL
+    assert (await service.check_entry(key=repository_key("other/repo"))).soft_ttl == CACHE_SOFT_TTL
+
+
+@pytest.mark.asyncio
+async def test_renew_org(mocker):
+    service = CacheService(connection=fakeredis.FakeAsyncRedis(), local_cache=None, access_tracker=None)
+    time_mock = mocker.patch("services.cache.time.time", return_value=100.0)
+    await service.set_org(org_name="lore", items=[repository("first", 1)], etag='"1"')
+    await service.connection.persist(repository_key("Lore/first"))
+
+    time_mock.return_value = 200.0
+    renewed = await service.renew_org(org_name="lore", entry=await service.check_org(org_name="lore"))
+
+    assert renewed == await service.check_org(org_name="lore")
+    assert (renewed.value, renewed.fetched_at, renewed.etag) == (
+        b'{"score":1,"owner":"Lore","name":"first","is_popular":false}\n',
+        200.0,
+        '"1"',
+    )
+    assert await service.connection.ttl(repository_key("Lore/first")) == CACHE_HARD_TTL
+    assert (await service.check_entry(key=repository_key("Lore/first"))).fetched_at == 200.0
+    assert await service.connection.get(org_key("lore")) == b'v2 none 200.000 0.000 "1"\n1'
+
+
+@pytest.mark.asyncio
+async def test_renew_org_missing_repository_entry(mocker):
+    service = CacheService(connection=fakeredis.FakeAsyncRedis(), local_cache=None, access_tracker=None)
+    await service.set_org(org_name="lore", items=[repository("first", 1)])
+    entry = await service.check_org(org_name="lore")
+    await service.connection.delete(repository_key("Lore/first"))
+
+    assert await service.renew_org(org_name="lore", entry=entry) is None
+
+
+@pytest.mark.parametrize(
+    "kwargs, names, following",
+    [
+        ({}, [b"d", b"c", b"b", b"a"], None),
+        ({"min_score": 2}, [b"d", b"c", b"b"], None),
+        ({"limit": 2}, [b"d", b"c"], (2.0, 1)),
+        ({"limit": 2, "after": (2.0, 1)}, [b"b", b"a"], None),
+        ({"limit": 1, "after": (2.0, 1)}, [b"b"], (2.0, 2)),
+        ({"descending": False, "limit": 2}, [b"a", b"b"], (2.0, 1)),
+        ({"descending": False, "limit": 2, "after": (2.0, 1)}, [b"c", b"d"], None),
+    ],
+)
+@pytest.mark.asyncio
+async def test_query_org(kwargs, names, following):
+    service = CacheService(connection=fakeredis.FakeAsyncRedis(), local_cache=None, access_tracker=None)
+    await service.set_org(
+        org_name="lore", items=[repository("a", 1), repository("b", 2), repository("c", 2), repository("d", 3)]
+    )
+
+    entry, values, next_position = await service.query_org(org_name="lore", **kwargs)
+
+    assert entry.value == b"4"
+    assert [json.loads(value)["name"].encode("utf-8") for value in values] == names
+    assert next_position == following
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {},
+        {"min_score": 2},
+        {"limit": 2},
+        {"limit": 2, "after": (2.0, 1)},
+        {"limit": 1, "after": (2.0, 1)},
+        {"descending": False, "limit": 2},
+        {"descending": False, "limit": 2, "after": (2.0, 1)},
+    ],
+)
+@pytest.mark.asyncio
+async def test_query_body_matches_query_org(kwargs):
+    service = CacheService(connection=fakeredis.FakeAsyncRedis(), local_cache=None, access_tracker=None)
+    org = await service.set_org(
+        org_name="lore", items=[repository("d", 1), repository("b", 2), repository("c", 2), repository("a", 3)]
+    )
+
+    _, values, following = await service.query_org(org_name="lore", **kwargs)
+
+    assert query_body(org.value, **kwargs) == (values, following)
+
+
+@pytest.mark.asyncio
+async def test_query_org_not_cached():
+    service = CacheService(connection=fakeredis.FakeAsyncRedis(), local_cache=None, access_tracker=None)
+
+    assert await service.query_org(org_name="lore", limit=10) is None
+
+
+@pytest.mark.asyncio
+async def test_check_many_cluster(mocker):
+    mock_connection = mocker.AsyncMock(spec=RedisCluster)
+    service = CacheService(connection=mock_connection, local_cache=None, access_tracker=None)
+
+    mock_connection.mget_nonatomic.return_value = [b"100.000 0.000\nrepo", None]
+    response = await service.check_many(keys=["repo:lore/a", "repo:other/b"])
+
+    assert response == [CacheEntry(value=b"repo", fetched_at=100.0, delta=0), None]
+    mock_connection.mget_nonatomic.assert_awaited_once_with(["repo:lore/a", "repo:other/b"])
+    mock_connection.mget.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_redis_unreachable_bypasses_cache(mocker):
+    mock_connection = mocker.AsyncMock(autospec=aioredis.Redis)
+    mock_connection.get.side_effect = RedisConnectionError("refused")
+    mock_connection.mget.side_effect = RedisTimeoutError("timed out")
+    breaker = CircuitBreaker(name="redis", failure_threshold=2, reset_timeout=5)
+    service = CacheService(connection=mock_connection, local_cache=None, access_tracker=None, circuit_breaker=breaker)
+
+    assert await service.check_entry(key="repo:lore/test") is None
+    assert await service.check_many(keys=["repo:lore/a", "repo:lore/b"]) == [None, None]
+    assert breaker.state == "open"
+
+    assert await service.check_entry(key="repo:lore/test") is None
+    await service.set_entry(key="repo:lore/test", entry=CacheEntry(value=b"{}", fetched_at=time.time(), delta=0))
+    mock_connection.get.assert_awaited_once()
+    mock_connection.set.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_set_org_bypassed_returns_org(mocker):
+    breaker = CircuitBreaker(name="redis", failure_threshold=1, reset_timeout=5)
+    breaker.record_failure()
+    connection = fakeredis.FakeAsyncRedis()
+    service = CacheService(connection=connection, local_cache=None, access_tracker=None, circuit_breaker=breaker)
+
+    entry = await service.set_org(org_name="lore", items=[repository("low", 1), repository("high", 9)], etag='"1"')
 
-    assert response == "{'test': 'test'}"
-    mock_connection.get.assert_called_once_with("test")
+    assert entry.value == (
+        b'{"score":9,"owner":"Lore","name":"high","is_popular":false}\n'
+        b'{"score":1,"owner":"Lore","name":"low","is_popular":false}\n'
+    )
+    assert entry.etag == '"1"'
+    assert await connection.keys() == []
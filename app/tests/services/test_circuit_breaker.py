@@ -0,0 +1,58 @@
+import pytest
+from services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, circuit_breakers
+
+
+@pytest.fixture
+def clock(mocker):
+    clock = mocker.patch("services.circuit_breaker.time.monotonic", return_value=100.0)
+    return clock
+
+
+def test_opens_after_failure_threshold(clock):
+    breaker = CircuitBreaker(name="test", failure_threshold=3, reset_timeout=10)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.snapshot() == {"state": OPEN, "failures": 3, "retry_after": 10.0}
+
+
+@pytest.mark.parametrize("trial_succeeds, expected", [(True, CLOSED), (False, OPEN)])
+def test_half_open_trial(clock, trial_succeeds, expected):
+    breaker = CircuitBreaker(name="test", failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+
+    clock.return_value = 110.0
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_success() if trial_succeeds else breaker.record_failure()
+    assert breaker.state == expected
+    assert breaker.allow() is trial_succeeds
+
+
+def test_lost_trial_replaced_after_reset_timeout(clock):
+    breaker = CircuitBreaker(name="test", failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    clock.return_value = 110.0
+    assert breaker.allow()
+
+    clock.return_value = 119.0
+    assert not breaker.allow()
+    clock.return_value = 120.0
+    assert breaker.allow()
+
+
+def test_circuit_breakers_shared():
+    breakers = circuit_breakers()
+
+    assert sorted(breakers) == ["github", "redis"]
+    assert circuit_breakers()["github"] is breakers["github"]
@@ -0,0 +1,63 @@
+import pytest
+from services.cache import CacheEntry
+from services.codec import check_settings, compress, decompress, dumps, get_codec
+
+
+@pytest.mark.parametrize("compression", ["zstd", "lz4"])
+def test_compress_above_threshold(mocker, compression):
+    mocker.patch("services.codec.CACHE_COMPRESSION", compression)
+    mocker.patch("services.codec.CACHE_COMPRESSION_THRESHOLD", 100)
+    value = b'{"score":5,"owner":"lore","name":"test","is_popular":false}\n' * 10
+
+    name, compressed = compress(value)
+
+    assert name == compression
+    assert len(compressed) < len(value)
+    assert decompress(name, compressed) == value
+    assert compress(value[:50]) == ("none", value[:50])
+
+
+def test_compress_disabled():
+    assert compress(b"{}" * 10000) == ("none", b"{}" * 10000)
+
+
+def test_get_codec_unknown():
+    with pytest.raises(ValueError):
+        get_codec("gzip")
+
+
+@pytest.mark.parametrize("serializer, compression", [("msgpack", "none"), ("json", "gzip")])
+def test_check_settings_unknown(serializer, compression):
+    with pytest.raises(ValueError):
+        check_settings(serializer=serializer, compression=compression)
+
+
+def test_check_settings():
+    check_settings(serializer="orjson", compression="zstd")
+    check_settings(serializer="json", compression="none")
+
+
+def test_cache_entry_compressed_round_trip(mocker):
+    mocker.patch("services.codec.CACHE_COMPRESSION", "zstd")
+    mocker.patch("services.codec.CACHE_COMPRESSION_THRESHOLD", 10)
+    entry = CacheEntry(value=b'{"test":"test"}\n' * 10, fetched_at=100.0, delta=0.25, etag='"abc"')
+
+    raw = entry.encode()
+
+    assert raw.startswith(b'v2 zstd 100.000 0.250 "abc"\n')
+    assert CacheEntry.decode(raw) == entry
+
+
+def test_cache_entry_uncompressed_is_versioned(mocker):
+    mocker.patch("services.codec.CACHE_COMPRESSION", "zstd")
+    entry = CacheEntry(value=b"{}", fetched_at=100.0, delta=0.25)
+
+    assert entry.encode() == b"v2 none 100.000 0.250\n{}"
+
+
+def test_cache_entry_corrupt_compressed_is_miss():
+    assert CacheEntry.decode(b"v2 zstd 100.000 0.250\nnot zstd") is None
+
+
+def test_dumps_is_compact():
+    assert dumps({"test": "test", "items": [1, 2]}) == b'{"test":"test","items":[1,2]}'
@@ -1,30 +1,71 @@
+import json
+
+import httpx
 import pytest
 from config import GITHUB_API_ACCESS_TOKEN, GITHUB_API_URL
 from exceptions import (
+    CircuitOpenException,
     GitHubServiceRequestException,
     RepositoryNameException,
     RequestForbiddenException,
     RequestMovedPermanently,
     RequestNotFoundException,
+    RequestNotModified,
+    RequestRateLimited,
 )
+from prometheus_client import REGISTRY
 from schemas.github import GitHupApiOrgResponse, GitHupApiResponse
-from services.github import GitHubService
+from services.circuit_breaker import CircuitBreaker
+from services.github import GitHubService, close_client, endpoint_name, get_client
+from services.rate_limit import RateLimiter
+from services.token_pool import TokenPool
 
 
-def test_get_info(requests_mock):
-    requests_mock.get(f"{GITHUB_API_URL}/repos/test/test", json={"stargazers_count": 0, "forks_count": 0})
+@pytest.mark.asyncio
+async def test_get_info(respx_mock):
+    respx_mock.get(f"{GITHUB_API_URL}/repos/test/test").mock(
+        return_value=httpx.Response(200, json={"stargazers_count": 0, "forks_count": 0})
+    )
     service = GitHubService(url=GITHUB_API_URL, access_token=GITHUB_API_ACCESS_TOKEN)
-    result = service.get_info(repository_name="test/test")
+    result = await service.get_info(repository_name="test/test")
 
     assert result == GitHupApiResponse(stars=0, forks=0, owner="test", name="test")
 
 
-def test_get_info_repository_name_invalid(requests_mock):
-    requests_mock.get(f"{GITHUB_API_URL}/repos/test/test", json={"stargazers_count": 0, "forks_count": 0})
+@pytest.mark.asyncio
+async def test_get_info_sends_validators_and_keeps_the_new_ones(respx_mock):
+    route = respx_mock.get(f"{GITHUB_API_URL}/repos/test/test").mock(
+        return_value=httpx.Response(
+            200,
+            json={"stargazers_count": 0, "forks_count": 0},
+            headers={"ETag": '"new"', "Last-Modified": "Tue, 01 Sep 2026 10:00:00 GMT"},
+        )
+    )
+    service = GitHubService(url=GITHUB_API_URL, access_token=GITHUB_API_ACCESS_TOKEN)
+    result = await service.get_info(repository_name="test/test", etag='"old"')
+
+    assert route.calls.last.request.headers["If-None-Match"] == '"old"'
+    assert result.etag == '"new"'
+    assert result.last_modified == "Tue, 01 Sep 2026 10:00:00 GMT"
+
+
+@pytest.mark.asyncio
+async def test_get_info_not_modified(respx_mock):
+    route = respx_mock.get(f"{GITHUB_API_URL}/repos/test/test").mock(return_value=httpx.Response(304))
+    service = GitHubService(url=GITHUB_API_URL, access_token=GITHUB_API_ACCESS_TOKEN)
+
+    with pytest.raises(RequestNotModified):
+        await service.get_info(repository_name="test/test", last_modified="Tue, 01 Sep 2026 10:00:00 GMT")
+
+    assert route.calls.last.request.headers["If-Modified-Since"] == "Tue, 01 Sep 2026 10:00:00 GMT"
+
+
+@pytest.mark.asyncio
+async def test_get_info_repository_name_invalid(respx_mock):
     service = GitHubService(url=GITHUB_API_URL, access_token=GITHUB_API_ACCESS_TOKEN)
 
     with pytest.raises(RepositoryNameException):
-        service.get_info(repository_name="lore ipsum")
+        await service.get_info(repository_name="lore ipsum")
 
 
 @pytest.mark.parametrize(
@@ -36,31 +77,98 @@ def test_get_info_repository_name_invalid(requests_mock):
         (500, GitHubServiceRequestException),
     ],
 )
-def test_get_info_github_request_fail(requests_mock, status_code, custom_exception):
+@pytest.mark.asyncio
+async def test_get_info_github_request_fail(respx_mock, status_code, custom_exception):
 
-    requests_mock.get(f"{GITHUB_API_URL}/repos/test/test", status_code=status_code)
+    respx_mock.get(f"{GITHUB_API_URL}/repos/test/test").mock(return_value=httpx.Response(status_code))
     service = GitHubService(url=GITHUB_API_URL, access_token=GITHUB_API_ACCESS_TOKEN)
 
     with pytest.raises(custom_exception):
-        service.get_info(repository_name="test/test")
+        await service.get_info(repository_name="test/test")
 
 
-def test_get_info_github_request_fail_invalid(requests_mock):
-    requests_mock.get(f"{GITHUB_API_URL}/repos/test/test", exc=Exception)
+@pytest.mark.asyncio
+async def test_get_info_github_request_fail_invalid(respx_mock):
+    respx_mock.get(f"{GITHUB_API_URL}/repos/test/test").mock(side_effect=Exception)
     service = GitHubService(url=GITHUB_API_URL, access_token=GITHUB_API_ACCESS_TOKEN)
 
     with pytest.raises(GitHubServiceRequestException):
-        service.get_info(repository_name="test/test")
+        await service.get_info(repository_name="test/test")
+
+
+@pytest.mark.asyncio
+async def test_iter_org_pages(respx_mock):
+    respx_mock.get(f"{GITHUB_API_URL}/orgs/test/repos").mock(
+        return_value=httpx.Response(
+            200, json=[{"stargazers_count": 0, "forks_count": 0, "name": "test", "owner": {"login": "Test"}}]
+        )
+    )
+    service = GitHubService(url=GITHUB_API_URL, access_token=GITHUB_API_ACCESS_TOKEN)
+    pages = [page async for page in service.iter_org_pages(org_name="test")]
+
+    assert pages == [
+        GitHupApiOrgResponse(items=[GitHupApiResponse(stars=0, forks=0, owner="Test", name="test")], page=1)
+    ]
+
+
+def org_page_response(page, last_page):
+    link = f'<{GITHUB_API_URL}/orgs/test/repos?per_page=100&page={last_page}>; rel="last"'
+    return httpx.Response(
+        200,
+        json=[{"stargazers_count": page, "forks_count": 0, "name": f"test-{page}", "owner": {"login": "Test"}}],
+        headers={"Link": link},
+    )
+
+
+@pytest.mark.asyncio
+async def test_iter_org_pages_paginated(respx_mock):
+    for page in range(1, 4):
+        respx_mock.get(f"{GITHUB_API_URL}/orgs/test/repos", params={"per_page": 100, "page": page}).mock(
+            return_value=org_page_response(page=page, last_page=3)
+        )
+    service = GitHubService(url=GITHUB_API_URL, access_token=GITHUB_API_ACCESS_TOKEN, page_concurrency=2)
+    items = [item async for page in service.iter_org_pages(org_name="test") for item in page.items]
+
+    assert sorted(items, key=lambda item: item.name) == [
+        GitHupApiResponse(stars=page, forks=0, owner="Test", name=f"test-{page}") for page in range(1, 4)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_iter_org_pages_yields_first_page_before_the_rest(respx_mock):
+    respx_mock.get(f"{GITHUB_API_URL}/orgs/test/repos", params={"page": 1}).mock(
+        return_value=org_page_response(page=1, last_page=2)
+    )
+    later_page = respx_mock.get(f"{GITHUB_API_URL}/orgs/test/repos", params={"page": 2}).mock(
+        return_value=org_page_response(page=2, last_page=2)
+    )
+    service = GitHubService(url=GITHUB_API_URL, access_token=GITHUB_API_ACCESS_TOKEN)
+    pages = service.iter_org_pages(org_name="test")
+
+    first_page = await pages.__anext__()
+
+    assert first_page == GitHupApiOrgResponse(
+        items=[GitHupApiResponse(stars=1, forks=0, owner="Test", name="test-1")], page=1
+    )
+    assert not later_page.called
+    assert [page async for page in pages] == [
+        GitHupApiOrgResponse(items=[GitHupApiResponse(stars=2, forks=0, owner="Test", name="test-2")], page=2)
+    ]
 
 
-def test_get_org_info(requests_mock):
-    requests_mock.get(
-        f"{GITHUB_API_URL}/orgs/test/repos", json=[{"stargazers_count": 0, "forks_count": 0, "name": "test"}]
+@pytest.mark.asyncio
+async def test_iter_org_pages_later_page_fail(respx_mock):
+    respx_mock.get(f"{GITHUB_API_URL}/orgs/test/repos", params={"page": 1}).mock(
+        return_value=org_page_response(page=1, last_page=3)
     )
+    respx_mock.get(f"{GITHUB_API_URL}/orgs/test/repos", params={"page": 2}).mock(
+        return_value=org_page_response(page=2, last_page=3)
+    )
+    respx_mock.get(f"{GITHUB_API_URL}/orgs/test/repos", params={"page": 3}).mock(return_value=httpx.Response(500))
     service = GitHubService(url=GITHUB_API_URL, access_token=GITHUB_API_ACCESS_TOKEN)
-    result = service.get_org_info(org_name="test")
 
-    assert result == GitHupApiOrgResponse(items=[GitHupApiResponse(stars=0, forks=0, owner="test", name="test")])
+    with pytest.raises(GitHubServiceRequestException):
+        [page async for page in service.iter_org_pages(org_name="test")]
 
 
 @pytest.mark.parametrize(
@@ -72,18 +180,259 @@ def test_get_org_info(requests_mock):
         (500, GitHubServiceRequestException),
     ],
 )
-def test_get_org_info_github_request_fail(requests_mock, status_code, custom_exception):
+@pytest.mark.asyncio
+async def test_iter_org_pages_github_request_fail(respx_mock, status_code, custom_exception):
 
-    requests_mock.get(f"{GITHUB_API_URL}/orgs/test/repos", status_code=status_code)
+    respx_mock.get(f"{GITHUB_API_URL}/orgs/test/repos").mock(return_value=httpx.Response(status_code))
     service = GitHubService(url=GITHUB_API_URL, access_token=GITHUB_API_ACCESS_TOKEN)
 
     with pytest.raises(custom_exception):
-        service.get_org_info(org_name="test")
+        [page async for page in service.iter_org_pages(org_name="test")]
 
 
-def test_get_org_info_github_request_fail_invalid(requests_mock):
-    requests_mock.get(f"{GITHUB_API_URL}/orgs/test/repos", exc=Exception)
+@pytest.mark.asyncio
+async def test_iter_org_pages_github_request_fail_invalid(respx_mock):
+    respx_mock.get(f"{GITHUB_API_URL}/orgs/test/repos").mock(side_effect=Exception)
     service = GitHubService(url=GITHUB_API_URL, access_token=GITHUB_API_ACCESS_TOKEN)
 
     with pytest.raises(GitHubServiceRequestException):
-        service.get_org_info(org_name="test")
+        [page async for page in service.iter_org_pages(org_name="test")]
+
+
+@pytest.mark.asyncio
+async def test_get_client_is_shared():
+    await close_client()
+    client = get_client()
+
+    assert GitHubService().client is client
+    assert GitHubService().client is client
+    await close_client()
+    assert client.is_closed
+    assert get_client() is not client
+
+
+@pytest.mark.asyncio
+async def test_request_counts_connection_reuse():
+    connections_opened = []
+
+    async def handler(request):
+        if not connections_opened:
+            connections_opened.append(request.url)
+            await request.extensions["trace"]("connection.connect_tcp.started", {})
+        return httpx.Response(200, json={"stargazers_count": 0, "forks_count": 0})
+
+    new_before = REGISTRY.get_sample_value("github_http_requests_total", {"connection": "new"}) or 0
+    reused_before = REGISTRY.get_sample_value("github_http_requests_total", {"connection": "reused"}) or 0
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    service = GitHubService(url=GITHUB_API_URL, access_token=GITHUB_API_ACCESS_TOKEN, client=client)
+
+    await service.get_info(repository_name="test/test")
+    await service.get_info(repository_name="test/test")
+
+    assert REGISTRY.get_sample_value("github_http_requests_total", {"connection": "new"}) == new_before + 1
+    assert REGISTRY.get_sample_value("github_http_requests_total", {"connection": "reused"}) == reused_before + 1
+
+
+@pytest.mark.parametrize("second_status, expected", [(304, True), (200, False)])
+@pytest.mark.asyncio
+async def test_org_not_modified(respx_mock, second_status, expected):
+    first = respx_mock.get(f"{GITHUB_API_URL}/orgs/test/repos", params={"page": 1}).mock(
+        return_value=httpx.Response(304)
+    )
+    respx_mock.get(f"{GITHUB_API_URL}/orgs/test/repos", params={"page": 2}).mock(
+        return_value=httpx.Response(second_status, json=[])
+    )
+    service = GitHubService(url=GITHUB_API_URL, access_token=GITHUB_API_ACCESS_TOKEN)
+
+    assert await service.org_not_modified(org_name="test", etags=['"1"', '"2"']) is expected
+    assert first.calls.last.request.headers["If-None-Match"] == '"1"'
+
+
+@pytest.mark.asyncio
+async def test_request_retries_secondary_rate_limit(respx_mock, mocker):
+    route = respx_mock.get(f"{GITHUB_API_URL}/repos/test/test").mock(
+        side_effect=[
+            httpx.Response(403, headers={"Retry-After": "1"}),
+            httpx.Response(200, json={"stargazers_count": 0, "forks_count": 0}),
+        ]
+    )
+    mocker.patch("services.rate_limit.random.uniform", return_value=0.5)
+    sleep = mocker.patch("services.github.asyncio.sleep")
+    service = GitHubService(
+        url=GITHUB_API_URL, access_token=GITHUB_API_ACCESS_TOKEN, rate_limiter=RateLimiter(max_wait=5), retries=2
+    )
+    mocker.patch.object(service.rate_limiter, "acquire")
+
+    result = await service.get_info(repository_name="test/test")
+
+    assert result == GitHupApiResponse(stars=0, forks=0, owner="test", name="test")
+    assert route.call_count == 2
+    sleep.assert_awaited_once_with(1)
+
+
+@pytest.mark.asyncio
+async def test_request_does_not_retry_exhausted_quota(respx_mock, mocker):
+    route = respx_mock.get(f"{GITHUB_API_URL}/repos/test/test").mock(
+        return_value=httpx.Response(403, headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "160"})
+    )
+    mocker.patch("services.rate_limit.time.time", return_value=100.0)
+    service = GitHubService(
+        url=GITHUB_API_URL, access_token=GITHUB_API_ACCESS_TOKEN, rate_limiter=RateLimiter(max_wait=5), retries=2
+    )
+
+    with pytest.raises(RequestRateLimited) as ex:
+        await service.get_info(repository_name="test/test")
+
+    assert ex.value.retry_after == 60
+    assert route.call_count == 1
+    assert service.token_pool.budget_low
+
+
+@pytest.mark.asyncio
+async def test_request_switches_token_when_rejected(respx_mock):
+    route = respx_mock.get(f"{GITHUB_API_URL}/repos/test/test").mock(
+        side_effect=[
+            httpx.Response(401, json={"message": "Bad credentials"}),
+            httpx.Response(200, json={"stargazers_count": 0, "forks_count": 0}),
+        ]
+    )
+    service = GitHubService(
+        url=GITHUB_API_URL, token_pool=TokenPool(tokens=["invalid", "valid"]), rate_limiter=RateLimiter(), retries=2
+    )
+
+    await service.get_info(repository_name="test/test")
+
+    assert [call.request.headers["Authorization"] for call in route.calls] == ["token invalid", "token valid"]
+    assert service.token_pool.available() == [service.token_pool.tokens[1]]
+
+
+@pytest.mark.asyncio
+async def test_get_many_info(respx_mock):
+    respx_mock.get(f"{GITHUB_API_URL}/repos/test/test").mock(
+        return_value=httpx.Response(200, json={"stargazers_count": 1, "forks_count": 2})
+    )
+    respx_mock.get(f"{GITHUB_API_URL}/repos/test/missing").mock(return_value=httpx.Response(404))
+    service = GitHubService(url=GITHUB_API_URL, access_token=GITHUB_API_ACCESS_TOKEN)
+
+    result = await service.get_many_info(repository_names=["test/test", "test/missing", "invalid"], concurrency=2)
+
+    assert result[0] == GitHupApiResponse(stars=1, forks=2, owner="test", name="test")
+    assert isinstance(result[1], RequestNotFoundException)
+    assert isinstance(result[2], RepositoryNameException)
+
+
+@pytest.mark.asyncio
+async def test_get_many_info_graphql(respx_mock, mocker):
+    route = respx_mock.post(f"{GITHUB_API_URL}/graphql").mock(
+        return_value=httpx.Response(
+            200,
+            json={
+                "data": {"r0": {"stargazerCount": 1, "forkCount": 2}, "r1": None},
+                "errors": [{"type": "NOT_FOUND", "path": ["r1"], "message": "Could not resolve to a Repository"}],
+            },
+        )
+    )
+    mocker.patch("services.github.GITHUB_GRAPHQL_BATCH_SIZE", 2)
+    service = GitHubService(url=GITHUB_API_URL, access_token=GITHUB_API_ACCESS_TOKEN, graphql=True)
+
+    result = await service.get_many_info(repository_names=["test/test", "invalid", "test/missing"], concurrency=2)
+
+    assert result[0] == GitHupApiResponse(stars=1, forks=2, owner="test", name="test")
+    assert isinstance(result[1], RepositoryNameException)
+    assert isinstance(result[2], RequestNotFoundException)
+    assert route.call_count == 1
+    assert json.loads(route.calls.last.request.content)["variables"] == {
+        "o0": "test",
+        "n0": "test",
+        "o1": "test",
+        "n1": "missing",
+    }
+
+
+@pytest.mark.asyncio
+async def test_iter_org_pages_graphql(respx_mock):
+    def org_page(nodes, end_cursor):
+        repositories = {"pageInfo": {"hasNextPage": end_cursor is not None, "endCursor": end_cursor}, "nodes": nodes}
+        return httpx.Response(200, json={"data": {"organization": {"login": "Test", "repositories": repositories}}})
+
+    route = respx_mock.post(f"{GITHUB_API_URL}/graphql").mock(
+        side_effect=[
+            org_page([{"name": "test-1", "stargazerCount": 1, "forkCount": 0}], "cursor-1"),
+            org_page([{"name": "test-2", "stargazerCount": 2, "forkCount": 0}], None),
+        ]
+    )
+    service = GitHubService(url=GITHUB_API_URL, access_token=GITHUB_API_ACCESS_TOKEN, graphql=True)
+
+    pages = [page async for page in service.iter_org_pages(org_name="test")]
+
+    assert pages == [
+        GitHupApiOrgResponse(items=[GitHupApiResponse(stars=1, forks=0, owner="Test", name="test-1")], page=1),
+        GitHupApiOrgResponse(items=[GitHupApiResponse(stars=2, forks=0, owner="Test", name="test-2")], page=2),
+    ]
+    assert [json.loads(call.request.content)["variables"]["cursor"] for call in route.calls] == [None, "cursor-1"]
+
+
+@pytest.mark.asyncio
+async def test_iter_org_pages_graphql_not_found(respx_mock):
+    respx_mock.post(f"{GITHUB_API_URL}/graphql").mock(
+        return_value=httpx.Response(200, json={"data": {"organization": None}, "errors": [{"type": "NOT_FOUND"}]})
+    )
+    service = GitHubService(url=GITHUB_API_URL, access_token=GITHUB_API_ACCESS_TOKEN, graphql=True)
+
+    with pytest.raises(RequestNotFoundException):
+        [page async for page in service.iter_org_pages(org_name="test")]
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        (f"{GITHUB_API_URL}/repos/test/test", "repository"),
+        (f"{GITHUB_API_URL}/orgs/test/repos", "org_repos"),
+        (f"{GITHUB_API_URL}/graphql", "graphql"),
+        (f"{GITHUB_API_URL}/rate_limit", "other"),
+    ],
+)
+def test_endpoint_name(url, expected):
+    assert endpoint_name(url) == expected
+
+
+@pytest.mark.asyncio
+async def test_request_duration(respx_mock):
+    respx_mock.get(f"{GITHUB_API_URL}/repos/test/missing").mock(return_value=httpx.Response(404))
+    labels = {"endpoint": "repository", "status": "404"}
+    before = REGISTRY.get_sample_value("github_request_duration_seconds_count", labels) or 0
+    service = GitHubService(url=GITHUB_API_URL, access_token=GITHUB_API_ACCESS_TOKEN)
+
+    with pytest.raises(RequestNotFoundException):
+        await service.get_info(repository_name="test/missing")
+
+    assert REGISTRY.get_sample_value("github_request_duration_seconds_count", labels) == before + 1
+    assert REGISTRY.get_sample_value("github_requests_in_flight") == 0
+
+
+@pytest.mark.asyncio
+async def test_request_circuit_open(respx_mock):
+    route = respx_mock.get(f"{GITHUB_API_URL}/repos/test/test").mock(return_value=httpx.Response(502))
+    breaker = CircuitBreaker(name="github", failure_threshold=2, reset_timeout=30)
+    service = GitHubService(url=GITHUB_API_URL, access_token=GITHUB_API_ACCESS_TOKEN, circuit_breaker=breaker)
+
+    for _ in range(2):
+        with pytest.raises(GitHubServiceRequestException):
+            await service.get_info(repository_name="test/test")
+    with pytest.raises(CircuitOpenException) as ex:
+        await service.get_info(repository_name="test/test")
+
+    assert route.call_count == 2
+    assert 0 < ex.value.retry_after <= 30
+
+
+@pytest.mark.asyncio
+async def test_request_client_errors_keep_circuit_closed(respx_mock):
+    respx_mock.get(f"{GITHUB_API_URL}/repos/test/test").mock(return_value=httpx.Response(404))
+    breaker = CircuitBreaker(name="github", failure_threshold=1, reset_timeout=30)
+    service = GitHubService(url=GITHUB_API_URL, access_token=GITHUB_API_ACCESS_TOKEN, circuit_breaker=breaker)
+
+    with pytest.raises(RequestNotFoundException):
+        await service.get_info(repository_name="test/test")
+
+    assert breaker.state == "closed"
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+from services.local_cache import LocalCache, invalidation_message, listen_for_invalidations
+
+
+def test_get_set():
+    cache = LocalCache(ttl=10, max_entries=10, max_bytes=100)
+
+    cache.set("test", "value", size=5)
+
+    assert cache.get("test") == "value"
+    assert cache.get("other") is None
+    assert cache.size == 5
+
+
+def test_get_expired(mocker):
+    cache = LocalCache(ttl=10, max_entries=10, max_bytes=100)
+    monotonic = mocker.patch("services.local_cache.time.monotonic", return_value=100.0)
+
+    cache.set("test", "value", size=5)
+    monotonic.return_value = 110.0
+
+    assert cache.get("test") is None
+    assert cache.size == 0
+
+
+def test_set_evicts_least_recently_used_by_entries():
+    cache = LocalCache(ttl=10, max_entries=2, max_bytes=100)
+
+    cache.set("first", 1, size=1)
+    cache.set("second", 2, size=1)
+    cache.get("first")
+    cache.set("third", 3, size=1)
+
+    assert cache.get("first") == 1
+    assert cache.get("second") is None
+    assert cache.get("third") == 3
+
+
+def test_set_evicts_least_recently_used_by_bytes():
+    cache = LocalCache(ttl=10, max_entries=10, max_bytes=10)
+
+    cache.set("first", 1, size=4)
+    cache.set("second", 2, size=4)
+    cache.set("third", 3, size=4)
+
+    assert cache.get("first") is None
+    assert cache.size == 8
+
+
+def test_set_too_big():
+    cache = LocalCache(ttl=10, max_entries=10, max_bytes=10)
+
+    cache.set("test", "old", size=1)
+    cache.set("test", "new", size=11)
+
+    assert cache.get("test") is None
+    assert cache.size == 0
+
+
+def test_handle_invalidation_ignores_own_writes():
+    cache = LocalCache(ttl=10, max_entries=10, max_bytes=100)
+    cache.set("test", "value", size=5)
+
+    cache.handle_invalidation(invalidation_message("test").encode())
+    assert cache.get("test") == "value"
+
+    cache.handle_invalidation(b"other-worker:test")
+    assert cache.get("test") is None
+
+
+@pytest.mark.asyncio
+async def test_listen_for_invalidations(mocker):
+    cache = LocalCache(ttl=10, max_entries=10, max_bytes=100)
+    cache.set("test", "value", size=5)
+    received = asyncio.Event()
+
+    async def listen():
+        yield {"type": "subscribe", "data": 1}
+        cache.set("test", "value", size=5)
+        yield {"type": "message", "data": b"other-worker:test"}
+        received.set()
+        await asyncio.Event().wait()
+
+    mock_pubsub = mocker.AsyncMock()
+    mock_pubsub.__aenter__.return_value = mock_pubsub
+    mock_pubsub.listen = listen
+    mock_connection = mocker.AsyncMock()
+    mock_connection.pubsub = mocker.Mock(return_value=mock_pubsub)
+
+    task = asyncio.ensure_future(listen_for_invalidations(local_cache=cache, connection=mock_connection))
+    await asyncio.wait_for(received.wait(), timeout=1)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert cache.get("test") is None
+    mock_pubsub.subscribe.assert_awaited_once()
+    mock_connection.aclose.assert_awaited_once()
@@ -1,4 +1,7 @@
+from array import array
+
 import pytest
+from exceptions import CalculateScoreException
 from schemas.github import GitHupApiResponse
 from schemas.popular import PopularResponseModel
 from services.popular import PopularService
@@ -25,3 +28,32 @@ def test_calculate_score_exception():
 
     with pytest.raises(Exception):
         service.calculate_score(repository_data={})
+
+
+def test_calculate_scores():
+    service = PopularService()
+
+    scores, popular = service.calculate_scores(stars=array("q", [0, 500, 10]), forks=[0, 50, 245])
+
+    assert list(scores) == [0, 600, 500]
+    assert popular == [False, True, True]
+
+
+def test_calculate_scores_length_mismatch():
+    service = PopularService()
+
+    with pytest.raises(CalculateScoreException):
+        service.calculate_scores(stars=[1, 2], forks=[1])
+
+
+def test_score_repositories_matches_calculate_score():
+    service = PopularService()
+    repositories = [
+        GitHupApiResponse(stars=500, forks=50, owner="lore", name="big"),
+        GitHupApiResponse(stars=3, forks=1, owner="lore", name="small"),
+    ]
+
+    scored = service.score_repositories(repositories=repositories)
+
+    assert len(scored) == 2
+    assert list(scored.dicts()) == [service.calculate_score(repository_data=repo).dict() for repo in repositories]
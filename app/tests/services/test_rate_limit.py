@@ -0,0 +1,116 @@
+import fakeredis
+import httpx
+import pytest
+from exceptions import RequestRateLimited
+from redis.exceptions import ConnectionError as RedisConnectionError
+from services.circuit_breaker import CircuitBreaker
+from services.rate_limit import BLOCKED_KEY, RateLimiter, backoff, rate_limit_kind, retry_after
+
+
+@pytest.mark.asyncio
+async def test_acquire_takes_tokens_from_shared_bucket(mocker):
+    connection = fakeredis.FakeAsyncRedis()
+    limiters = [RateLimiter(connection=connection, rate=1, burst=2, max_wait=0) for _ in range(2)]
+    mocker.patch("services.rate_limit.time.time", return_value=100.0)
+
+    await limiters[0].acquire()
+    await limiters[1].acquire()
+
+    with pytest.raises(RequestRateLimited) as ex:
+        await limiters[0].acquire()
+    assert ex.value.retry_after == pytest.approx(1)
+
+
+@pytest.mark.asyncio
+async def test_acquire_waits_for_next_token(mocker):
+    connection = fakeredis.FakeAsyncRedis()
+    limiter = RateLimiter(connection=connection, rate=2, burst=1, max_wait=1)
+    mocker.patch("services.rate_limit.time.time", return_value=100.0)
+    sleep = mocker.patch("services.rate_limit.asyncio.sleep")
+
+    await limiter.acquire()
+    await limiter.acquire()
+
+    sleep.assert_awaited_once_with(pytest.approx(0.5))
+
+
+@pytest.mark.asyncio
+async def test_acquire_sends_request_when_redis_fails(mocker):
+    breaker = CircuitBreaker(name="redis", failure_threshold=1, reset_timeout=5)
+    limiter = RateLimiter(connection=fakeredis.FakeAsyncRedis(), circuit_breaker=breaker)
+    limiter.acquire_script = mocker.AsyncMock(side_effect=RedisConnectionError)
+    sleep = mocker.patch("services.rate_limit.asyncio.sleep")
+
+    await limiter.acquire()
+
+    sleep.assert_not_awaited()
+    assert breaker.state == "open"
+
+
+@pytest.mark.asyncio
+async def test_redis_circuit_open_skips_shared_bucket(mocker):
+    breaker = CircuitBreaker(name="redis", failure_threshold=1, reset_timeout=5)
+    breaker.record_failure()
+    connection = mocker.Mock(set=mocker.AsyncMock())
+    limiter = RateLimiter(connection=connection, circuit_breaker=breaker)
+    limiter.acquire_script = mocker.AsyncMock()
+
+    await limiter.acquire()
+    await limiter.observe(httpx.Response(429, headers={"Retry-After": "1"}))
+
+    limiter.acquire_script.assert_not_awaited()
+    connection.set.assert_not_awaited()
+    assert limiter.blocked
+
+
+@pytest.mark.asyncio
+async def test_observe_secondary_rate_limit_blocks_every_worker():
+    connection = fakeredis.FakeAsyncRedis()
+    limiter = RateLimiter(connection=connection)
+
+    await limiter.observe(httpx.Response(403, headers={"Retry-After": "60"}))
+
+    other_worker = RateLimiter(connection=connection, max_wait=5)
+    assert limiter.blocked
+    assert 0 < await connection.pttl(BLOCKED_KEY) <= 60000
+    with pytest.raises(RequestRateLimited):
+        await other_worker.acquire()
+
+
+@pytest.mark.asyncio
+async def test_observe_exhausted_quota_does_not_block():
+    limiter = RateLimiter()
+
+    await limiter.observe(httpx.Response(403, headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "0"}))
+
+    assert not limiter.blocked
+
+
+@pytest.mark.parametrize(
+    "response, kind",
+    [
+        (httpx.Response(200), None),
+        (httpx.Response(403, json={"message": "Bad credentials"}), None),
+        (httpx.Response(403, headers={"X-RateLimit-Remaining": "0"}), "primary"),
+        (httpx.Response(403, headers={"Retry-After": "30"}), "secondary"),
+        (httpx.Response(403, json={"message": "You have exceeded a secondary rate limit"}), "secondary"),
+        (httpx.Response(429), "secondary"),
+    ],
+)
+def test_rate_limit_kind(response, kind):
+    assert rate_limit_kind(response) == kind
+
+
+def test_retry_after(mocker):
+    mocker.patch("services.rate_limit.time.time", return_value=100.0)
+
+    assert retry_after(httpx.Response(403, headers={"Retry-After": "30"})) == 30
+    assert retry_after(httpx.Response(403, headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "160"})) == 60
+    assert retry_after(httpx.Response(403)) == 0
+
+
+def test_backoff(mocker):
+    mocker.patch("services.rate_limit.random.uniform", side_effect=lambda low, high: high)
+
+    assert [backoff(attempt=attempt, base=1) for attempt in range(3)] == [1, 2, 4]
+    assert backoff(attempt=0, base=1, minimum=30) == 30
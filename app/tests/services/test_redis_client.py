@@ -0,0 +1,74 @@
+import pytest
+from redis import asyncio as aioredis
+from redis.asyncio.cluster import RedisCluster
+from redis.asyncio.sentinel import SentinelConnectionPool
+from services import redis_client
+from services.redis_client import close_redis, create_redis, get_redis, is_cluster, sentinel_address
+
+
+def test_create_redis_standalone(mocker):
+    mocker.patch("services.redis_client.REDIS_MAX_CONNECTIONS", 7)
+    mocker.patch("services.redis_client.REDIS_POOL_TIMEOUT", 3.0)
+
+    connection = create_redis()
+
+    pool = connection.connection_pool
+    assert isinstance(pool, aioredis.BlockingConnectionPool)
+    assert pool.max_connections == 7
+    assert pool.timeout == 3.0
+    assert pool.connection_kwargs["socket_timeout"] == redis_client.REDIS_SOCKET_TIMEOUT
+    assert pool.connection_kwargs["socket_connect_timeout"] == redis_client.REDIS_CONNECT_TIMEOUT
+    assert pool.connection_kwargs["health_check_interval"] == redis_client.REDIS_HEALTH_CHECK_INTERVAL
+    assert not is_cluster(connection)
+
+
+def test_create_redis_without_socket_timeout():
+    assert create_redis(socket_timeout=None).connection_pool.connection_kwargs["socket_timeout"] is None
+
+
+def test_create_redis_sentinel(mocker):
+    mocker.patch("services.redis_client.REDIS_MODE", "sentinel")
+    mocker.patch("services.redis_client.REDIS_SENTINELS", ["sentinel-1:26379", "sentinel-2:26380"])
+    mocker.patch("services.redis_client.REDIS_SENTINEL_MASTER", "popular")
+
+    connection = create_redis()
+
+    pool = connection.connection_pool
+    assert isinstance(pool, SentinelConnectionPool)
+    assert pool.service_name == "popular"
+    assert [sentinel.connection_pool.connection_kwargs["port"] for sentinel in pool.sentinel_manager.sentinels] == [
+        26379,
+        26380,
+    ]
+
+
+def test_create_redis_cluster(mocker):
+    mocker.patch("services.redis_client.REDIS_MODE", "cluster")
+
+    connection = create_redis()
+
+    assert isinstance(connection, RedisCluster)
+    assert is_cluster(connection)
+
+
+def test_create_redis_unknown_mode(mocker):
+    mocker.patch("services.redis_client.REDIS_MODE", "replica")
+
+    with pytest.raises(ValueError):
+        create_redis()
+
+
+def test_sentinel_address():
+    assert sentinel_address("10.0.0.1:26379") == ("10.0.0.1", 26379)
+
+
+@pytest.mark.asyncio
+async def test_get_redis_shared_until_closed(mocker):
+    mocker.patch("services.redis_client._redis", None)
+
+    connection = get_redis()
+
+    assert get_redis() is connection
+    await close_redis()
+    assert get_redis() is not connection
+    await close_redis()
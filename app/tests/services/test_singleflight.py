@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+from services.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_do_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    results = await asyncio.gather(*(flight.do(key="test", fn=fn) for _ in range(10)))
+
+    assert results == ["value"] * 10
+    assert len(calls) == 1
+    assert flight.calls == {}
+
+
+@pytest.mark.asyncio
+async def test_do_runs_again_once_finished():
+    flight = SingleFlight()
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        return len(calls)
+
+    assert await flight.do(key="test", fn=fn) == 1
+    assert await flight.do(key="test", fn=fn) == 2
+
+
+@pytest.mark.asyncio
+async def test_do_shares_exceptions():
+    flight = SingleFlight()
+
+    async def fn():
+        await asyncio.sleep(0.01)
+        raise ValueError
+
+    results = await asyncio.gather(*(flight.do(key="test", fn=fn) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.calls == {}
+
+
+@pytest.mark.asyncio
+async def test_do_caller_cancellation_does_not_cancel_call():
+    flight = SingleFlight()
+
+    async def fn():
+        await asyncio.sleep(0.01)
+        return "value"
+
+    first = asyncio.ensure_future(flight.do(key="test", fn=fn))
+    second = asyncio.ensure_future(flight.do(key="test", fn=fn))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "value"
@@ -0,0 +1,71 @@
+import httpx
+import pytest
+from exceptions import RequestRateLimited
+from services.token_pool import TokenPool, token_label
+
+
+def test_pick_token_with_most_remaining_budget():
+    pool = TokenPool(tokens=["first", "second"])
+    first, second = pool.tokens
+    pool.observe(state=first, response=httpx.Response(200, headers={"X-RateLimit-Remaining": "10"}))
+    pool.observe(state=second, response=httpx.Response(200, headers={"X-RateLimit-Remaining": "20"}))
+    first.reset_at = second.reset_at = float("inf")
+
+    assert pool.pick() is second
+    assert second.remaining == 19
+
+
+def test_pick_unknown_token_first(mocker):
+    mocker.patch("services.token_pool.time.time", return_value=100.0)
+    pool = TokenPool(tokens=["first", "second"])
+    pool.observe(
+        state=pool.tokens[0],
+        response=httpx.Response(200, headers={"X-RateLimit-Remaining": "4000", "X-RateLimit-Reset": "160"}),
+    )
+
+    assert pool.pick() is pool.tokens[1]
+
+
+def test_exhausted_token_out_of_rotation_until_reset(mocker):
+    time = mocker.patch("services.token_pool.time.time", return_value=100.0)
+    pool = TokenPool(tokens=["first", "second"])
+    first, second = pool.tokens
+    pool.observe(
+        state=first, response=httpx.Response(403, headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "160"})
+    )
+    pool.observe(state=second, response=httpx.Response(401))
+
+    with pytest.raises(RequestRateLimited) as ex:
+        pool.pick()
+    assert ex.value.retry_after == 60
+
+    time.return_value = 160.0
+    assert pool.pick() is first
+
+
+def test_invalid_token_out_of_rotation(mocker):
+    pool = TokenPool(tokens=["first", "second"], invalid_cooldown=600)
+    pool.observe(state=pool.tokens[0], response=httpx.Response(401))
+
+    assert pool.available() == [pool.tokens[1]]
+    assert [pool.pick() for _ in range(2)] == [pool.tokens[1]] * 2
+
+
+def test_budget_low(mocker):
+    mocker.patch("services.token_pool.time.time", return_value=100.0)
+    pool = TokenPool(tokens=["first", "second"], reserve=100)
+    first, second = pool.tokens
+    assert not pool.budget_low
+
+    for state, remaining in ((first, "60"), (second, "40")):
+        pool.observe(
+            state=state,
+            response=httpx.Response(200, headers={"X-RateLimit-Remaining": remaining, "X-RateLimit-Reset": "160"}),
+        )
+
+    assert pool.budget_low
+
+
+def test_token_label_hides_token():
+    assert token_label("secret") != "secret"
+    assert len(token_label("secret")) == 8
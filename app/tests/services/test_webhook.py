@@ -0,0 +1,69 @@
+import hashlib
+import hmac
+
+import pytest
+from exceptions import WebhookPayloadException
+from schemas.github import GitHupApiResponse
+from services.cache import org_key, repository_key
+from services.webhook import parse_event, verify_signature
+
+
+def payload(action=None, **changes):
+    return {
+        "action": action,
+        "repository": {"name": "repo", "owner": {"login": "Lore"}, "stargazers_count": 12, "forks_count": 3},
+        "changes": changes or None,
+    }
+
+
+def test_verify_signature():
+    signature = "sha256=" + hmac.new(b"secret", b"{}", hashlib.sha256).hexdigest()
+
+    assert verify_signature(secret="secret", body=b"{}", signature=signature)
+    assert not verify_signature(secret="other", body=b"{}", signature=signature)
+    assert not verify_signature(secret="secret", body=b"{ }", signature=signature)
+    assert not verify_signature(secret="secret", body=b"{}", signature=signature.replace("sha256=", "sha1="))
+    assert not verify_signature(secret="secret", body=b"{}", signature=None)
+
+
+def test_parse_event():
+    event = parse_event(event="star", payload=payload(action="created"))
+
+    assert event.repository == GitHupApiResponse(stars=12, forks=3, owner="Lore", name="repo")
+    assert event.repository_name == "Lore/repo"
+    assert not event.deleted
+    assert event.stale_keys() == []
+
+
+@pytest.mark.parametrize(
+    "action, changes, stale_keys",
+    [
+        ("edited", {}, []),
+        ("created", {}, [org_key("lore")]),
+        ("deleted", {}, [repository_key("lore/repo"), org_key("lore")]),
+        ("renamed", {"repository": {"name": {"from": "old"}}}, [repository_key("lore/old"), org_key("lore")]),
+        (
+            "transferred",
+            {"owner": {"from": {"organization": {"login": "before"}}}},
+            [repository_key("before/repo"), org_key("before"), org_key("lore")],
+        ),
+    ],
+)
+def test_parse_repository_event_stale_keys(action, changes, stale_keys):
+    event = parse_event(event="repository", payload=payload(action=action, **changes))
+
+    assert event.stale_keys() == stale_keys
+    assert event.deleted == (action == "deleted")
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {},
+        {"repository": {"name": "repo", "owner": {"login": "lore"}}},
+        {"action": "renamed", "repository": payload()["repository"]},
+    ],
+)
+def test_parse_event_invalid_payload(body):
+    with pytest.raises(WebhookPayloadException):
+        parse_event(event="repository", payload=body)
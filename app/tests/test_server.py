@@ -0,0 +1,37 @@
+import os
+import socket
+
+from server import NoDelayHTTPProtocol, prepare_metrics_dir
+
+
+def test_prepare_metrics_dir_creates_a_temporary_directory(mocker, monkeypatch, tmp_path):
+    # restores the environment prepare_metrics_dir writes to, the metrics endpoint reads it
+    mocker.patch.dict(os.environ)
+    os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    monkeypatch.setattr("tempfile.tempdir", str(tmp_path))
+
+    prepare_metrics_dir()
+
+    assert os.path.dirname(os.environ["PROMETHEUS_MULTIPROC_DIR"]) == str(tmp_path)
+
+
+def test_prepare_metrics_dir_wipes_the_files_of_a_previous_run(monkeypatch, tmp_path):
+    (tmp_path / "counter_1.db").write_bytes(b"")
+    (tmp_path / "notes.txt").write_text("kept")
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+
+    prepare_metrics_dir()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["notes.txt"]
+
+
+def test_no_delay_protocol_sets_tcp_nodelay(mocker):
+    protocol = NoDelayHTTPProtocol.__new__(NoDelayHTTPProtocol)
+    connection_made = mocker.patch.object(NoDelayHTTPProtocol.__bases__[0], "connection_made")
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        transport = mocker.Mock(get_extra_info=mocker.Mock(return_value=sock))
+
+        protocol.connection_made(transport)
+
+        assert sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY)
+    connection_made.assert_called_once_with(transport)
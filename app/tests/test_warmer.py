@@ -0,0 +1,75 @@
+import time
+
+import fakeredis
+import pytest
+from config import CACHE_HOT_KEYS_KEY, CACHE_SOFT_TTL
+from services.access_tracker import AccessTracker
+from services.cache import CacheEntry, CacheService
+from warmer import CacheWarmer, refresh_cost
+
+
+def make_warmer(mocker, **kwargs):
+    view = mocker.Mock(refresh_repository=mocker.AsyncMock(), refresh_org=mocker.AsyncMock())
+    view.cache_service = CacheService(
+        connection=fakeredis.FakeAsyncRedis(), local_cache=None, access_tracker=AccessTracker()
+    )
+    return CacheWarmer(view=view, interval=60, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_run_once_refreshes_hot_keys_about_to_go_stale(mocker):
+    warmer = make_warmer(mocker, top_n=2, rate_share=1)
+    cache_service = warmer.cache_service
+    await cache_service.set_entry(
+        key="repo:lore/fresh", entry=CacheEntry(value=b"{}", fetched_at=time.time(), delta=0)
+    )
+    await cache_service.set_entry(
+        key="repo:lore/stale", entry=CacheEntry(value=b"{}", fetched_at=time.time() - CACHE_SOFT_TTL + 30, delta=0)
+    )
+    for key, accesses in (("repo:lore/fresh", 3), ("repo:lore/stale", 2), ("repo:lore/cold", 1)):
+        for _ in range(accesses):
+            await cache_service.check_entry(key=key)
+
+    assert await warmer.run_once() == 1
+
+    warmer.view.refresh_repository.assert_awaited_once_with(repository_name="lore/stale", cache_entry=mocker.ANY)
+    assert await cache_service.connection.zscore(CACHE_HOT_KEYS_KEY, "repo:lore/fresh") == 1.5
+
+
+@pytest.mark.asyncio
+async def test_run_once_single_leader_per_interval(mocker):
+    warmer = make_warmer(mocker, rate_share=1)
+    other_worker = CacheWarmer(view=warmer.view, interval=60)
+    await warmer.cache_service.connection.zadd("org:lore:repos", {"lore/test": 5})
+    await warmer.cache_service.check_org(org_name="lore")
+
+    await warmer.run_once()
+    await other_worker.run_once()
+
+    warmer.view.refresh_org.assert_awaited_once_with(org_name="lore", cache_entry=None)
+
+
+@pytest.mark.asyncio
+async def test_warm_stays_within_rate_share(mocker):
+    mocker.patch("warmer.GITHUB_RATE_LIMIT_RATE", 0.05)
+    warmer = make_warmer(mocker, rate_share=0.5)
+
+    assert await warmer.warm(keys=["repo:lore/first", "repo:lore/second", "repo:lore/third", "lore/legacy"]) == 1
+    warmer.view.refresh_repository.assert_awaited_once_with(repository_name="lore/first", cache_entry=None)
+
+
+def test_refresh_cost():
+    org_entry = CacheEntry(value=b"{}\n" * 250, fetched_at=0, delta=0)
+
+    assert refresh_cost(key="repo:lore/test", entry=None) == 1
+    assert refresh_cost(key="org:lore", entry=None) is None
+    assert refresh_cost(key="org:lore", entry=None, org_size=250) == 3
+    assert refresh_cost(key="org:lore", entry=org_entry) == 3
+
+
+@pytest.mark.asyncio
+async def test_warm_skips_uncached_org_of_unknown_size(mocker):
+    warmer = make_warmer(mocker, rate_share=1)
+
+    assert await warmer.warm(keys=["org:lore"]) == 0
+    warmer.view.refresh_org.assert_not_awaited()
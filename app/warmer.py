@@ -0,0 +1,158 @@
+"""Keep the hottest repositories and orgs cached, refreshing them before their entries go stale."""
+
+import asyncio
+import logging
+import math
+import time
+import uuid
+from typing import List, Optional
+
+from config import (
+    BATCH_CONCURRENCY,
+    CACHE_HOT_KEYS_KEY,
+    CACHE_WARMER_DECAY,
+    CACHE_WARMER_ENABLED,
+    CACHE_WARMER_INTERVAL,
+    CACHE_WARMER_RATE_SHARE,
+    CACHE_WARMER_TOP_N,
+    GITHUB_ORG_PAGE_SIZE,
+    GITHUB_RATE_LIMIT_RATE,
+)
+from metrics import CACHE_WARMER_REFRESHES
+from routers.popular import PopularView, org_flight, repository_flight
+from services.cache import ORG_PREFIX, REPOSITORY_PREFIX, CacheEntry, CacheService
+from services.token_pool import get_token_pool
+
+logger = logging.getLogger(__name__)
+
+LEADER_KEY = "popular:warmer:leader"
+
+
+class CacheWarmer:
+    """Refresh the most accessed keys about to go stale, with a share of the GitHub request rate."""
+
+    def __init__(self, *, view=None, interval=None, top_n=None, rate_share=None, decay=None):
+        self.view = view or PopularView()
+        self.cache_service: CacheService = self.view.cache_service
+        self.interval = interval or CACHE_WARMER_INTERVAL
+        self.top_n = top_n or CACHE_WARMER_TOP_N
+        self.rate_share = rate_share if rate_share is not None else CACHE_WARMER_RATE_SHARE
+        self.decay = decay if decay is not None else CACHE_WARMER_DECAY
+        self.worker_id = uuid.uuid4().hex
+
+    @property
+    def budget(self) -> int:
+        return int(self.rate_share * GITHUB_RATE_LIMIT_RATE * self.interval)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:
+                logger.error(f"Cache warmer run failed, ex: {ex!r}")
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self) -> int:
+        """Flush the access counts and, when elected for this interval, warm the hot keys. Return the refreshes."""
+        connection = self.cache_service.connection
+        if self.cache_service.access_tracker is not None:
+            await self.cache_service.access_tracker.flush(connection)
+
+        if not await connection.set(LEADER_KEY, self.worker_id, nx=True, px=int(self.interval * 1000)):
+            return 0
+
+        hot_keys = [key.decode("utf-8") for key in await connection.zrevrange(CACHE_HOT_KEYS_KEY, 0, self.top_n - 1)]
+        await connection.zunionstore(CACHE_HOT_KEYS_KEY, {CACHE_HOT_KEYS_KEY: self.decay})
+        return await self.warm(keys=hot_keys)
+
+    async def warm(self, keys: List[str]) -> int:
+        # keys recorded before the cache was namespaced have neither prefix and are left to decay
+        repository_keys = [key for key in keys if key.startswith(REPOSITORY_PREFIX)]
+        entries = dict(zip(repository_keys, await self.cache_service.check_many(keys=repository_keys, track=False)))
+        org_sizes = {}
+        for key in keys:
+            if key.startswith(ORG_PREFIX):
+                entries[key] = await self.cache_service.check_org(org_name=key[len(ORG_PREFIX) :], track=False)
+                if entries[key] is None:
+                    # the index can outlive an org entry whose repositories were evicted
+                    org_sizes[key] = await self.cache_service.org_size(org_name=key[len(ORG_PREFIX) :])
+        due = [(key, entries[key]) for key in keys if key in entries and self.is_due(entries[key])]
+
+        budget = self.budget
+        selected = []
+        for key, entry in due:
+            cost = refresh_cost(key=key, entry=entry, org_size=org_sizes.get(key) or 0)
+            if cost is None or cost > budget or get_token_pool().budget_low:
+                CACHE_WARMER_REFRESHES.labels(result="skipped").inc()
+                continue
+            budget -= cost
+            selected.append((key, entry))
+
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+        async def refresh(key: str, entry: Optional[CacheEntry]) -> None:
+            async with semaphore:
+                if key.startswith(REPOSITORY_PREFIX):
+                    name = key[len(REPOSITORY_PREFIX) :]
+                    await repository_flight.do(
+                        key=name, fn=lambda: self.view.refresh_repository(repository_name=name, cache_entry=entry)
+                    )
+                else:
+                    name = key[len(ORG_PREFIX) :]
+                    await org_flight.do(key=name, fn=lambda: self.view.refresh_org(org_name=name, cache_entry=entry))
+
+        results = await asyncio.gather(*(refresh(key, entry) for key, entry in selected), return_exceptions=True)
+        refreshed = 0
+        for (key, _), result in zip(selected, results):
+            if isinstance(result, Exception):
+                logger.error(f"Cache warmer could not refresh {key}, ex: {result!r}")
+                CACHE_WARMER_REFRESHES.labels(result="failed").inc()
+            else:
+                CACHE_WARMER_REFRESHES.labels(result="refreshed").inc()
+                refreshed += 1
+        return refreshed
+
+    def is_due(self, entry: Optional[CacheEntry]) -> bool:
+        return entry is None or time.time() - entry.fetched_at + self.interval >= entry.soft_ttl
+
+
+def refresh_cost(key: str, entry: Optional[CacheEntry], org_size: int = 0) -> Optional[int]:
+    """GitHub requests refreshing `key` takes: one for a repository, one per page of an org.
+
+    An uncached org is sized by the `org_size` repositories of its index, and costs None when that is unknown.
+    """
+    if key.startswith(REPOSITORY_PREFIX):
+        return 1
+    if entry is not None:
+        return max(1, math.ceil(entry.value.count(b"\n") / GITHUB_ORG_PAGE_SIZE))
+    if not org_size:
+        return None
+    return math.ceil(org_size / GITHUB_ORG_PAGE_SIZE)
+
+
+_warmer: Optional[asyncio.Task] = None
+
+
+def start_warmer() -> None:
+    global _warmer
+    if not CACHE_WARMER_ENABLED or _warmer is not None:
+        return
+    _warmer = asyncio.ensure_future(CacheWarmer().run())
+
+
+async def stop_warmer() -> None:
+    global _warmer
+    if _warmer is None:
+        return
+    _warmer.cancel()
+    await asyncio.gather(_warmer, return_exceptions=True)
+    _warmer = None
+
+
+if __name__ == "__main__":  # pragma: no cover
+    from nicelog import setup_logging
+
+    setup_logging()
+    asyncio.run(CacheWarmer().run())